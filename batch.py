@@ -0,0 +1,352 @@
+import argparse
+import configparser
+import csv
+import functools
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import psutil
+
+from jump_detector import JumpDetector
+from main import CaptureState, DetectorSet, JumpIndex, JumpStats, MotionGate, MyApp, QosController, ReorderBuffer
+from pipeline import AtomicCounter, Pipeline, PipelineError
+from soak import Setting
+from thread_policy import cpu_topology, set_openvino_threads
+from top_detection import TopDetector
+
+CONFIG_FILE = 'config.ini'
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm')
+SUMMARY_FIELDS = ["file", "status", "count", "frames", "duration", "processing_time", "fps", "error"]
+DETECTION_CONFIDENCE = 0.35
+
+
+def load_settings(args):
+    """Detection settings from config.ini, the model and runtime ones from the command line."""
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    defaults = config['DEFAULT']
+    return {
+        'model_path': args.model or defaults.get('performance_model_path', 'Models/trained_n_int8_openvino_model'),
+        'confidence': defaults.getfloat('model_confidence', 0.8),
+        'threshold': defaults.getfloat('relative_jump_threshold', 2.0),
+        'window': defaults.getfloat('jump_window_seconds', 0.3),
+        'max_gap': defaults.getfloat('jump_max_gap', 0.5),
+        'motion_gate': defaults.getboolean('motion_gate', True),
+        'motion_threshold': defaults.getfloat('motion_threshold', 2.0),
+        'motion_max_skip': defaults.getint('motion_max_skip', 30),
+        'reorder_window': defaults.getint('reorder_window', 8),
+        'reorder_timeout': defaults.getint('reorder_timeout_ms', 500) / 1000,
+        'imgsz': args.imgsz,
+        'device': args.device,
+        'threads': args.threads_per_job,
+        'checkpoint_interval': args.checkpoint_interval,
+    }
+
+def job_count(threads_per_job, job_memory_gb):
+    """Concurrent jobs that fit the physical cores and the available memory."""
+    by_cores = len(cpu_topology()) // threads_per_job
+    by_memory = int(psutil.virtual_memory().available / (job_memory_gb * 1e9))
+    return max(1, min(by_cores, by_memory))
+
+def find_videos(paths):
+    """Return the videos in the given files and directories, leaving out our own outputs."""
+    videos = []
+    for path in paths:
+        names = [os.path.join(path, name) for name in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
+        videos += [name for name in names
+                   if name.lower().endswith(VIDEO_EXTENSIONS) and not name.endswith('_out.mp4')]
+    return videos
+
+def checkpoint_path(video_path):
+    return f'{video_path}_checkpoint.json'
+
+def summary_path(video_path):
+    return f'{video_path}_summary.json'
+
+def write_json(path, data):
+    """Replace a JSON file atomically, an interrupted write leaves the previous version."""
+    with open(f'{path}.tmp', 'w') as jsonfile:
+        json.dump(data, jsonfile)
+    os.replace(f'{path}.tmp', path)
+
+def is_done(video_path):
+    """True if a previous run finished this video."""
+    try:
+        with open(summary_path(video_path)) as summaryfile:
+            return json.load(summaryfile).get('status') == 'done'
+    except (OSError, ValueError):
+        return False
+
+# Each worker process loads the model once and reuses it for every job it runs
+_settings = None
+_model = None
+
+def init_worker(settings):
+    global _settings
+    _settings = settings
+
+    # Jobs run side by side, OpenCV gets no thread pool of its own
+    import cv2
+    cv2.setNumThreads(1)
+
+def predict_args(settings):
+    """Arguments every detection of a job runs with."""
+    return dict(device=settings['device'], conf=DETECTION_CONFIDENCE, imgsz=settings['imgsz'], max_det=5,
+                agnostic_nms=True, iou=0.5)
+
+def load_model():
+    global _model
+    if _model is None:
+        import numpy as np
+        from ultralytics import YOLO
+        _model = TopDetector(YOLO(_settings['model_path'], task='detect'))
+
+        # The first call builds the predictor, its OpenVINO model is then recompiled once for this process
+        if _settings['device'] == 'cpu':
+            imgsz = _settings['imgsz']
+            _model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), **predict_args(_settings))
+            set_openvino_threads(_model.model, _settings['model_path'], _settings['threads'])
+    return _model
+
+def kept_jumps(index_path, counter):
+    """Rows of the jump index counted up to the checkpoint."""
+    if not counter or not os.path.isfile(index_path):
+        return []
+    with open(index_path) as indexfile:
+        return indexfile.readlines()[1:counter + 1]
+
+class BatchJob:
+    """The capture stages of MyApp, run without a window on one recorded video.
+
+    The stage methods are MyApp's own, so a batch count goes through the same
+    motion gate, reorder buffer and jump check as the GUI. The QoS controller
+    keeps the stride at 1 and the input size fixed, since a recording has no
+    frame rate to keep up with. The count stage writes the checkpoints; the
+    motion gate and last detection start afresh on resume.
+    """
+
+    preprocess_frame = MyApp.preprocess_frame
+    frame_skip_reason = MyApp.frame_skip_reason
+    infer_frame = MyApp.infer_frame
+    count_frame = MyApp.count_frame
+    jump_check = MyApp.jump_check
+    media_timestamp = staticmethod(MyApp.media_timestamp)
+
+    def __init__(self, settings, video_path):
+        self.settings = settings
+        self.video_path = video_path
+        self.hardware = settings['device']
+        self.model_confidence = settings['confidence']
+        self.relative_jump_threshold = settings['threshold']
+        self.motion_gate = Setting(settings['motion_gate'])
+        self.tk_model_verbose = Setting(False)
+        self.tk_save_lowscores = Setting(False)
+        self.qos_enabled = False
+        self.qos_target_fps = 0
+        self.jump_stats = JumpStats()
+        self.counter = AtomicCounter(0)
+
+        # Written by count
+        self.frame_number = 0
+        self.timestamp = 0.0
+        self.frames_this_run = 0
+        self.processing_before = 0.0
+        self.start = None
+        self.last_checkpoint = None
+
+    def start_capture(self, detector):
+        """Set up a capture the way MyApp.scanning does, with one inference worker."""
+        settings = self.settings
+        capture = CaptureState(self.video_path, None)
+        capture.motion = MotionGate(settings['motion_threshold'], settings['motion_max_skip'])
+        qos = QosController([settings['imgsz']], 1, 0, default_size=settings['imgsz'])
+        capture.detectors = DetectorSet([detector], settings['model_path'], qos)
+        capture.jump_detector = JumpDetector(settings['threshold'], settings['window'], settings['max_gap'])
+        return capture
+
+    def build_pipeline(self, capture, cap, first_frame):
+        """The grab, preprocess, infer and count stages of MyApp.build_pipeline, ending at the count."""
+        detectors = capture.detectors
+        pipeline = Pipeline()
+        frames = pipeline.channel("frames", 8)
+        preprocessed = pipeline.channel("preprocessed", 60)
+        capture.reorder_buffer = pipeline.add_channel(
+            ReorderBuffer("results", self.settings['reorder_window'], self.settings['reorder_timeout']))
+
+        pipeline.stage("grab", functools.partial(self.grab_frames, capture, cap, first_frame), outputs=[frames])
+        capture.reorder_buffer.add_producer()
+        pipeline.stage("preprocess", functools.partial(self.preprocess_frame, capture), frames, [preprocessed],
+                       on_finish=capture.reorder_buffer.close)
+        pipeline.stage("infer", [functools.partial(self.infer_frame, detectors, worker_number)
+                                 for worker_number in range(detectors.workers)],
+                       preprocessed, [capture.reorder_buffer])
+        pipeline.stage("count", functools.partial(self.count_and_checkpoint, capture, worker_count=detectors.workers),
+                       capture.reorder_buffer)
+        return pipeline
+
+    def grab_frames(self, capture, cap, first_frame):
+        """Yield (frame_number, timestamp, frame) from the video, starting at `first_frame`."""
+        frame_number = first_frame
+        while True:
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                return
+            yield frame_number, self.media_timestamp(cap, frame_number, capture.fps), frame
+            frame_number += 1
+
+    def count_and_checkpoint(self, capture, item, worker_count):
+        """Run the count stage, checkpointing every counted frame up to this one now and then."""
+        self.count_frame(capture, item, worker_count)
+        self.frame_number, self.timestamp = item[0] + 1, item[1][0]
+        self.frames_this_run += 1
+
+        # The index is line buffered, so it already holds every jump the checkpoint counts
+        now = time.perf_counter()
+        if now - self.last_checkpoint >= self.settings['checkpoint_interval']:
+            write_json(checkpoint_path(self.video_path), {
+                'frame': item[0],
+                'timestamp': self.timestamp,
+                'counter': self.counter.value,
+                'detector': capture.jump_detector.state(),
+                'processing_time': self.processing_before + now - self.start,
+            })
+            self.last_checkpoint = now
+
+    def run(self, detector):
+        """Count the video, resuming from its checkpoint, and return its summary."""
+        import cv2
+
+        video_path = self.video_path
+        capture = self.start_capture(detector)
+        checkpoint = None
+        if os.path.isfile(checkpoint_path(video_path)):
+            with open(checkpoint_path(video_path)) as checkpointfile:
+                checkpoint = json.load(checkpointfile)
+            self.counter.set(checkpoint['counter'])
+            self.frame_number = checkpoint['frame'] + 1
+            self.timestamp = checkpoint['timestamp']
+            self.processing_before = checkpoint['processing_time']
+            capture.jump_detector.restore(checkpoint['detector'])
+            print(f"Resuming {video_path} at frame {self.frame_number} with {self.counter.value} jump(s)")
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise RuntimeError(f"Unable to open video: {video_path}")
+        capture.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        if self.frame_number:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, self.frame_number)
+
+        index_path = f'{video_path}_jumps.csv'
+        kept = kept_jumps(index_path, self.counter.value)
+        capture.jump_index = JumpIndex(index_path)
+        capture.jump_index.file.writelines(kept)
+
+        capture.pipeline = pipeline = self.build_pipeline(capture, cap, self.frame_number)
+        self.start = self.last_checkpoint = time.perf_counter()
+        try:
+            pipeline.run()
+        except PipelineError as e:
+            # Raised again as a plain error, PipelineError does not survive the trip back to the batch process
+            raise RuntimeError(str(e)) from None
+        finally:
+            cap.release()
+            capture.jump_index.close()
+
+        processing_time = time.perf_counter() - self.start
+        if capture.motion.frames:
+            print(f"{video_path}: motion gate skipped {capture.motion.skipped} of {capture.motion.frames} frame(s)")
+        return {
+            'file': video_path,
+            'status': 'done',
+            'count': self.counter.value,
+            'frames': self.frame_number,
+            'duration': round(self.timestamp, 3),
+            'processing_time': round(self.processing_before + processing_time, 1),
+            'fps': round(self.frames_this_run / processing_time, 1) if processing_time > 0 else 0.0,
+            'error': '',
+        }
+
+def process_video(video_path):
+    """Count one video, resuming from its checkpoint, and return its summary."""
+    summary = BatchJob(_settings, video_path).run(load_model())
+    write_json(summary_path(video_path), summary)
+    if os.path.isfile(checkpoint_path(video_path)):
+        os.remove(checkpoint_path(video_path))
+    return summary
+
+def append_summary(summary_file, summary):
+    """Add a finished or failed job to the batch summary CSV."""
+    new_file = not os.path.isfile(summary_file)
+    with open(summary_file, 'a', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=SUMMARY_FIELDS)
+        if new_file:
+            writer.writeheader()
+        writer.writerow(summary)
+
+def main():
+    parser = argparse.ArgumentParser(description="Count jumps in every video of a directory, unattended.")
+    parser.add_argument("paths", nargs='+', help="Video files or directories of videos")
+    parser.add_argument("--watch", action="store_true", help="Keep watching the directories for new videos")
+    parser.add_argument("--poll", type=float, default=30.0, help="Seconds between scans in watch mode")
+    parser.add_argument("--jobs", type=int, default=0, help="Concurrent jobs (default: sized to cores and memory)")
+    parser.add_argument("--threads-per-job", type=int, default=2, help="Inference threads per job")
+    parser.add_argument("--job-memory", type=float, default=1.5, help="Expected memory per job in GB")
+    parser.add_argument("--checkpoint-interval", type=float, default=30.0, help="Seconds between checkpoints")
+    parser.add_argument("--model", help="Model to use (default: performance_model_path)")
+    parser.add_argument("--imgsz", type=int, default=416, help="Model input size")
+    parser.add_argument("--device", default="cpu", help="Inference device, cpu or cuda")
+    parser.add_argument("--summary", default="batch_summary.csv", help="CSV every finished job is added to")
+    parser.add_argument("--force", action="store_true", help="Process videos again even if they are done")
+    args = parser.parse_args()
+
+    settings = load_settings(args)
+    jobs = args.jobs or job_count(args.threads_per_job, args.job_memory)
+    print(f"Running {jobs} job(s) at a time with {args.threads_per_job} thread(s) each, model: {settings['model_path']}")
+
+    submitted = set()
+    sizes = {}
+    futures = {}
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(settings,)) as executor:
+        try:
+            while True:
+                for video_path in find_videos(args.paths):
+                    if video_path in submitted or (is_done(video_path) and not args.force):
+                        continue
+
+                    # A video still being written grows between scans, it is picked up once it stops
+                    size = os.path.getsize(video_path)
+                    if args.watch and sizes.get(video_path) != size:
+                        sizes[video_path] = size
+                        continue
+
+                    if args.force and os.path.isfile(checkpoint_path(video_path)):
+                        os.remove(checkpoint_path(video_path))
+                    submitted.add(video_path)
+                    futures[executor.submit(process_video, video_path)] = video_path
+
+                if not futures and not args.watch:
+                    break
+
+                done, _ = wait(futures, timeout=args.poll, return_when=FIRST_COMPLETED)
+                for future in done:
+                    video_path = futures.pop(future)
+                    try:
+                        summary = future.result()
+                        print(f"Done: {video_path}: {summary['count']} jump(s), {summary['frames']} frame(s) "
+                              f"in {summary['processing_time']:.0f}s ({summary['fps']} fps)")
+                    except Exception as e:
+                        print(f"Failed: {video_path}: {e}")
+                        summary = {'file': video_path, 'status': 'failed', 'error': str(e)}
+                    append_summary(args.summary, summary)
+
+        except KeyboardInterrupt:
+            print("\nInterrupted, unfinished videos resume from their checkpoint on the next run")
+            executor.shutdown(wait=False, cancel_futures=True)
+            return
+
+    print(f"Batch finished, summary: {args.summary}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import configparser
+import statistics
+import tempfile
+import time
+
+import cv2
+import streamlink
+from ultralytics import YOLO
+
+from hls_replay import SCENARIOS, ReplayStream, load_source
+from jump_detector import JumpDetector
+from top_detection import TopDetector
+
+CONFIG_FILE = 'config.ini'
+
+
+def capture(stream, detect, detector_settings, confidence, imgsz, max_seconds):
+    """Capture a replay stream as the app does and return the monotonic time each frame was counted, and the count."""
+    session = streamlink.Streamlink()
+    session.set_option('stream-timeout', 30)
+    streams = session.streams(url=stream.url)
+    cap = cv2.VideoCapture(streams['best'].url)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    detector = JumpDetector(*detector_settings)
+    counted = []
+    counter = 0
+    deadline = time.monotonic() + max_seconds
+    try:
+        while time.monotonic() < deadline:
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                break
+
+            timestamp = len(counted) / stream.fps
+            best_detection = detect(frame, device="cpu", conf=0.35, imgsz=imgsz, max_det=5, agnostic_nms=True, iou=0.5)
+            counter += detector.observe(timestamp, best_detection, confidence)
+            counted.append(time.monotonic())
+    finally:
+        cap.release()
+    return counted, counter
+
+def frame_segments(stream):
+    """Sequence number of every frame the client fetched, in fetch order."""
+    sequences = []
+    for sequence, _ in stream.fetched:
+        sequences += [sequence] * round(stream.timeline[sequence]['duration'] * stream.fps)
+    return sequences
+
+def analyze(stream, counted, stall_at):
+    """Ingest-to-count latencies, stall recovery time and dropped frames of one capture.
+
+    Frames are matched to segments by position in the fetched segments, so the
+    numbers assume the decoder drops no frame of a segment it received.
+    """
+    sequences = frame_segments(stream)
+    latencies = [count_time - stream.publish_time(sequence) for sequence, count_time in zip(sequences, counted)]
+
+    # Recovery is how long after the first segment behind the stall went live its first frame was counted
+    recovery = None
+    if stall_at is not None:
+        recovery = next((count_time - stream.publish_time(sequence)
+                         for sequence, count_time in zip(sequences, counted) if sequence >= stall_at), None)
+
+    # Every frame of a segment that went live between the first fetch and the end should have been counted
+    dropped = 0
+    if stream.fetched:
+        end_time = counted[-1] if counted else time.monotonic()
+        first = stream.fetched[0][0]
+        published = [sequence for sequence in range(first, len(stream.timeline))
+                     if stream.publish_time(sequence) <= end_time]
+        expected = sum(round(stream.timeline[sequence]['duration'] * stream.fps) for sequence in published)
+        dropped = max(0, expected - len(counted))
+    return latencies, recovery, dropped
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Twitch-style ingest against a local HLS replay with faults.")
+    parser.add_argument("source", help="Video file (segmented with ffmpeg) or a DVR folder with dvr.m3u8")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--model", help="Model to use (default: performance_model_path)")
+    parser.add_argument("--imgsz", type=int, default=416, help="Model input size")
+    parser.add_argument("--window", type=int, default=6, help="Segments in the live playlist")
+    parser.add_argument("--segment-seconds", type=float, default=2.0, help="Segment length when cutting a video")
+    parser.add_argument("--max-seconds", type=float, default=120.0, help="Longest capture per scenario")
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    defaults = config['DEFAULT']
+    model_path = args.model or defaults.get('performance_model_path', 'Models/trained_n_int8_openvino_model')
+    detector_settings = (defaults.getfloat('relative_jump_threshold', 2.0), defaults.getfloat('jump_window_seconds', 0.3),
+                         defaults.getfloat('jump_max_gap', 0.5))
+    confidence = defaults.getfloat('model_confidence', 0.8)
+    detect = TopDetector(YOLO(model_path, task='detect'))
+
+    rows = []
+    with tempfile.TemporaryDirectory() as work_path:
+        directory_path, segments, height, fps = load_source(args.source, work_path, args.segment_seconds)
+        for scenario in args.scenarios.split(","):
+            faults = SCENARIOS[scenario]
+            stream = ReplayStream(directory_path, segments, height, fps, window=args.window, **faults)
+            print(f"Running scenario '{scenario}' on {len(stream.timeline)} segment(s)...")
+            try:
+                counted, counter = capture(stream, detect, detector_settings, confidence, args.imgsz, args.max_seconds)
+            finally:
+                stream.close()
+
+            latencies, recovery, dropped = analyze(stream, counted, faults.get('stall_at'))
+            rows.append((scenario, len(counted), dropped, latencies, faults.get('stall_at'), recovery, counter))
+
+    print(f"\n{'Scenario':<14} {'Frames':>7} {'Dropped':>8} {'Latency p50':>12} {'p95':>7} {'Stall recovery':>15} {'Count':>6}")
+    for scenario, frames, dropped, latencies, stall_at, recovery, counter in rows:
+        p50 = f"{statistics.median(latencies):.2f}s" if latencies else "-"
+        p95 = f"{sorted(latencies)[int(len(latencies) * 0.95)]:.2f}s" if latencies else "-"
+        recovery_text = "-" if stall_at is None else "not recovered" if recovery is None else f"{recovery:.2f}s"
+        print(f"{scenario:<14} {frames:>7} {dropped:>8} {p50:>12} {p95:>7} {recovery_text:>15} {counter:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import cv2
+import torch
+from ultralytics import YOLO
+
+from top_detection import TopDetector, best_of, scale_box, top_box
+
+
+def load_frames(video_path, count):
+    """Read up to `count` frames from the start of a video."""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Unable to open video: {video_path}")
+
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def measure(function, inputs):
+    """Return the per-call times and the per-call peak of Python allocations in bytes."""
+    times = []
+    for item in inputs:
+        start = time.perf_counter()
+        function(item)
+        times.append(time.perf_counter() - start)
+
+    # Traced separately, tracing slows the calls down
+    peaks = []
+    tracemalloc.start()
+    for item in inputs:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        function(item)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return times, peaks
+
+def summarize(name, times, peaks, reference_times=None):
+    """Print the median and p95 time and the median peak allocation of one path."""
+    median = statistics.median(times)
+    p95 = sorted(times)[int(len(times) * 0.95)]
+    speedup = f"  speedup x{statistics.median(reference_times) / median:.2f}" if reference_times else ""
+    print(f"{name:<22} median {median * 1000:7.3f} ms  p95 {p95 * 1000:7.3f} ms  "
+          f"peak alloc {statistics.median(peaks) / 1024:7.1f} KiB{speedup}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full and top-1 post-processing of YOLO detections.")
+    parser.add_argument("video", help="Video the frames are taken from")
+    parser.add_argument("--model", default="Models/trained_n_int8_openvino_model", help="Model used for inference")
+    parser.add_argument("--imgsz", type=int, default=416, help="Model input size")
+    parser.add_argument("--device", default="cpu", help="Inference device, e.g. cpu or 0")
+    parser.add_argument("--frames", type=int, default=300, help="Frames to measure")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    if not frames:
+        exit(f"No frames read from {args.video}")
+    predict_args = dict(device=args.device, conf=0.35, imgsz=args.imgsz, max_det=5, agnostic_nms=True, iou=0.5)
+
+    # The first call builds the predictor both paths share
+    model = YOLO(args.model, task='detect')
+    model(source=frames[0], verbose=False, **predict_args)
+    predictor = model.predictor
+
+    # Run the backend once per frame, both post-processing paths start from the same raw output
+    outputs = []
+    with torch.inference_mode():
+        for frame in frames:
+            image = predictor.preprocess([frame])
+            outputs.append((frame, image, predictor.inference(image)))
+
+    def full(output):
+        frame, image, preds = output
+        return best_of(predictor.postprocess(preds, image, [frame]))
+
+    def fast(output):
+        frame, image, preds = output
+        box = top_box(preds, predictor.args.conf)
+        if box is None:
+            return None
+        return tuple(int(value) for value in scale_box(box[:4], image.shape[2:], frame.shape)), box[4]
+
+    # The fast path must pick the same box, rounding may move a corner by a pixel
+    mismatches = 0
+    for output in outputs:
+        reference, candidate = full(output), fast(output)
+        if (reference is None) != (candidate is None):
+            mismatches += 1
+        elif reference is not None and (max(abs(a - b) for a, b in zip(reference[0], candidate[0])) > 1
+                                        or abs(reference[1] - candidate[1]) > 1e-4):
+            mismatches += 1
+    print(f"{len(frames)} frame(s), {mismatches} mismatch(es) between full and top-1 post-processing\n")
+
+    print("Post-processing only:")
+    full_times, full_peaks = measure(full, outputs)
+    fast_times, fast_peaks = measure(fast, outputs)
+    summarize("full (NMS + Results)", full_times, full_peaks)
+    summarize("top-1", fast_times, fast_peaks, full_times)
+
+    print("\nEnd to end per frame:")
+    detector = TopDetector(model)
+    detector(frames[0], **predict_args)
+    end_to_end_full, end_to_end_full_peaks = measure(
+        lambda frame: best_of(model(source=frame, verbose=False, **predict_args)), frames)
+    end_to_end_fast, end_to_end_fast_peaks = measure(lambda frame: detector(frame, **predict_args), frames)
+    summarize("full (NMS + Results)", end_to_end_full, end_to_end_full_peaks)
+    summarize("top-1", end_to_end_fast, end_to_end_fast_peaks, end_to_end_full)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+import psutil
+
+RUNTIMES = ("ultralytics", "openvino")
+
+
+def rss_mb():
+    """Resident memory of this process in MB."""
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+def run_child(runtime, video_path, model_path, imgsz, frame_count):
+    """Load one runtime in this fresh process, measure it and print the results as JSON."""
+    baseline = rss_mb()
+
+    # Everything the runtime needs to run a frame, OpenCV included in both
+    import_start = time.perf_counter()
+    import cv2
+    if runtime == "openvino":
+        from openvino_detector import OpenVinoDetector
+    else:
+        from ultralytics import YOLO
+        from top_detection import TopDetector
+    import_seconds = time.perf_counter() - import_start
+
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < frame_count:
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise RuntimeError(f"No frames read from {video_path}")
+
+    # Model ready is load plus the first inference, as the app warms up
+    predict_args = dict(device="cpu", conf=0.35, imgsz=imgsz, max_det=5, agnostic_nms=True, iou=0.5)
+    ready_start = time.perf_counter()
+    if runtime == "openvino":
+        detector = OpenVinoDetector(model_path)
+    else:
+        detector = TopDetector(YOLO(model_path, task='detect'))
+    detector(frames[0], **predict_args)
+    ready_seconds = time.perf_counter() - ready_start
+
+    times = []
+    detections = 0
+    for frame in frames:
+        start = time.perf_counter()
+        detections += detector(frame, **predict_args) is not None
+        times.append(time.perf_counter() - start)
+
+    print(json.dumps({
+        'import': import_seconds,
+        'ready': ready_seconds,
+        'median': statistics.median(times),
+        'p95': sorted(times)[int(len(times) * 0.95)],
+        'rss': rss_mb(),
+        'rss_added': rss_mb() - baseline,
+        'detections': detections,
+        'frames': len(frames),
+        'torch': 'torch' in sys.modules,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the ultralytics and the torch-free OpenVINO CPU runtime.")
+    parser.add_argument("video", help="Video the frames are taken from")
+    parser.add_argument("--model", default="Models/trained_n_int8_openvino_model", help="OpenVINO export both runtimes load")
+    parser.add_argument("--imgsz", type=int, default=416, help="Model input size")
+    parser.add_argument("--frames", type=int, default=300, help="Frames to measure")
+    parser.add_argument("--runtimes", default=",".join(RUNTIMES), help="Comma-separated runtimes to compare")
+    parser.add_argument("--child", choices=RUNTIMES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.video, args.model, args.imgsz, args.frames)
+        return
+
+    # Each runtime runs in its own process, so imports and memory are measured from a cold start
+    results = {}
+    for runtime in args.runtimes.split(","):
+        print(f"Measuring {runtime}...")
+        output = subprocess.run([sys.executable, __file__, args.video, "--model", args.model, "--imgsz", str(args.imgsz),
+                                 "--frames", str(args.frames), "--child", runtime],
+                                capture_output=True, text=True)
+        if output.returncode != 0:
+            print(output.stderr)
+            exit(f"The {runtime} runtime failed")
+        results[runtime] = json.loads(output.stdout.strip().splitlines()[-1])
+
+    print(f"\n{'Runtime':<12} {'Import':>8} {'Ready':>8} {'Median':>9} {'p95':>9} {'RSS':>8} {'Added':>8} {'Torch':>6} {'Detections':>11}")
+    for runtime, result in results.items():
+        print(f"{runtime:<12} {result['import']:>7.2f}s {result['ready']:>7.2f}s {result['median'] * 1000:>6.2f} ms "
+              f"{result['p95'] * 1000:>6.2f} ms {result['rss']:>5.0f} MB {result['rss_added']:>5.0f} MB "
+              f"{'yes' if result['torch'] else 'no':>6} {result['detections']:>5}/{result['frames']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import sys
+import threading
+import time
+
+from pipeline import AtomicCounter, Pipeline
+
+
+def gil_enabled():
+    """True unless running on a free-threaded build with the GIL off."""
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+def spin(cost):
+    """Pure-Python CPU work standing in for a stage's own Python code."""
+    total = 0
+    for i in range(cost):
+        total += i * i
+    return total
+
+def check_counter(threads, increments):
+    """Add to an AtomicCounter from many threads while the GUI thread would read it.
+
+    Returns lost increments and out-of-order change notifications, both must be zero.
+    """
+    changes = []
+    counter = AtomicCounter(on_change=changes.append)
+
+    def add():
+        for _ in range(increments):
+            counter.add(1)
+
+    workers = [threading.Thread(target=add) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    lost = threads * increments - counter.value
+    out_of_order = sum(1 for previous, value in zip(changes, changes[1:]) if value != previous + 1)
+    return lost, out_of_order
+
+def check_unlocked(threads, increments):
+    """Lost increments of a plain `+=` counter, for comparison."""
+    state = {'value': 0}
+
+    def add():
+        for _ in range(increments):
+            state['value'] += 1
+
+    workers = [threading.Thread(target=add) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * increments - state['value']
+
+def run_pipeline(items, workers, cost):
+    """Run a capture-shaped pipeline of CPU-bound stages.
+
+    Returns wall seconds, CPU seconds, items missing or doubled, and the
+    pipeline for its metrics.
+    """
+    pipeline = Pipeline()
+    frames = pipeline.channel("frames", 8)
+    preprocessed = pipeline.channel("preprocessed", 60)
+    results = pipeline.channel("results", 60)
+    counted = pipeline.channel("counted", 8)
+    received = []
+
+    def grab():
+        for frame_number in range(items):
+            spin(cost)
+            yield frame_number
+
+    def work(frame_number, weight=1):
+        spin(cost * weight)
+        return frame_number
+
+    pipeline.stage("grab", grab, outputs=[frames])
+    pipeline.stage("preprocess", work, frames, [preprocessed])
+    pipeline.stage("infer", lambda frame_number: work(frame_number, 4), preprocessed, [results], workers=workers)
+    pipeline.stage("count", work, results, [counted])
+    pipeline.stage("render", lambda frame_number: received.append(work(frame_number)), counted)
+
+    cpu_start = time.process_time()
+    pipeline.run()
+    cpu = time.process_time() - cpu_start
+
+    # Infer workers finish out of order, but nothing may be lost or doubled
+    missing = len(set(range(items)) ^ set(received)) + len(received) - len(set(received))
+    return pipeline.elapsed, cpu, missing, pipeline
+
+def main():
+    parser = argparse.ArgumentParser(description="Check thread safety and measure stage parallelism, e.g. on python3.13t.")
+    parser.add_argument("--items", type=int, default=2000, help="Items sent through the pipeline")
+    parser.add_argument("--cost", type=int, default=20000, help="Loop iterations of work per stage and item")
+    parser.add_argument("--workers", default="1,2,4", help="Infer worker counts to compare")
+    parser.add_argument("--threads", type=int, default=8, help="Threads for the counter check")
+    parser.add_argument("--increments", type=int, default=100000, help="Increments per thread for the counter check")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil_enabled() else 'disabled'}")
+
+    lost, out_of_order = check_counter(args.threads, args.increments)
+    print(f"AtomicCounter: {lost} lost increment(s), {out_of_order} out-of-order change(s)")
+    print(f"Unlocked counter: {check_unlocked(args.threads, args.increments)} lost increment(s)")
+
+    print(f"\n{'Workers':>7} {'Items/s':>9} {'Cores used':>11} {'Missing':>8}")
+    failed = lost or out_of_order
+    for workers in (int(value) for value in args.workers.split(",")):
+        elapsed, cpu, missing, pipeline = run_pipeline(args.items, workers, args.cost)
+        failed = failed or missing
+        print(f"{workers:>7} {args.items / elapsed:>9.1f} {cpu / elapsed:>11.2f} {missing:>8}")
+
+    # Stage shares of the last run, busy stays high on every stage only when stages truly overlap
+    print(f"\n{pipeline.report()}")
+
+    if failed:
+        exit("Thread safety check failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import configparser
+import glob
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import cv2
+import yaml
+from ultralytics import YOLO
+
+CONFIG_FILE = 'config.ini'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def find_images(directory_path):
+    """Return the images of a calibration set, either flat or in an images/ folder."""
+    images_path = os.path.join(directory_path, "images")
+    if os.path.isdir(images_path):
+        directory_path = images_path
+    return sorted(path for path in glob.glob(os.path.join(directory_path, "*"))
+                  if path.lower().endswith(IMAGE_EXTENSIONS))
+
+def write_dataset_yaml(directory_path, names, yaml_path):
+    """Describe the calibration set as a YOLO dataset, the int8 export calibrates on its images."""
+    images_path = os.path.join(directory_path, "images")
+    if not os.path.isdir(images_path):
+        images_path = directory_path
+
+    with open(yaml_path, 'w') as yamlfile:
+        yaml.safe_dump({'path': os.path.abspath(images_path), 'train': '.', 'val': '.', 'names': names}, yamlfile)
+
+def export_model(checkpoint, output_dir, imgsz, **export_args):
+    """Export the checkpoint and move the result into output_dir. Returns the new path."""
+    exported_path = YOLO(checkpoint).export(imgsz=imgsz, **export_args)
+    target_path = os.path.join(output_dir, os.path.basename(str(exported_path).rstrip(os.sep)))
+
+    if os.path.abspath(exported_path) != os.path.abspath(target_path):
+        if os.path.isdir(target_path):
+            shutil.rmtree(target_path)
+        elif os.path.isfile(target_path):
+            os.remove(target_path)
+        shutil.move(str(exported_path), target_path)
+
+    print(f"Exported: {target_path}")
+    return target_path
+
+def best_boxes(model_path, images, imgsz):
+    """Return the best box of every image, or None, and the per-image inference times."""
+    model = YOLO(model_path, task='detect')
+    boxes = []
+    times = []
+    for image_path in images:
+        frame = cv2.imread(image_path)
+        start = time.perf_counter()
+        results = model(source=frame, verbose=False, imgsz=imgsz, conf=0.05, device="cpu")
+        times.append(time.perf_counter() - start)
+
+        detections = results[0].boxes
+        if len(detections) > 0:
+            best = int(detections.conf.argmax())
+            boxes.append((tuple(float(value) for value in detections.xyxy[best]), float(detections.conf[best])))
+        else:
+            boxes.append(None)
+
+    # The first calls include graph setup, they say nothing about steady-state speed
+    return boxes, times[min(3, len(times) - 1):]
+
+def box_iou(box_a, box_b):
+    """Intersection over union of two xyxy boxes."""
+    x1, y1 = max(box_a[0], box_b[0]), max(box_a[1], box_b[1])
+    x2, y2 = min(box_a[2], box_b[2]), min(box_a[3], box_b[3])
+    intersection = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = ((box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
+             + (box_b[2] - box_b[0]) * (box_b[3] - box_b[1]) - intersection)
+    return intersection / union if union > 0 else 0.0
+
+def compare(reference, reference_times, candidate, candidate_times, name):
+    """Print how far a candidate's best boxes drift from the fp32 reference and how much faster it is."""
+    ious = []
+    confidence_deltas = []
+    agreements = 0
+    for reference_box, candidate_box in zip(reference, candidate):
+        if reference_box is None or candidate_box is None:
+            agreements += reference_box is None and candidate_box is None
+            continue
+
+        iou = box_iou(reference_box[0], candidate_box[0])
+        ious.append(iou)
+        confidence_deltas.append(candidate_box[1] - reference_box[1])
+        agreements += iou >= 0.5
+
+    speedup = statistics.median(reference_times) / statistics.median(candidate_times)
+    print(f"{name:<14} agreement {agreements / len(reference):6.1%}  "
+          f"mean IoU {statistics.fmean(ious) if ious else 0.0:.3f}  "
+          f"mean conf delta {statistics.fmean(confidence_deltas) if confidence_deltas else 0.0:+.3f}  "
+          f"median {statistics.median(candidate_times) * 1000:6.1f} ms  speedup x{speedup:.2f}")
+
+def register_model(model_path):
+    """Point performance_model_path in config.ini at the new model."""
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    config.set('DEFAULT', 'performance_model_path', model_path.replace(os.sep, '/'))
+
+    with open(CONFIG_FILE, 'w') as configfile:
+        config.write(configfile)
+    print(f"Registered performance_model_path = {model_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build int8 OpenVINO models calibrated on our own frames.")
+    parser.add_argument("checkpoint", help="Trained YOLO checkpoint (.pt)")
+    parser.add_argument("calibration", help="Calibration frames, e.g. Saved_Frames from 'Save Low Scores'")
+    parser.add_argument("--val", help="Frames used to measure drift and speed (default: the calibration frames)")
+    parser.add_argument("--imgsz", type=int, default=416, help="Export input size")
+    parser.add_argument("--fraction", type=float, default=1.0, help="Fraction of the calibration set to use")
+    parser.add_argument("--onnx", action="store_true", help="Also export an ONNX model")
+    parser.add_argument("--output", default="Models", help="Directory the exported models are moved to")
+    parser.add_argument("--register", action="store_true", help="Set performance_model_path to the int8 model")
+    args = parser.parse_args()
+
+    calibration_images = find_images(args.calibration)
+    if not calibration_images:
+        exit(f"No calibration images found in {args.calibration}")
+    val_images = find_images(args.val) if args.val else calibration_images
+    print(f"Calibrating on {len(calibration_images)} image(s), validating on {len(val_images)} image(s)")
+
+    os.makedirs(args.output, exist_ok=True)
+    names = YOLO(args.checkpoint).names
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yaml_path = os.path.join(temp_dir, "calibration.yaml")
+        write_dataset_yaml(args.calibration, names, yaml_path)
+
+        int8_path = export_model(args.checkpoint, args.output, args.imgsz, format="openvino", int8=True,
+                                 data=yaml_path, fraction=args.fraction)
+
+    # An fp32 OpenVINO export separates the int8 gain from the runtime gain, it is not kept
+    fp32_dir = tempfile.mkdtemp()
+    fp32_path = export_model(args.checkpoint, fp32_dir, args.imgsz, format="openvino")
+    onnx_path = export_model(args.checkpoint, args.output, args.imgsz, format="onnx") if args.onnx else None
+
+    print("\nMeasuring drift against the fp32 checkpoint...")
+    reference, reference_times = best_boxes(args.checkpoint, val_images, args.imgsz)
+    print(f"{'fp32 .pt':<14} median {statistics.median(reference_times) * 1000:6.1f} ms")
+    for name, model_path in (("fp32 OpenVINO", fp32_path), ("int8 OpenVINO", int8_path), ("ONNX", onnx_path)):
+        if model_path is not None:
+            boxes, times = best_boxes(model_path, val_images, args.imgsz)
+            compare(reference, reference_times, boxes, times, name)
+    shutil.rmtree(fp32_dir, ignore_errors=True)
+
+    if args.register:
+        register_model(int8_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import argparse
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Fault settings of the named scenarios, see ReplayStream
+SCENARIOS = {
+    "clean": {},
+    "slow-segments": {'delay_every': 4, 'delay_seconds': 1.5},
+    "discontinuity": {'discontinuity_every': 10, 'discontinuity_skip': 2},
+    "stall": {'stall_at': 12, 'stall_seconds': 8.0},
+}
+
+
+def read_playlist(playlist_path):
+    """Return the (file name, duration) of every segment of a media playlist."""
+    segments = []
+    duration = None
+    with open(playlist_path) as playlistfile:
+        for line in playlistfile:
+            line = line.strip()
+            if line.startswith('#EXTINF:'):
+                duration = float(line[8:].split(',')[0])
+            elif line and not line.startswith('#') and duration is not None:
+                segments.append((line, duration))
+                duration = None
+    return segments
+
+def segment_video(video_path, directory_path, segment_seconds):
+    """Cut a recording into MPEG-TS segments with ffmpeg, copying the video stream, and return the playlist."""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is needed to segment a video, or pass a DVR folder instead")
+
+    playlist_path = os.path.join(directory_path, 'source.m3u8')
+    subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-i', video_path, '-map', '0:v:0', '-c', 'copy',
+                    '-f', 'segment', '-segment_time', str(segment_seconds), '-segment_format', 'mpegts',
+                    '-segment_list', playlist_path, '-segment_list_type', 'm3u8',
+                    os.path.join(directory_path, 'segment_%05d.ts')], check=True)
+    return playlist_path
+
+def load_source(source, work_path, segment_seconds=2.0):
+    """Return the segment directory, segments, frame height and fps of a video file or a DVR folder."""
+    import cv2
+
+    if os.path.isdir(source):
+        directory_path = source
+        playlist_path = os.path.join(source, 'dvr.m3u8')
+    else:
+        directory_path = work_path
+        playlist_path = segment_video(source, work_path, segment_seconds)
+
+    segments = read_playlist(playlist_path)
+    if not segments:
+        raise RuntimeError(f"No segments found for {source}")
+
+    cap = cv2.VideoCapture(os.path.join(directory_path, segments[0][0]))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    return directory_path, segments, height, fps
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serve the master playlist, the live playlist and the segments of a ReplayStream."""
+
+    def do_GET(self):
+        stream = self.server.stream
+        if self.path == "/master.m3u8":
+            self.send_body(stream.master_playlist().encode(), "application/vnd.apple.mpegurl")
+        elif self.path == "/live.m3u8":
+            self.send_body(stream.live_playlist().encode(), "application/vnd.apple.mpegurl")
+        elif self.path.startswith("/segment/") and self.path.endswith(".ts"):
+            try:
+                body = stream.segment(int(self.path[9:-3]))
+            except (ValueError, LookupError):
+                self.send_error(404)
+                return
+            self.send_body(body, "video/mp2t")
+        else:
+            self.send_error(404)
+
+    def send_body(self, body, content_type):
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        # Players reload the playlist every segment, request logs would flood the console
+        pass
+
+class ReplayStream:
+    """Serve recorded segments as a live HLS stream with a sliding-window playlist.
+
+    The first `window` segments are live when the first client asks for the
+    playlist, every later one goes live when its duration has passed, as if it
+    were being encoded. Faults are injected on that timeline:
+
+    - every `delay_every`-th segment is sent `delay_seconds` late, a slow CDN
+    - every `discontinuity_every` segments `discontinuity_skip` segments are
+      left out behind an EXT-X-DISCONTINUITY, as when an ad break is spliced in
+    - publishing stops for `stall_seconds` before segment `stall_at`, an
+      encoder stall
+
+    The playlist ends with ENDLIST after the last segment. Publish and first
+    fetch times are kept, so benchmarks can tell how long after going live a
+    frame was counted.
+    """
+
+    def __init__(self, directory_path, segments, height, fps, port=0, window=6, delay_every=0, delay_seconds=0.0,
+                 discontinuity_every=0, discontinuity_skip=0, stall_at=None, stall_seconds=0.0):
+        self.directory_path = directory_path
+        self.height = height
+        self.fps = fps
+        self.window = max(1, window)
+        self.delay_every = delay_every
+        self.delay_seconds = delay_seconds
+        self.start_time = None
+        self.fetched = []
+        self.lock = threading.Lock()
+
+        # Timeline of served segments, `live` is when each goes live in seconds from the start
+        self.timeline = []
+        index = 0
+        live = 0.0
+        while index < len(segments):
+            discontinuity = bool(discontinuity_every) and bool(self.timeline) and len(self.timeline) % discontinuity_every == 0
+            if discontinuity:
+                index += discontinuity_skip
+                if index >= len(segments):
+                    break
+            if stall_at is not None and len(self.timeline) == stall_at:
+                live += stall_seconds
+
+            file_name, duration = segments[index]
+            live += duration
+            self.timeline.append({'file': file_name, 'duration': duration, 'live': live,
+                                  'discontinuity': discontinuity})
+            index += 1
+        self.preroll = self.timeline[min(self.window, len(self.timeline)) - 1]['live']
+
+        sizes = [os.path.getsize(os.path.join(directory_path, segment['file'])) for segment in self.timeline]
+        self.bandwidth = int(sum(sizes) * 8 / sum(segment['duration'] for segment in self.timeline))
+        self.target_duration = math.ceil(max(segment['duration'] for segment in self.timeline))
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), ReplayHandler)
+        self.server.daemon_threads = True
+        self.server.stream = self
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/master.m3u8"
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="ReplayServer").start()
+
+    def publish_time(self, sequence):
+        """Monotonic time segment `sequence` went live, None before the first playlist request."""
+        if self.start_time is None:
+            return None
+        return self.start_time + max(0.0, self.timeline[sequence]['live'] - self.preroll)
+
+    def master_playlist(self):
+        """Single-rendition master playlist, players name the rendition after its height."""
+        frame_rate = f",FRAME-RATE={self.fps:.3f}" if self.fps else ""
+        return (f"#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH={self.bandwidth},RESOLUTION={self.height * 16 // 9}x{self.height}"
+                f"{frame_rate}\nlive.m3u8\n")
+
+    def live_playlist(self):
+        """Sliding window over the segments that are live now."""
+        with self.lock:
+            if self.start_time is None:
+                self.start_time = time.monotonic()
+            elapsed = time.monotonic() - self.start_time + self.preroll
+
+        live = sum(1 for segment in self.timeline if segment['live'] <= elapsed)
+        first = max(0, live - self.window)
+        discontinuities = sum(1 for segment in self.timeline[:first] if segment['discontinuity'])
+
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{self.target_duration}",
+                 f"#EXT-X-MEDIA-SEQUENCE:{first}", f"#EXT-X-DISCONTINUITY-SEQUENCE:{discontinuities}"]
+        for sequence in range(first, live):
+            segment = self.timeline[sequence]
+            if segment['discontinuity']:
+                lines.append("#EXT-X-DISCONTINUITY")
+            lines.append(f"#EXTINF:{segment['duration']:.3f},")
+            lines.append(f"segment/{sequence}.ts")
+        if live == len(self.timeline):
+            lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def segment(self, sequence):
+        """Return the bytes of a live segment, late if it is one of the delayed ones."""
+        publish_time = self.publish_time(sequence)
+        if publish_time is None or publish_time > time.monotonic():
+            raise LookupError(sequence)
+
+        with self.lock:
+            if sequence not in (fetched for fetched, _ in self.fetched):
+                self.fetched.append((sequence, time.monotonic()))
+
+        if self.delay_every and sequence % self.delay_every == self.delay_every - 1:
+            time.sleep(self.delay_seconds)
+        with open(os.path.join(self.directory_path, self.timeline[sequence]['file']), 'rb') as segmentfile:
+            return segmentfile.read()
+
+    def close(self):
+        """Stop serving."""
+        self.server.shutdown()
+        self.server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recording as a live HLS stream with injected faults.")
+    parser.add_argument("source", help="Video file (segmented with ffmpeg) or a DVR folder with dvr.m3u8")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="clean", help="Faults to inject")
+    parser.add_argument("--port", type=int, default=8080, help="Port to serve on")
+    parser.add_argument("--window", type=int, default=6, help="Segments in the live playlist")
+    parser.add_argument("--segment-seconds", type=float, default=2.0, help="Segment length when cutting a video")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_path:
+        directory_path, segments, height, fps = load_source(args.source, work_path, args.segment_seconds)
+        stream = ReplayStream(directory_path, segments, height, fps, args.port, args.window, **SCENARIOS[args.scenario])
+        print(f"Serving {len(stream.timeline)} segment(s), scenario '{args.scenario}': {stream.url}")
+        print(f'Capture it with: python main.py --twitch-url "{stream.url}"')
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\nStopping replay server")
+        finally:
+            stream.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import csv
+import cv2
+import numpy as np
+import os
+
+
+def load_jump_index(index_path):
+    """Load a jump index CSV into a dict of jump number -> (frame number, timestamp)."""
+    jumps = {}
+    with open(index_path, newline='') as indexfile:
+        for row in csv.DictReader(indexfile):
+            jumps[int(row['jump'])] = (int(row['frame']), float(row['timestamp']))
+    return jumps
+
+def parse_jump_range(text):
+    """Parse '41000' or '41000-41005' into an inclusive (first, last) tuple."""
+    first, _, last = text.partition('-')
+    first = int(first)
+    last = int(last) if last else first
+    if last < first:
+        raise argparse.ArgumentTypeError(f"Invalid jump range: {text}")
+    return first, last
+
+def read_frames(cap, start_time, end_time):
+    """Yield (timestamp, frame) from start_time to end_time, seeking instead of decoding from the start."""
+    # The FFmpeg backend seeks to the keyframe before start_time and decodes forward from there
+    cap.set(cv2.CAP_PROP_POS_MSEC, max(0.0, start_time) * 1000)
+
+    while True:
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            return
+
+        timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if timestamp > end_time:
+            return
+        yield timestamp, frame
+
+def extract_clip(cap, output_path, jump, timestamp, before, after, fps):
+    """Write a short clip around a single jump, labelled with the jump number."""
+    out = None
+    frames_written = 0
+    try:
+        for _, frame in read_frames(cap, timestamp - before, timestamp + after):
+            if out is None:
+                frame_height, frame_width, _ = frame.shape
+                fourcc = cv2.VideoWriter.fourcc(*'mp4v')
+                out = cv2.VideoWriter(output_path, fourcc, fps, (frame_width, frame_height))
+                if not out.isOpened():
+                    print(f"Error: Unable to open video writer for {output_path}")
+                    return 0
+
+            cv2.putText(frame, f'Jump #{jump:,}', (20, 40),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 255), 3)
+            out.write(frame)
+            frames_written += 1
+    finally:
+        if out is not None:
+            out.release()
+
+    return frames_written
+
+def contact_sheet(cap, output_path, jumps, columns, thumb_width):
+    """Write a grid of the frame at each jump, labelled with its jump number."""
+    thumbs = []
+    for jump, (_, timestamp) in jumps:
+        # Only the frame at the jump is needed, take the first one at or after its timestamp
+        frame = next((frame for _, frame in read_frames(cap, timestamp, timestamp + 1.0)), None)
+        if frame is None:
+            print(f"Warning: Could not read frame for jump #{jump}")
+            continue
+
+        frame_height, frame_width, _ = frame.shape
+        thumb_height = int(frame_height * thumb_width / frame_width)
+        thumb = cv2.resize(frame, (thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+        cv2.putText(thumb, f'#{jump:,}', (8, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        thumbs.append(thumb)
+
+    if not thumbs:
+        print("No frames found for contact sheet.")
+        return False
+
+    # Pad the last row with blank tiles so every row has the same width
+    blank = np.zeros_like(thumbs[0])
+    while len(thumbs) % columns:
+        thumbs.append(blank)
+
+    rows = [cv2.hconcat(thumbs[i:i + columns]) for i in range(0, len(thumbs), columns)]
+    return cv2.imwrite(output_path, cv2.vconcat(rows))
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract verification clips for counted jumps.")
+    parser.add_argument("video", help="Source video that was processed")
+    parser.add_argument("jumps", type=parse_jump_range, help="Jump number or range, e.g. 41000 or 41000-41005")
+    parser.add_argument("--index", help="Jump index CSV (default: <video>_jumps.csv)")
+    parser.add_argument("--output", default="Jump_Clips", help="Output directory")
+    parser.add_argument("--before", type=float, default=1.0, help="Seconds before each jump")
+    parser.add_argument("--after", type=float, default=1.0, help="Seconds after each jump")
+    parser.add_argument("--contact-sheet", action="store_true", help="Write one contact sheet instead of clips")
+    parser.add_argument("--columns", type=int, default=5, help="Contact sheet columns")
+    parser.add_argument("--thumb-width", type=int, default=320, help="Contact sheet thumbnail width")
+    args = parser.parse_args()
+
+    index_path = args.index or f'{args.video}_jumps.csv'
+    if not os.path.isfile(index_path):
+        exit(f"Jump index not found: {index_path}")
+
+    jump_index = load_jump_index(index_path)
+    first, last = args.jumps
+    selected = [(jump, jump_index[jump]) for jump in range(first, last + 1) if jump in jump_index]
+    if not selected:
+        exit(f"No jumps between {first} and {last} in {index_path}")
+
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        exit(f"Error: Unable to open video: {args.video}")
+
+    try:
+        os.makedirs(args.output, exist_ok=True)
+        name = os.path.splitext(os.path.basename(args.video))[0]
+
+        if args.contact_sheet:
+            output_path = os.path.join(args.output, f'{name}_jumps_{first}-{last}.jpg')
+            if contact_sheet(cap, output_path, selected, args.columns, args.thumb_width):
+                print(f"Contact sheet saved: {output_path}")
+            return
+
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        for jump, (frame_number, timestamp) in selected:
+            output_path = os.path.join(args.output, f'{name}_jump_{jump}.mp4')
+            frames_written = extract_clip(cap, output_path, jump, timestamp, args.before, args.after, fps)
+            print(f"Jump #{jump} (frame {frame_number}, {timestamp:.2f}s): {frames_written} frames -> {output_path}")
+    finally:
+        cap.release()
+
+if __name__ == "__main__":
+    main()
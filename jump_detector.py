@@ -0,0 +1,95 @@
+from collections import deque
+
+
+def is_confident(detection, confidence):
+    """True if a best detection ((x1, y1, x2, y2), score) scores above `confidence`, only those are counted."""
+    return detection is not None and detection[1] > confidence
+
+class JumpDetector:
+    """Count jumps from the vertical position of the detected subject over media time.
+
+    The newest position is compared with the position `window` seconds earlier,
+    interpolated between the samples around that moment, so the result does not
+    depend on the frame rate or on frames being dropped or skipped. A jump is
+    armed once the subject rises more than the box height divided by
+    `threshold` above that reference and counted when it drops back below it.
+    A gap longer than `max_gap` cannot be interpolated across, so the last
+    position before the gap becomes the reference.
+    """
+
+    def __init__(self, threshold, window=0.3, max_gap=0.5):
+        self.threshold = threshold
+        self.window = window
+        self.max_gap = max_gap
+        self.samples = deque()
+        self.triggered = False
+
+    def update(self, timestamp, center_y, bbox_height):
+        """Add the position at `timestamp` seconds and return True if it completes a jump."""
+        if self.samples and timestamp <= self.samples[-1][0]:
+            return False
+
+        # Missing stretch, keep only the last known position as the reference
+        if self.samples and timestamp - self.samples[-1][0] > self.max_gap:
+            last_sample = self.samples[-1]
+            self.samples.clear()
+            self.samples.append(last_sample)
+
+        reference_y = self.reference(timestamp - self.window)
+        self.samples.append((timestamp, center_y))
+        if reference_y is None:
+            return False
+
+        bboxscale = int(bbox_height / self.threshold)
+        jumped = False
+
+        # Check for downward movement (landing)
+        if center_y > reference_y and self.triggered:
+            self.triggered = False
+            jumped = True
+
+        # Check for upward movement (jumping)
+        if center_y < (reference_y - bboxscale):
+            self.triggered = True
+
+        return jumped
+
+    def observe(self, timestamp, detection, confidence):
+        """Add a best detection the way every counter does and return True if it completes a jump.
+
+        Only a confident box counts, by its vertical center and height.
+        """
+        if not is_confident(detection, confidence):
+            return False
+        bbox_x1, bbox_y1, bbox_x2, bbox_y2 = detection[0]
+        return self.update(timestamp, int((bbox_y1 + bbox_y2) / 2), bbox_y2 - bbox_y1)
+
+    def reference(self, cutoff):
+        """Return the position at `cutoff` seconds, dropping samples no longer needed."""
+        while len(self.samples) >= 2 and self.samples[1][0] <= cutoff:
+            self.samples.popleft()
+
+        if not self.samples:
+            return None
+
+        # History shorter than the window, use the oldest position like a filling frame window
+        oldest_time, oldest_y = self.samples[0]
+        if len(self.samples) == 1 or oldest_time >= cutoff:
+            return oldest_y
+
+        next_time, next_y = self.samples[1]
+        return oldest_y + (next_y - oldest_y) * (cutoff - oldest_time) / (next_time - oldest_time)
+
+    def state(self):
+        """Return the detector state as plain data, so a checkpoint can resume it exactly."""
+        return {'samples': [list(sample) for sample in self.samples], 'triggered': self.triggered}
+
+    def restore(self, state):
+        """Resume from a state returned by `state`."""
+        self.samples = deque(tuple(sample) for sample in state['samples'])
+        self.triggered = state['triggered']
+
+    def reset(self):
+        """Forget the position history and any armed jump."""
+        self.samples.clear()
+        self.triggered = False
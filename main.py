@@ -1,15 +1,27 @@
+import argparse
 import configparser
 import cv2
+import functools
+import numpy as np
 import os
 import queue
+import re
 import threading
 import streamlink
 import time
 import tkinter as tk
-import torch
 from collections import deque
 from tkinter import ttk, simpledialog, filedialog
-from ultralytics import YOLO
+from jump_detector import JumpDetector, is_confident
+from model_cache import cache_directory, is_cached
+from openvino_detector import OpenVinoDetector
+from overlays import center_of, draw_overlays
+from pipeline import END_OF_STREAM, AtomicCounter, Channel, Pipeline, PipelineCancelled
+from profiler import SamplingProfiler
+from publisher import CounterPublisher
+from render import TRAIL_LENGTH, RenderLog
+from thread_policy import ThreadPolicy
+from top_detection import TopDetector
 
 
 # Configuration constants
@@ -27,13 +39,60 @@ DEFAULT_CONFIG = {
     'current_time': '0',
     'counter': '0',
     'oauth_token': 'YOUR-OAUTH-TOKEN-DO-NOT-SHARE',
-    'dev_test': 'False'
+    'dev_test': 'False',
+    'inference_workers': '0',
+    'reorder_window': '8',
+    'reorder_timeout_ms': '500',
+    'lowscore_rate_per_minute': '30',
+    'lowscore_hash_distance': '6',
+    'lowscore_queue_size': '32',
+    'journal_path': 'counter.journal',
+    'journal_flush_interval': '2',
+    'journal_flush_records': '50',
+    'motion_gate': 'True',
+    'motion_threshold': '2.0',
+    'motion_max_skip': '30',
+    'qos_enabled': 'True',
+    'qos_target_fps': '0',
+    'qos_input_sizes': '320,416,512',
+    'qos_max_stride': '3',
+    'qos_min_bbox_px': '24',
+    'twitch_min_height': '360',
+    'rendition_max_latency': '2.0',
+    'rendition_max_drop_rate': '0.05',
+    'target_count': '0',
+    'profiler_interval_ms': '20',
+    'jump_window_seconds': '0.3',
+    'jump_max_gap': '0.5',
+    'thread_preset': 'balanced',
+    'publish_enabled': 'False',
+    'publish_port': '8765',
+    'publish_state_file': 'overlay_state.json',
+    'publish_min_interval_ms': '50',
+    'dvr_enabled': 'False',
+    'dvr_quality': 'best',
+    'dvr_path': 'DVR',
+    'dvr_max_minutes': '120',
+    'dvr_max_gb': '10',
+    'two_pass': 'False',
+    'fast_postprocess': 'True',
+    'cpu_runtime': 'ultralytics'
 }
 
 REQUIRED_CONFIG_VARS = [
     "twitch_channel_url", "performance_model_path", "precision_model_path", 'use_performance_model', "model_confidence",
     "tk_showframe", "tk_model_verbose", "tk_save_lowscores", "relative_jump_threshold",
-    "obs_device", "current_time", "counter", "oauth_token", "dev_test"
+    "obs_device", "current_time", "counter", "oauth_token", "dev_test",
+    "inference_workers", "reorder_window", "reorder_timeout_ms",
+    "lowscore_rate_per_minute", "lowscore_hash_distance", "lowscore_queue_size",
+    "journal_path", "journal_flush_interval", "journal_flush_records",
+    "motion_gate", "motion_threshold", "motion_max_skip",
+    "qos_enabled", "qos_target_fps", "qos_input_sizes", "qos_max_stride", "qos_min_bbox_px",
+    "twitch_min_height", "rendition_max_latency", "rendition_max_drop_rate",
+    "target_count", "profiler_interval_ms", "jump_window_seconds", "jump_max_gap",
+    "thread_preset", "publish_enabled", "publish_port", "publish_state_file", "publish_min_interval_ms",
+    "dvr_enabled", "dvr_quality", "dvr_path", "dvr_max_minutes", "dvr_max_gb", "two_pass",
+    "fast_postprocess", "cpu_runtime"
 ]
 
 CONFIG_FILE = 'config.ini'
@@ -188,10 +247,984 @@ def load_config():
         config.read(CONFIG_FILE)
         return config
 
-class MyApp(tk.Tk):
+class ReorderBuffer(Channel):
+    """Channel that releases results from concurrent inference workers in frame order.
+
+    Items are (frame_number, result) pairs. At most `window` out-of-order
+    results are held, further ones block their worker until the gap fills.
+    If the next expected frame has not arrived within `timeout` seconds of the
+    oldest held inference result the gap is skipped and the missing frame is
+    dropped when it finally arrives. Frames that skip the model are put
+    untimed: they wait behind the frames still in the model and never cause a
+    gap to be skipped.
+    Once every worker has closed the channel the held results are released
+    in order, then END_OF_STREAM.
+    """
+
+    def __init__(self, name, window, timeout):
+        super().__init__(name, window)
+        self.window = max(1, window)
+        self.timeout = timeout
+        self.next_frame = 0
+        self.pending = {}
+        self.skipped = 0
+        self.late = 0
+
+    @property
+    def depth(self):
+        return len(self.pending)
+
+    def put(self, item, timed=True):
+        """Add a result, blocking while the reorder window is full. Untimed results do not start the timeout."""
+        frame_number, result = item
+        with self.condition:
+            while (not self.cancelled.is_set() and frame_number > self.next_frame
+                   and len(self.pending) >= self.window):
+                self.condition.wait(0.1)
+            if self.cancelled.is_set():
+                raise PipelineCancelled()
+
+            if frame_number < self.next_frame:
+                self.late += 1
+                return
+
+            self.pending[frame_number] = (time.monotonic() if timed else None, result)
+            self.max_depth = max(self.max_depth, len(self.pending))
+            self.condition.notify_all()
+
+    def get(self):
+        """Return the next (frame_number, result) in order, or END_OF_STREAM once drained."""
+        with self.condition:
+            while not self.cancelled.is_set():
+                # Give up on a missing frame when it is too late or no worker is left, a full window only
+                # blocks the workers, the missing frame is usually the slow one still in the model
+                if self.pending and self.next_frame not in self.pending:
+                    arrivals = [arrival for arrival, _ in self.pending.values() if arrival is not None]
+                    waited = time.monotonic() - min(arrivals) if arrivals else 0.0
+                    if waited > self.timeout or self.producers <= 0:
+                        first_pending = min(self.pending)
+                        self.skipped += first_pending - self.next_frame
+                        self.next_frame = first_pending
+
+                if self.next_frame in self.pending:
+                    _, result = self.pending.pop(self.next_frame)
+                    self.next_frame += 1
+                    self.condition.notify_all()
+                    return self.next_frame - 1, result
+
+                if self.producers <= 0:
+                    return END_OF_STREAM
+                self.condition.wait(max(self.timeout / 4, 0.005))
+            raise PipelineCancelled()
+
+class LowScoreHarvester:
+    """Save low-confidence frames with YOLO labels on a background thread.
+
+    Frames are handed over through a bounded queue and dropped when it is full,
+    so a slow disk never stalls inference. Near-identical frames are skipped
+    using a difference hash and writes are capped per minute.
+    """
+
+    def __init__(self, directory_path, rate_per_minute, hash_distance, queue_size):
+        self.images_path = os.path.join(directory_path, "images")
+        self.labels_path = os.path.join(directory_path, "labels")
+        self.rate_per_minute = rate_per_minute
+        self.hash_distance = hash_distance
+        self.session = time.strftime("%Y%m%d-%H%M%S")
+        self.frame_queue = queue.Queue(maxsize=max(1, queue_size))
+        self.recent_hashes = deque(maxlen=256)
+        self.write_times = deque()
+        self.lock = threading.Lock()
+        self.saved = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True, name="LowScoreHarvester")
+        self.thread.start()
+
+    def submit(self, frame, frame_number, bbox, confidence):
+        """Queue a copy of the frame for saving without blocking the caller."""
+        # Counters are shared by the worker and writer threads, they change under the lock
+        with self.lock:
+            if self.rate_limited(time.monotonic()) or self.frame_queue.full():
+                self.dropped += 1
+                return
+
+        try:
+            self.frame_queue.put_nowait((frame.copy(), frame_number, bbox, confidence))
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def rate_limited(self, now):
+        """Return True once the per-minute write cap has been reached. Caller must hold the lock."""
+        while self.write_times and now - self.write_times[0] > 60:
+            self.write_times.popleft()
+        return len(self.write_times) >= self.rate_per_minute
+
+    def run(self):
+        """Deduplicate and write queued frames until stopped and drained."""
+        os.makedirs(self.images_path, exist_ok=True)
+        os.makedirs(self.labels_path, exist_ok=True)
+
+        while self.running or not self.frame_queue.empty():
+            try:
+                frame, frame_number, bbox, confidence = self.frame_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            with self.lock:
+                if self.rate_limited(time.monotonic()):
+                    self.dropped += 1
+                    continue
+
+            frame_hash = self.difference_hash(frame)
+            if any(bin(frame_hash ^ seen).count("1") <= self.hash_distance for seen in self.recent_hashes):
+                with self.lock:
+                    self.duplicates += 1
+                continue
+            self.recent_hashes.append(frame_hash)
+
+            # A failed write is logged and skipped, the thread keeps serving the capture
+            try:
+                written = self.write_sample(frame, frame_number, bbox, confidence)
+            except Exception as e:
+                print(f"Error: Failed to save low score frame {frame_number}: {e}")
+                continue
+            with self.lock:
+                self.write_times.append(time.monotonic())
+                self.saved += written
+
+    @staticmethod
+    def difference_hash(frame):
+        """Return a 64-bit perceptual hash of the frame."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return int("".join("1" if bit else "0" for bit in bits), 2)
+
+    def write_sample(self, frame, frame_number, bbox, confidence):
+        """Write the frame and a YOLO-format label for the detected box, returning True once both are saved."""
+        frame_height, frame_width, _ = frame.shape
+        bbox_x1, bbox_y1, bbox_x2, bbox_y2 = bbox
+
+        # Format filename with session, zero-padded frame number and formatted confidence
+        name = f'lowscore_{self.session}_{frame_number:06d}_c-{confidence:.2f}'
+        image_file = os.path.join(self.images_path, f'{name}.jpg')
+        label_file = os.path.join(self.labels_path, f'{name}.txt')
+
+        if not cv2.imwrite(image_file, frame):
+            print(f"Error: Failed to save frame to {image_file}")
+            return False
+
+        # YOLO label: class x_center y_center width height, normalized to the frame
+        x_center = (bbox_x1 + bbox_x2) / 2 / frame_width
+        y_center = (bbox_y1 + bbox_y2) / 2 / frame_height
+        width = (bbox_x2 - bbox_x1) / frame_width
+        height = (bbox_y2 - bbox_y1) / frame_height
+        with open(label_file, 'w') as labelfile:
+            labelfile.write(f"0 {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
+        return True
+
+    def stop(self, timeout=5):
+        """Finish writing queued frames and report what was harvested."""
+        self.running = False
+        self.thread.join(timeout=timeout)
+        print(f"Low score harvester saved {self.saved} frame(s), skipped {self.duplicates} duplicate(s), "
+              f"dropped {self.dropped} frame(s)")
+
+class CounterJournal:
+    """Append-only journal of counter and timer state.
+
+    Every counter change or timer tick appends one line holding the full state,
+    so replay only needs the last complete record. A background thread fsyncs
+    the records every `flush_interval` seconds, or sooner once `flush_records`
+    are pending, and compacts the file to a single record when it grows large.
+    record() only appends to the file buffer, so callers holding the counter
+    lock never wait on the disk.
+    """
+
+    COMPACT_RECORDS = 10000
+
+    def __init__(self, path, flush_interval, flush_records):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_records = max(1, flush_records)
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.flusher = None
+        self.closed = False
+        self.file = None
+        self.pending = 0
+        self.records = 0
+        self.last_state = None
+        self.torn = False
+
+    def replay(self):
+        """Return the last journaled (counter, current_time), or None if there is none."""
+        if not os.path.isfile(self.path):
+            return None
+
+        state = None
+        with open(self.path, 'r') as journalfile:
+            for line in journalfile:
+                # A torn write after a crash leaves an incomplete last line
+                parts = line.split()
+                self.torn = not line.endswith("\n")
+                if len(parts) != 3 or self.torn:
+                    continue
+                try:
+                    state = (int(parts[1]), int(parts[2]))
+                except ValueError:
+                    continue
+                self.records += 1
+
+        if state is not None:
+            self.last_state = state
+            print(f"Journal restored counter {state[0]} and time {state[1]}s from {self.path}")
+        return state
+
+    def record(self, kind, counter, current_time):
+        """Append a state record, J for jumps and counter edits, T for timer changes."""
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, 'a')
+                if self.torn:
+                    self.file.write("\n")
+                    self.torn = False
+            if self.flusher is None and not self.closed:
+                self.flusher = threading.Thread(target=self.run, daemon=True, name="CounterJournal")
+                self.flusher.start()
+
+            self.file.write(f"{kind} {counter} {current_time}\n")
+            self.last_state = (counter, current_time)
+            self.pending += 1
+            self.records += 1
+
+            # Wake the flush thread early instead of syncing here
+            if self.pending >= self.flush_records or self.records >= self.COMPACT_RECORDS:
+                self.wake.set()
+
+    def run(self):
+        """Sync and compact the journal in the background until it is closed."""
+        while not self.closed:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.sync()
+            if self.records >= self.COMPACT_RECORDS:
+                self.compact()
+
+    def sync(self):
+        """Flush buffered records to disk, the fsync runs outside the lock so record() does not wait on it."""
+        with self.lock:
+            if self.file is None or not self.pending:
+                return
+            self.file.flush()
+            fileno = self.file.fileno()
+            self.pending = 0
+        os.fsync(fileno)
+
+    def compact(self):
+        """Replace the journal with a single record of the current state."""
+        with self.lock:
+            counter, current_time = state = self.last_state
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as tempfile:
+            tempfile.write(f"S {counter} {current_time}\n")
+            tempfile.flush()
+            os.fsync(tempfile.fileno())
+
+        with self.lock:
+            self.file.close()
+            os.replace(temp_path, self.path)
+            self.file = open(self.path, 'a')
+            self.pending = 0
+            self.records = 1
+
+            # Records appended while the snapshot was written only matter for their final state
+            if self.last_state != state:
+                counter, current_time = self.last_state
+                self.file.write(f"S {counter} {current_time}\n")
+                self.pending = 1
+                self.records = 2
+
+    def close(self):
+        """Stop the flush thread, then flush outstanding records and close the journal."""
+        with self.lock:
+            self.closed = True
+            flusher = self.flusher
+        if flusher is not None:
+            self.wake.set()
+            flusher.join()
+
+        self.sync()
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+class JumpIndex:
+    """CSV index of counted jumps with their source frame number and media time.
+
+    Written next to the processed video so jump_clips.py can seek straight to
+    any jump for verification.
+    """
+
+    HEADER = "jump,frame,timestamp\n"
+
+    def __init__(self, path):
+        self.path = path
+        directory_path = os.path.dirname(path)
+        if directory_path:
+            os.makedirs(directory_path, exist_ok=True)
+
+        # Line buffered, a crash loses at most the jump being written
+        self.file = open(path, 'w', buffering=1)
+        self.file.write(self.HEADER)
+
+    def record(self, jump, frame_number, timestamp):
+        """Append one counted jump."""
+        self.file.write(f"{jump},{frame_number},{timestamp:.3f}\n")
+
+    def close(self):
+        """Close the index file."""
+        self.file.close()
+        print(f"Jump index saved: {self.path}")
+
+class SegmentRecorder:
+    """Record the raw HLS segments of a stream next to counting, without decoding.
+
+    Polls the rendition's media playlist through the Streamlink session and
+    stores every new segment exactly as downloaded. The oldest segments are
+    deleted once the ring exceeds `max_seconds` or `max_bytes` (0 disables a
+    bound), and a local playlist lists the segments still on disk so the
+    recording plays in any HLS player. A sidecar CSV maps each segment to the
+    counter value when it arrived.
+    """
+
+    HEADER = "segment,sequence,offset,duration,program_date_time,received,counter\n"
+    PLAYLIST = "dvr.m3u8"
+    SIDECAR = "segments.csv"
+    MAX_ERRORS = 3
+
+    def __init__(self, session, channel_url, quality, directory_path, max_seconds, max_bytes, counter):
+        self.session = session
+        self.channel_url = channel_url
+        self.quality = quality
+        self.directory_path = directory_path
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.counter = counter
+        self.segments = deque()
+        self.total_seconds = 0.0
+        self.total_bytes = 0
+        self.offset = 0.0
+        self.last_sequence = None
+        self.discontinuity = False
+        self.running = True
+
+        os.makedirs(directory_path, exist_ok=True)
+        self.sidecar = open(os.path.join(directory_path, self.SIDECAR), 'w', buffering=1)
+        self.sidecar.write(self.HEADER)
+        self.thread = threading.Thread(target=self.run, daemon=True, name="SegmentRecorder")
+        self.thread.start()
+        print(f"DVR recording {quality} to {directory_path}")
+
+    def run(self):
+        """Poll the playlist and save new segments until stopped."""
+        from streamlink.stream.hls import parse_m3u8
+
+        url = self.session.streams(url=self.channel_url)[self.quality].url
+        errors = 0
+        while self.running:
+            try:
+                playlist = parse_m3u8(self.session.http.get(url, timeout=10))
+                for position, segment in enumerate(playlist.segments):
+                    sequence = playlist.media_sequence + position
+                    if self.last_sequence is not None and sequence <= self.last_sequence:
+                        continue
+                    # Stitched ad segments are not part of the broadcast
+                    if segment.title and segment.title.startswith("Amazon"):
+                        self.discontinuity = True
+                        self.last_sequence = sequence
+                        continue
+                    self.save(sequence, segment)
+                errors = 0
+                wait = playlist.targetduration or 2
+            except Exception as e:
+                errors += 1
+                print(f"DVR: error reading playlist ({e})")
+                # The signed playlist URL expires, fetch a fresh one after repeated failures
+                if errors >= self.MAX_ERRORS:
+                    try:
+                        url = self.session.streams(url=self.channel_url)[self.quality].url
+                        errors = 0
+                    except Exception as e:
+                        print(f"DVR: unable to refresh the playlist URL ({e})")
+                self.discontinuity = True
+                wait = 2
+
+            # Poll at half the target duration, segments are fetched soon after they appear
+            deadline = time.monotonic() + wait / 2
+            while self.running and time.monotonic() < deadline:
+                time.sleep(0.1)
+
+    def save(self, sequence, segment):
+        """Store one segment unchanged, record it in the sidecar and roll the ring."""
+        data = self.session.http.get(segment.uri, timeout=10).content
+        if self.last_sequence is not None and sequence != self.last_sequence + 1:
+            self.discontinuity = True
+        self.last_sequence = sequence
+
+        name = f"segment_{sequence}.ts"
+        with open(os.path.join(self.directory_path, name), 'wb') as segmentfile:
+            segmentfile.write(data)
+
+        duration = segment.duration or 0.0
+        program_date_time = segment.date.isoformat() if segment.date else ""
+        received = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.sidecar.write(f"{name},{sequence},{self.offset:.3f},{duration:.3f},{program_date_time},"
+                           f"{received},{self.counter()}\n")
+
+        self.segments.append((name, sequence, duration, len(data), self.discontinuity or segment.discontinuity))
+        self.discontinuity = False
+        self.offset += duration
+        self.total_seconds += duration
+        self.total_bytes += len(data)
+
+        # Roll over, always keeping the newest segment
+        while len(self.segments) > 1 and ((self.max_seconds and self.total_seconds > self.max_seconds)
+                                          or (self.max_bytes and self.total_bytes > self.max_bytes)):
+            old_name, _, old_duration, old_size, _ = self.segments.popleft()
+            self.total_seconds -= old_duration
+            self.total_bytes -= old_size
+            try:
+                os.remove(os.path.join(self.directory_path, old_name))
+            except OSError as e:
+                print(f"DVR: unable to remove {old_name} ({e})")
+
+        self.write_playlist()
+
+    def write_playlist(self):
+        """Rewrite the local playlist of the segments on disk, replacing it atomically."""
+        target_duration = max(duration for _, _, duration, _, _ in self.segments)
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{int(target_duration + 0.999)}",
+                 f"#EXT-X-MEDIA-SEQUENCE:{self.segments[0][1]}"]
+        for name, _, duration, _, discontinuity in self.segments:
+            if discontinuity:
+                lines.append("#EXT-X-DISCONTINUITY")
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(name)
+
+        playlist_path = os.path.join(self.directory_path, self.PLAYLIST)
+        with open(f"{playlist_path}.tmp", 'w') as playlistfile:
+            playlistfile.write("\n".join(lines) + "\n")
+        os.replace(f"{playlist_path}.tmp", playlist_path)
+
+    def stop(self):
+        """Stop recording and finish the playlist so it plays as a complete recording."""
+        self.running = False
+        self.thread.join(timeout=15)
+        self.sidecar.close()
+
+        playlist_path = os.path.join(self.directory_path, self.PLAYLIST)
+        if self.segments:
+            with open(playlist_path, 'a') as playlistfile:
+                playlistfile.write("#EXT-X-ENDLIST\n")
+        print(f"DVR saved: {len(self.segments)} segment(s), {self.total_seconds / 60:.1f} min, "
+              f"{self.total_bytes / 1e6:.0f} MB in {self.directory_path}")
+
+class MotionGate:
+    """Skip model calls on frames where nothing has moved.
+
+    Each frame is reduced to a small grayscale thumbnail and compared with the
+    last frame that went through the model, inside the region of the latest
+    detection when one is known. After `max_skip` consecutive skipped frames
+    the model runs anyway so the carried detection is refreshed. The
+    preprocess stage checks frames while the count stage moves the region and
+    the render stage reads the skip ratio, so the history is locked.
+    """
+
+    THUMB_SIZE = (160, 90)
+
+    def __init__(self, threshold, max_skip):
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.reference = None
+        self.roi = None
+        self.consecutive = 0
+        self.history = deque(maxlen=300)
+        self.frames = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+
+    def set_roi(self, bbox, frame_width, frame_height):
+        """Restrict the check to the detected box, padded to cover the jump height."""
+        if bbox is None:
+            self.roi = None
+            return
+
+        bbox_x1, bbox_y1, bbox_x2, bbox_y2 = bbox
+        pad = (bbox_y2 - bbox_y1) // 2
+        self.roi = (max(0.0, (bbox_x1 - pad) / frame_width), max(0.0, (bbox_y1 - pad) / frame_height),
+                    min(1.0, (bbox_x2 + pad) / frame_width), min(1.0, (bbox_y2 + pad) / frame_height))
+
+    def is_static(self, frame):
+        """Return True if the frame can reuse the previous detection."""
+        small = cv2.resize(frame, self.THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        static = False
+        if self.reference is not None and self.consecutive < self.max_skip:
+            thumb_width, thumb_height = self.THUMB_SIZE
+            x1, y1, x2, y2 = self.roi or (0.0, 0.0, 1.0, 1.0)
+            x1, x2 = int(x1 * thumb_width), max(int(x2 * thumb_width), int(x1 * thumb_width) + 1)
+            y1, y2 = int(y1 * thumb_height), max(int(y2 * thumb_height), int(y1 * thumb_height) + 1)
+            energy = cv2.mean(cv2.absdiff(small[y1:y2, x1:x2], self.reference[y1:y2, x1:x2]))[0]
+            static = energy < self.threshold
+
+        # Compare against the last inferred frame so slow drift still triggers the model
+        if static:
+            self.consecutive += 1
+        else:
+            self.consecutive = 0
+            self.reference = small
+
+        with self.lock:
+            self.history.append(static)
+            self.frames += 1
+            self.skipped += static
+        return static
+
+    @property
+    def skip_ratio(self):
+        """Fraction of recent frames that skipped the model."""
+        with self.lock:
+            return sum(self.history) / len(self.history) if self.history else 0.0
+
+def model_input_sizes(model_path, candidate_sizes):
+    """Return the input sizes a model accepts.
+
+    PyTorch checkpoints and dynamic exports take any size. Fixed-shape exports
+    only take the size they were exported at, read from their metadata.yaml.
+    An empty list means the size is unknown and the backend default is used.
+    """
+    if model_path.endswith('.pt'):
+        return sorted(candidate_sizes)
+
+    metadata_path = os.path.join(model_path, 'metadata.yaml')
+    if not os.path.isfile(metadata_path):
+        return []
+
+    import yaml
+    with open(metadata_path) as metadatafile:
+        metadata = yaml.safe_load(metadatafile)
+
+    if metadata.get('args', {}).get('dynamic'):
+        return sorted(candidate_sizes)
+    return [max(metadata['imgsz'])]
+
+class QosController:
+    """Adapt model input size and frame stride to an inference budget.
+
+    Load is the inference rate the target fps needs divided by what the workers
+    can deliver. Above HIGH_LOAD the input size shrinks while the subject stays
+    large enough, then the stride grows. Below LOW_LOAD the stride shrinks
+    first, then the input size grows if the subject is small. The gap between
+    the two and COOLDOWN seconds between changes keep it from oscillating.
+    Inference workers report their timings concurrently, so the measurements
+    are locked.
+    """
+
+    HIGH_LOAD = 0.95
+    LOW_LOAD = 0.6
+    COOLDOWN = 3.0
+
+    def __init__(self, input_sizes, max_stride, min_bbox_px, default_size=416):
+        self.input_sizes = input_sizes
+        self.size_index = input_sizes.index(default_size) if default_size in input_sizes else len(input_sizes) // 2
+        self.max_stride = max(1, max_stride)
+        self.min_bbox_px = min_bbox_px
+        self.stride = 1
+        self.inference_times = deque(maxlen=30)
+        self.bbox_ratios = deque(maxlen=30)
+        self.last_change = time.monotonic()
+        self.lock = threading.Lock()
+
+    @property
+    def imgsz(self):
+        """Current model input size, None to use the backend default."""
+        return self.input_sizes[self.size_index] if self.input_sizes else None
+
+    def observe_inference(self, seconds):
+        """Record how long one model call took."""
+        with self.lock:
+            self.inference_times.append(seconds)
+
+    def observe_bbox(self, bbox_height, frame_width, frame_height):
+        """Record the subject height relative to the letterboxed model input."""
+        with self.lock:
+            self.bbox_ratios.append(bbox_height / max(frame_width, frame_height))
+
+    def update(self, target_fps, workers):
+        """Adjust input size or stride if the load is outside the hysteresis band."""
+        now = time.monotonic()
+
+        # Load and decision come from one consistent state, another update cannot change it in between
+        with self.lock:
+            if now - self.last_change < self.COOLDOWN or len(self.inference_times) < self.inference_times.maxlen:
+                return
+
+            mean_inference = sum(self.inference_times) / len(self.inference_times)
+            bbox_px = None
+            if self.bbox_ratios and self.imgsz:
+                bbox_px = sum(self.bbox_ratios) / len(self.bbox_ratios) * self.imgsz
+            load = target_fps / self.stride * mean_inference / workers
+
+            if load > self.HIGH_LOAD:
+                smaller = self.size_index - 1
+                if (smaller >= 0 and bbox_px is not None
+                        and bbox_px * self.input_sizes[smaller] / self.imgsz >= self.min_bbox_px):
+                    self.change_size(smaller, load, bbox_px)
+                elif self.stride < self.max_stride:
+                    self.change_stride(self.stride + 1, load, bbox_px)
+
+            elif load < self.LOW_LOAD:
+                larger = self.size_index + 1
+                if self.stride > 1:
+                    self.change_stride(self.stride - 1, load, bbox_px)
+                elif (larger < len(self.input_sizes) and bbox_px is not None and bbox_px < self.min_bbox_px
+                        and load * (self.input_sizes[larger] / self.imgsz) ** 2 < self.HIGH_LOAD):
+                    self.change_size(larger, load, bbox_px)
+
+    def change_size(self, size_index, load, bbox_px):
+        """Switch the model input size and log why. Caller must hold the lock."""
+        print(f"QoS: input size {self.imgsz} -> {self.input_sizes[size_index]} "
+              f"(load {load:.2f}, subject {bbox_px:.0f}px)")
+        self.size_index = size_index
+        self.reset()
+
+    def change_stride(self, stride, load, bbox_px):
+        """Switch the frame stride and log why. Caller must hold the lock."""
+        subject = f", subject {bbox_px:.0f}px" if bbox_px is not None else ""
+        print(f"QoS: frame stride {self.stride} -> {stride} (load {load:.2f}{subject})")
+        self.stride = stride
+        self.reset()
+
+    def reset(self):
+        """Start measuring again after a change. Caller must hold the lock."""
+        self.inference_times.clear()
+        self.bbox_ratios.clear()
+        self.last_change = time.monotonic()
+
+class RenditionSelector:
+    """Choose the Twitch rendition from detection confidence and pipeline load.
+
+    Starts at the lowest rendition of at least `min_height` and steps up while
+    the mean detection confidence stays below the model confidence, read from
+    `confidence()` at every window. Steps down when the backlog latency or the
+    frame drop rate exceed their limits, and does not climb back past that
+    rendition for CEILING_TIMEOUT seconds. A rendition that proved too low for
+    the model is never chosen again. The count stage requests switches and the
+    grab stage takes them, under the lock.
+    """
+
+    WINDOW = 90
+    COOLDOWN = 10.0
+    CEILING_TIMEOUT = 120.0
+    CONFIDENCE_MARGIN = 0.1
+
+    def __init__(self, session, channel_url, qualities, min_height, confidence, max_latency, max_drop_rate):
+        self.session = session
+        self.channel_url = channel_url
+        self.qualities = qualities
+        self.confidence = confidence
+        self.max_latency = max_latency
+        self.max_drop_rate = max_drop_rate
+        heights = [int(re.match(r'\d+', quality)[0]) for quality in qualities]
+        self.index = next((i for i, height in enumerate(heights) if height >= min_height), len(qualities) - 1)
+        self.floor = -1
+        self.ceiling = len(qualities) - 1
+        self.ceiling_time = 0.0
+        self.requested = None
+        self.latency = 0.0
+        self.confidences = []
+        self.frames = 0
+        self.window_drops = None
+        self.last_change = time.monotonic()
+        self.lock = threading.Lock()
+
+    @property
+    def quality(self):
+        """Name of the current rendition."""
+        return self.qualities[self.index]
+
+    def fetch_url(self, quality):
+        """Fetch a fresh playlist URL for a rendition, the signed URLs expire."""
+        streams = self.session.streams(url=self.channel_url)
+        return streams[quality].url
+
+    def observe(self, confidence, dropped):
+        """Record one inferred frame, its best confidence (None without detection) and total drops.
+
+        Drops are the frames lost so far by the source and the reorder buffer.
+        """
+        with self.lock:
+            if self.window_drops is None:
+                self.window_drops = dropped
+            if confidence is not None:
+                self.confidences.append(confidence)
+            self.frames += 1
+
+            if self.frames >= self.WINDOW:
+                self.update(dropped - self.window_drops)
+                self.confidences = []
+                self.frames = 0
+                self.window_drops = dropped
+
+    def update(self, drops):
+        """Request a switch if the last window was overloaded or under-confident. Caller must hold the lock."""
+        now = time.monotonic()
+        if now - self.last_change < self.COOLDOWN or self.requested is not None:
+            return
+        if now - self.ceiling_time > self.CEILING_TIMEOUT:
+            self.ceiling = len(self.qualities) - 1
+
+        drop_rate = drops / (self.frames + drops)
+        mean_confidence = sum(self.confidences) / len(self.confidences) if self.confidences else None
+        confidence = self.confidence()
+
+        if self.latency > self.max_latency or drop_rate > self.max_drop_rate:
+            if self.index > 0:
+                self.ceiling, self.ceiling_time = self.index - 1, now
+                self.request(self.index - 1, f"latency {self.latency:.1f}s, drop rate {drop_rate:.1%}")
+
+        # Half of the window without a detection says nothing about the rendition
+        elif mean_confidence is None or len(self.confidences) < self.frames // 2:
+            return
+
+        elif mean_confidence < confidence:
+            if self.index < self.ceiling:
+                self.floor = max(self.floor, self.index)
+                self.request(self.index + 1, f"confidence {mean_confidence:.2f}")
+
+        # Confident with room to spare, try saving decode time on a lower rendition
+        elif mean_confidence > confidence + self.CONFIDENCE_MARGIN and self.index - 1 > self.floor:
+            self.request(self.index - 1, f"confidence {mean_confidence:.2f}")
+
+    def request(self, index, reason):
+        """Ask the frame grabber to switch to another rendition."""
+        print(f"Rendition: {self.quality} -> {self.qualities[index]} ({reason})")
+        self.requested = index
+
+    def take_switch(self):
+        """Return (index, url) of a requested rendition, else None. It becomes current once switched() is called."""
+        with self.lock:
+            if self.requested is None:
+                return None
+
+            index, self.requested = self.requested, None
+            self.last_change = time.monotonic()
+
+        # Fetched outside the lock, the count stage keeps going meanwhile
+        return index, self.fetch_url(self.qualities[index])
+
+    def switched(self, index):
+        """Make a rendition current once the grabber has opened it."""
+        with self.lock:
+            self.index = index
+            self.window_drops = None
+
+class JumpStats:
+    """Rolling jump statistics fed by jump events in media time.
+
+    Each rate window is a deque of jump times trimmed as time advances, and
+    intervals live in a fixed-size ring, so every update is amortized O(1) and
+    no query scans the session history. Intervals longer than BREAK_INTERVAL
+    are rests between sets and are left out of cadence and fatigue.
+    """
+
+    WINDOWS = (10, 60, 600)
+    INTERVALS = 500
+    BREAK_INTERVAL = 3.0
+    FAST_ALPHA = 0.1
+    SLOW_ALPHA = 0.01
+
     def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget all events, media time restarts with every capture."""
+        with self.lock:
+            self.windows = {seconds: deque() for seconds in self.WINDOWS}
+            self.intervals = deque(maxlen=self.INTERVALS)
+            self.start = None
+            self.now = 0.0
+            self.last_jump = None
+            self.fast_interval = None
+            self.slow_interval = None
+
+    def advance(self, timestamp):
+        """Move the clock forward and expire jumps that left each window."""
+        with self.lock:
+            if self.start is None:
+                self.start = timestamp
+            self.now = max(self.now, timestamp)
+            for seconds, jumps in self.windows.items():
+                while jumps and self.now - jumps[0] > seconds:
+                    jumps.popleft()
+
+    def add_jump(self, timestamp):
+        """Record a counted jump."""
+        self.advance(timestamp)
+        with self.lock:
+            for jumps in self.windows.values():
+                jumps.append(timestamp)
+
+            if self.last_jump is not None:
+                interval = timestamp - self.last_jump
+                if 0 < interval <= self.BREAK_INTERVAL:
+                    self.intervals.append(interval)
+                    if self.fast_interval is None:
+                        self.fast_interval = self.slow_interval = interval
+                    self.fast_interval += self.FAST_ALPHA * (interval - self.fast_interval)
+                    self.slow_interval += self.SLOW_ALPHA * (interval - self.slow_interval)
+            self.last_jump = timestamp
+
+    def rate(self, seconds):
+        """Jumps per second over the last `seconds`, or since the start if shorter."""
+        with self.lock:
+            if self.start is None:
+                return 0.0
+            span = min(seconds, self.now - self.start)
+            return len(self.windows[seconds]) / span if span > 0 else 0.0
+
+    def percentile(self, percent):
+        """Jump interval percentile in seconds over the recent intervals."""
+        with self.lock:
+            intervals = sorted(self.intervals)
+        if not intervals:
+            return None
+        return intervals[min(len(intervals) - 1, int(len(intervals) * percent / 100))]
+
+    def fatigue(self):
+        """Relative change of recent cadence against the long-run cadence, positive when slowing."""
+        with self.lock:
+            if self.fast_interval is None:
+                return 0.0
+            return self.fast_interval / self.slow_interval - 1
+
+    def snapshot(self, counter, target_count=0):
+        """Return all statistics as a dict for the GUI and external consumers."""
+        stats = {f'jps_{seconds}s': self.rate(seconds) for seconds in self.WINDOWS}
+        stats['interval_p50'] = self.percentile(50)
+        stats['interval_p90'] = self.percentile(90)
+        stats['fatigue'] = self.fatigue()
+
+        # Project from the longest window that has jumps in it
+        rate = next((stats[f'jps_{seconds}s'] for seconds in reversed(self.WINDOWS)
+                     if stats[f'jps_{seconds}s'] > 0), 0.0)
+        remaining = target_count - counter
+        stats['eta_seconds'] = remaining / rate if target_count > 0 and remaining > 0 and rate > 0 else None
+        return stats
+
+class DetectorSet:
+    """Detectors of the inference workers and the QoS controller sized for them, swapped as a whole.
+
+    Workers take their detector for every frame, so a swap applies from the
+    next frame each worker starts while frames already in a model finish on
+    it. `history` holds [model_path, frames] for every model the capture ran.
+    """
+
+    def __init__(self, detectors, model_path, qos):
+        self.detectors = detectors
+        self.model_path = model_path
+        self.qos = qos
+        self.history = [[model_path, 0]]
+        self.lock = threading.Lock()
+
+    @property
+    def workers(self):
+        return len(self.detectors)
+
+    def take(self, worker_number):
+        """Return the worker's detector and QoS controller, counting the frame for the current model."""
+        with self.lock:
+            self.history[-1][1] += 1
+            return self.detectors[worker_number], self.qos
+
+    def swap(self, detectors, model_path, qos):
+        """Replace the detectors and QoS controller at once and return the frames the previous model ran."""
+        with self.lock:
+            self.detectors = detectors
+            self.model_path = model_path
+            self.qos = qos
+            self.history.append([model_path, 0])
+            return self.history[-2][1]
+
+class CaptureState:
+    """Mutable state of one capture, bound to the stage functions of its pipeline.
+
+    A new one is made for every scan, so no stage writes to the app object and
+    a stage still draining cannot touch the next capture. The setup attributes
+    are written by scanning before the pipeline starts, every other attribute
+    by a single stage; other threads only read whole values.
+    """
+
+    def __init__(self, video_path, renditions, start_time=None):
+        self.video_path = video_path
+        self.renditions = renditions
+        self.start_time = start_time
+        self.stopping = False
+
+        # Set up by scanning before the pipeline runs
+        self.thread_policy = None
+        self.frame_shape = None
+        self.detectors = None
+        self.motion = None
+        self.harvester = None
+        self.reorder_buffer = None
+        self.pipeline = None
+
+        # Written under the app's swap lock, one swap worker runs while `swapping` is set
+        self.requested_model = None
+        self.swapping = False
+
+        # Written by grab
+        self.fps = 30
+        self.source_drops = 0
+
+        # Written by count
+        self.jump_detector = None
+        self.jump_index = None
+        self.last_detection = None
+
+        # Written by render or record
+        self.trail = deque(maxlen=TRAIL_LENGTH)
+        self.release_times = deque(maxlen=150)
+        self.render_log = None
+
+        # Written by write
+        self.video_out = None
+        self.video_path_out = None
+
+    def stop(self):
+        """End the source, also when the pipeline is not built yet, and let in-flight frames drain."""
+        self.stopping = True
+        if self.pipeline is not None:
+            self.pipeline.stop()
+
+class MyApp(tk.Tk):
+    CLOSE_TIMEOUT = 5.0
+    MAX_SOURCE_GAP = 5.0
+
+    def __init__(self, profile=False, capture_url=None):
         super().__init__()
 
+        # Twitch capture reads this URL instead of the configured channel, e.g. a local hls_replay.py stream
+        self.capture_url = capture_url
+
         # Load configuration
         config = load_config()
         
@@ -200,9 +1233,18 @@ class MyApp(tk.Tk):
         
         # Initialize configuration variables
         self.load_config_variables(config)
+
+        # Restore counter and timer from the journal of the last session
+        self.journal = CounterJournal(self.journal_path, self.journal_flush_interval, self.journal_flush_records)
+        restored_state = self.journal.replay()
+        if restored_state is not None:
+            self.counter.value, self.current_time = restored_state
         
         # Initialize runtime variables
         self.initialize_runtime_variables()
+        if profile:
+            self.tk_profiler.set(True)
+            self.toggle_profiler()
         #check if gpu is usable for pytorch
         self.gpu_check()
         #check if model_path exists
@@ -210,6 +1252,7 @@ class MyApp(tk.Tk):
         # Setup UI
         #self.setup_background()
         self.setup_widgets()
+        self.update_display()
         # Start recurring tasks
         self.iterate_time()
         self.update_label_counter()
@@ -224,8 +1267,26 @@ class MyApp(tk.Tk):
     def on_closing(self):
         """Handle application shutdown gracefully."""
         print("Closing application...")
-        self.frameloop = False
+        captures = self.running_captures()
+        for capture in captures:
+            capture.stopping = True
+            if capture.pipeline is not None:
+                capture.pipeline.cancel()
+
+        # Let stages finish before the journal closes, a count stage still draining would journal after it.
+        # Tk events are processed while waiting, stages read Tk variables
+        deadline = time.monotonic() + self.CLOSE_TIMEOUT
+        for capture in captures:
+            while capture.pipeline is not None and not capture.pipeline.join(0.05):
+                self.update()
+                if time.monotonic() > deadline:
+                    print("Capture stages did not finish in time, closing anyway")
+                    break
         self.stop_timer()
+        self.journal.close()
+        self.profiler.stop()
+        if self.publisher is not None:
+            self.publisher.close()
         cv2.destroyAllWindows()
         self.destroy()
 
@@ -233,7 +1294,7 @@ class MyApp(tk.Tk):
         """Configure main window properties."""
         self.options_window = None
         self.title("fillyBounce")
-        self.geometry("350x550")
+        self.geometry("350x600")
         self.configure(bg='#2D1C3A')
         self.iconbitmap('icon.ico')
 
@@ -274,19 +1335,72 @@ class MyApp(tk.Tk):
         self.relative_jump_threshold = config['DEFAULT'].getfloat('relative_jump_threshold')
         self.obs_device = config['DEFAULT'].getint('obs_device')
         self.current_time = config['DEFAULT'].getint('current_time')
-        self.counter = config['DEFAULT'].getint('counter')
+        self.counter = AtomicCounter(config['DEFAULT'].getint('counter'))
         self.oauth_token = config['DEFAULT']['oauth_token']
         self.dev_test = config['DEFAULT'].getboolean('dev_test')
+        self.inference_workers = config['DEFAULT'].getint('inference_workers')
+        self.reorder_window = config['DEFAULT'].getint('reorder_window')
+        self.reorder_timeout_ms = config['DEFAULT'].getint('reorder_timeout_ms')
+        self.lowscore_rate_per_minute = config['DEFAULT'].getint('lowscore_rate_per_minute')
+        self.lowscore_hash_distance = config['DEFAULT'].getint('lowscore_hash_distance')
+        self.lowscore_queue_size = config['DEFAULT'].getint('lowscore_queue_size')
+        self.journal_path = config['DEFAULT']['journal_path']
+        self.journal_flush_interval = config['DEFAULT'].getfloat('journal_flush_interval')
+        self.journal_flush_records = config['DEFAULT'].getint('journal_flush_records')
+        self.motion_gate = tk.BooleanVar(self, value=config['DEFAULT'].getboolean('motion_gate'))
+        self.motion_threshold = config['DEFAULT'].getfloat('motion_threshold')
+        self.motion_max_skip = config['DEFAULT'].getint('motion_max_skip')
+        self.qos_enabled = config['DEFAULT'].getboolean('qos_enabled')
+        self.qos_target_fps = config['DEFAULT'].getfloat('qos_target_fps')
+        self.qos_input_sizes = [int(size) for size in config['DEFAULT']['qos_input_sizes'].split(',')]
+        self.qos_max_stride = config['DEFAULT'].getint('qos_max_stride')
+        self.qos_min_bbox_px = config['DEFAULT'].getint('qos_min_bbox_px')
+        self.twitch_min_height = config['DEFAULT'].getint('twitch_min_height')
+        self.rendition_max_latency = config['DEFAULT'].getfloat('rendition_max_latency')
+        self.rendition_max_drop_rate = config['DEFAULT'].getfloat('rendition_max_drop_rate')
+        self.target_count = config['DEFAULT'].getint('target_count')
+        self.profiler_interval_ms = config['DEFAULT'].getint('profiler_interval_ms')
+        self.jump_window_seconds = config['DEFAULT'].getfloat('jump_window_seconds')
+        self.jump_max_gap = config['DEFAULT'].getfloat('jump_max_gap')
+        self.thread_preset = config['DEFAULT']['thread_preset']
+        self.publish_enabled = config['DEFAULT'].getboolean('publish_enabled')
+        self.publish_port = config['DEFAULT'].getint('publish_port')
+        self.publish_state_file = config['DEFAULT']['publish_state_file']
+        self.publish_min_interval_ms = config['DEFAULT'].getint('publish_min_interval_ms')
+        self.dvr_enabled = config['DEFAULT'].getboolean('dvr_enabled')
+        self.dvr_quality = config['DEFAULT']['dvr_quality']
+        self.dvr_path = config['DEFAULT']['dvr_path']
+        self.dvr_max_minutes = config['DEFAULT'].getfloat('dvr_max_minutes')
+        self.dvr_max_gb = config['DEFAULT'].getfloat('dvr_max_gb')
+        self.two_pass = tk.BooleanVar(self, value=config['DEFAULT'].getboolean('two_pass'))
+        self.fast_postprocess = config['DEFAULT'].getboolean('fast_postprocess')
+        self.cpu_runtime = config['DEFAULT']['cpu_runtime']
 
     def initialize_runtime_variables(self):
         """Initialize runtime variables."""
         self.tk_counter = tk.StringVar(self, value=0)
         self.tk_jps = tk.DoubleVar(self, value=0.0)
-        self.counter_trigger = False
+        self.tk_stats = tk.StringVar(self, value="")
+        self.jump_stats = JumpStats()
+        self.tk_profiler = tk.BooleanVar(self, value=False)
+        self.profiler = SamplingProfiler(self.profiler_interval_ms / 1000)
         self.options_window_open = False
         self.timer_running = False
-        self.ypos = deque(maxlen=10)
-        self.xypos = deque(maxlen=10)
+        self.next_tick = time.monotonic()
+        self.counter.on_change = self.counter_changed
+        self.task_start_time = None
+        self.captures = set()
+        self.captures_lock = threading.Lock()
+        self.swap_lock = threading.Lock()
+        self.publisher = None
+        if self.publish_enabled:
+            try:
+                self.publisher = CounterPublisher(self.publish_port, self.publish_state_file,
+                                                  self.publish_min_interval_ms / 1000)
+                # Clients connecting before the first tick or jump still get every field
+                self.publish(counter=self.counter.value, jps=0.0, time=self.current_time, time_text=self.time_text())
+            except OSError as e:
+                print(f"Unable to start the counter publisher on port {self.publish_port}: {e}")
 
     def setup_widgets(self):
         """Create and configure all UI widgets."""
@@ -335,6 +1449,10 @@ class MyApp(tk.Tk):
         self.tk_jps_label.pack(pady=5)
         self.tk_jps_label.config(font=("Arial", 16, "bold"))
 
+        self.tk_stats_label = ttk.Label(self, textvariable=self.tk_stats, style="Custom.TLabel", justify="center")
+        self.tk_stats_label.pack()
+        self.tk_stats_label.config(font=("Arial", 10))
+
     def setup_control_buttons(self):
         """Setup counter control and timer buttons."""
         # Counter buttons
@@ -367,7 +1485,7 @@ class MyApp(tk.Tk):
     def update_label_counter(self):
         """Update the counter label with the current value."""
         try:
-            formated_counter = "{:,}".format(self.counter)
+            formated_counter = "{:,}".format(self.counter.value)
             self.tk_counter.set(formated_counter)
         except (ValueError, TypeError) as e:
             print(f"Error updating counter display: {e}")
@@ -379,25 +1497,26 @@ class MyApp(tk.Tk):
         """Increase or decrease the counter by the specified value with validation."""
         try:
             delta = int(value)
-            new_value = self.counter + delta
 
             # Prevent negative counter values
-            if new_value < 0:
-                print(f"Counter cannot be negative. Current value: {self.counter}")
-                return
-
-            self.counter = new_value
+            if self.counter.add(delta) is None:
+                print(f"Counter cannot be negative. Current value: {self.counter.value}")
 
         except (ValueError, TypeError) as e:
             print(f"Error adjusting counter: {e}")
 
+    def counter_changed(self, value):
+        """Journal and publish a new counter value, called under the counter lock."""
+        self.journal.record("J", value, self.current_time)
+        self.publish(counter=value)
+
     def set_counter(self):
         """Set the counter to a user-specified value with validation."""
         user_input = promptuser("Enter the desired counter value:")
 
         if not user_input:
             print("Setting counter to 0...")
-            self.counter = 0
+            self.counter.set(0)
             return
 
         try:
@@ -407,8 +1526,8 @@ class MyApp(tk.Tk):
                 print(f"Invalid counter value: {new_value}. Must be non-negative.")
                 return
 
-            self.counter = new_value
-            print(f"Counter set to: {self.counter}")
+            self.counter.set(new_value)
+            print(f"Counter set to: {new_value}")
 
         except ValueError:
             print(f"Invalid input: '{user_input}'. Please enter an integer value.")
@@ -422,14 +1541,16 @@ class MyApp(tk.Tk):
         self.options_window_open = True
         self.options_window = tk.Toplevel(self)
         self.options_window.title("Options")
-        self.options_window.geometry("300x200")
+        self.options_window.geometry("300x260")
         self.options_window.configure(bg='#2D1C3A')
 
         # Checkbuttons
 
         ttk.Checkbutton(self.options_window, text="Show Frame", variable=self.tk_showframe).pack(side="top")
         ttk.Checkbutton(self.options_window, text="Use Performance Model",
-        variable=self.use_performance_model).pack(side="top")
+        variable=self.use_performance_model, command=self.model_choice_changed).pack(side="top")
+        ttk.Checkbutton(self.options_window, text="Skip Static Frames", variable=self.motion_gate).pack(side="top")
+        ttk.Checkbutton(self.options_window, text="Render Video Later", variable=self.two_pass).pack(side="top")
 
         if self.dev_test:
             ttk.Checkbutton(self.options_window, text="Model Verbose", variable=self.tk_model_verbose).pack(side="top")
@@ -437,6 +1558,9 @@ class MyApp(tk.Tk):
             ttk.Checkbutton(self.options_window, text="Save Low Scores",
             variable=self.tk_save_lowscores).pack(side="top")
 
+            ttk.Checkbutton(self.options_window, text="Profiler", variable=self.tk_profiler,
+            command=self.toggle_profiler).pack(side="top")
+
         # Configuration buttons
         ttk.Button(self.options_window, text="Change Twitch Channel url",
         command=self.set_twitch_channel_url).pack(side="top")
@@ -468,7 +1592,7 @@ class MyApp(tk.Tk):
         x = main_x + (main_width - options_width) // 2
         y = main_y + (main_height - options_height) // 2
 
-        self.options_window.geometry(f"300x200+{x}+{y}")
+        self.options_window.geometry(f"300x260+{x}+{y}")
 
         # Bind to window destroy event to ensure flag is reset
         self.options_window.bind("<Destroy>", self.on_options_destroy)
@@ -502,6 +1626,8 @@ class MyApp(tk.Tk):
             'tk_showframe': str(self.tk_showframe.get()),
             'tk_model_verbose': str(self.tk_model_verbose.get()),
             'tk_save_lowscores': str(self.tk_save_lowscores.get()),
+            'motion_gate': str(self.motion_gate.get()),
+            'two_pass': str(self.two_pass.get()),
             'twitch_channel_url': str(self.twitch_channel_url),
             'obs_device': str(self.obs_device),
             'relative_jump_threshold': str(self.relative_jump_threshold),
@@ -516,6 +1642,13 @@ class MyApp(tk.Tk):
         with open('config.ini', 'w') as configfile:
             config.write(configfile)
 
+    def toggle_profiler(self):
+        """Start or stop the sampling profiler to match the checkbox."""
+        if self.tk_profiler.get():
+            self.profiler.start()
+        else:
+            self.profiler.stop()
+
     def set_obs(self):
         """Set OBS device number based on user input with validation."""
         user_input = promptuser("Set OBS device number (e.g., 0, 1, 2):")
@@ -558,27 +1691,18 @@ class MyApp(tk.Tk):
         print(f"Twitch channel URL set to: {self.twitch_channel_url}")
 
     def quality_check(self, streams):
-        """Select optimal stream quality from available streams."""
-        for selected_quality in reversed(streams):
-            print(selected_quality)
-            if selected_quality in ("720p60", "480p", "480p30"):
-                return selected_quality
-
-        # Preferred qualities in order of preference
-        preferred_qualities = ("480p", "480p30", "480p60", "360p", "360p30")
-
-        print("Checking available stream qualities...")
-
-        # Check each available quality (in reverse order for higher qualities first)
-        for quality in reversed(list(streams.keys())):
-            print(f"  Available: {quality}")
-
-            if quality in preferred_qualities:
-                print(f"Selected quality: {quality}")
-                return quality
-
-        print("No preferred quality found in available streams.")
-        return None
+        """Return the available video qualities ordered from lowest to highest."""
+        renditions = []
+        for quality in streams:
+            # Skip audio_only and the best/worst aliases
+            match = re.fullmatch(r'(\d+)p(\d+)?', quality)
+            if match:
+                renditions.append((int(match[1]), int(match[2] or 30), quality))
+
+        renditions.sort()
+        qualities = [quality for _, _, quality in renditions]
+        print(f"Available qualities: {', '.join(qualities)}")
+        return qualities
 
     def set_relative_jump_threshold(self):
         """Set relative jump threshold based on user input with validation."""
@@ -622,14 +1746,43 @@ class MyApp(tk.Tk):
         except ValueError:
             print(f"Invalid input: '{user_input}'. Please enter a numeric value.")
 
+    def model_choice_changed(self):
+        """Swap the model of a running capture when "Use Performance Model" is toggled."""
+        if self.hardware == "cpu" and not self.use_performance_model.get():
+            print("The precision model needs CUDA, keeping the performance model")
+            self.use_performance_model.set(True)
+            return
+
+        model_path = self.performance_model_path if self.use_performance_model.get() else self.precision_model_path
+        requested = time.perf_counter()
+        for capture in self.running_captures():
+            if capture.detectors is None:
+                continue
+
+            # A swap already in flight picks up the new request once its model is loaded
+            with self.swap_lock:
+                capture.requested_model = (model_path, requested)
+                if capture.swapping:
+                    continue
+                capture.swapping = True
+            threading.Thread(target=self.swap_model, args=(capture,), daemon=True, name="model-swap").start()
+
     def gpu_check(self):
         """Check if GPU is available and set appropriate model path."""
+        # The OpenVINO runtime is CPU only, asking torch about CUDA would load it
+        if self.cpu_runtime == "openvino":
+            print("Using the OpenVINO CPU runtime, torch is not loaded")
+            self.use_performance_model.set(True)
+            self.hardware = "cpu"
+            return
+
+        import torch
 
         print("Checking if GPU is available...")
         if not torch.cuda.is_available():
             print("CUDA is not available. Switching to CPU")
             print("setting performance model active. Do not change as other model will crash if cpu used")
-            self.use_performance_model = True
+            self.use_performance_model.set(True)
 
             self.hardware = "cpu"
             return
@@ -668,25 +1821,22 @@ class MyApp(tk.Tk):
 
         button, target = task_config.get(tasknum)
         button.config(text="Running", state=tk.DISABLED)
+        self.task_start_time = time.perf_counter()
         threading.Thread(target=target, daemon=True).start()
 
     def stop_tasks(self):
-        """Stop all running tasks and restore buttons."""
+        """Stop all running tasks, their buttons come back once each capture has drained."""
         print("Stopping tasks...")
-        self.restore_button_states()
         self.stop_timer()
-        self.frameloop = False
 
-    def restore_button_states(self):
-        """Restore all capture buttons to their initial state."""
-        button_configs = [
-            (self.twitch_cap_btn, "Twitch Capture"),
-            (self.processvideo_btn, "Process Recorded Video"),
-            (self.obs_cap_btn, "OBS/Cam Capture")
-        ]
+        # Stop the source, frames already grabbed are still counted and written
+        for capture in self.running_captures():
+            capture.stop()
 
-        for button, text in button_configs:
-            button.config(text=text, state=tk.NORMAL)
+    def running_captures(self):
+        """Captures between the start of scanning and the end of their cleanup."""
+        with self.captures_lock:
+            return list(self.captures)
 
     def check_queue(self):
         """Check task queue and update button states when tasks complete."""
@@ -784,7 +1934,8 @@ class MyApp(tk.Tk):
         """Prepare and start Twitch stream capture."""
         try:
             # Create and configure Streamlink session
-            print(f"Connecting to Twitch channel: {self.twitch_channel_url}")
+            channel_url = self.capture_url or self.twitch_channel_url
+            print(f"Connecting to Twitch channel: {channel_url}")
             session = streamlink.Streamlink()
 
             #Token check
@@ -807,160 +1958,324 @@ class MyApp(tk.Tk):
                 session.set_option(option, value)
 
             # Fetch available streams
-            streams = session.streams(url=self.twitch_channel_url)
+            streams = session.streams(url=channel_url)
 
             if not streams:
                 print("No streams found for the URL. The channel may be offline.")
                 self.twitch_cap_btn.config(text="Twitch Capture", state=tk.NORMAL)
                 return
 
-            # Select optimal quality
-            quality_selected = self.quality_check(streams)
+            # Rank qualities, the selector starts low and adapts during capture
+            qualities = self.quality_check(streams)
 
-            if quality_selected is None:
-                print("Optimal quality (480p/480p30) not found.")
-                print(f"Available qualities: {list(streams.keys())}")
+            if not qualities:
+                print("No video quality found in available streams.")
+                print(f"Available streams: {list(streams.keys())}")
                 self.twitch_cap_btn.config(text="Twitch Capture", state=tk.NORMAL)
                 return
 
-            # Get stream URL and start processing
-            quality_stream = streams[quality_selected]
-            play_url = quality_stream.url
+            renditions = RenditionSelector(session, channel_url, qualities, self.twitch_min_height,
+                                           lambda: self.model_confidence, self.rendition_max_latency,
+                                           self.rendition_max_drop_rate)
+            play_url = streams[renditions.quality].url
 
-            print(f"Selected quality: {quality_selected}")
-            print(f"Starting Twitch capture...")
+            print(f"Selected quality: {renditions.quality}")
+
+            # Keep the raw segments of a fixed rendition so counts can be checked later
+            recorder = None
+            if self.dvr_enabled:
+                dvr_quality = self.dvr_quality if self.dvr_quality in streams else qualities[-1]
+                recorder = SegmentRecorder(session, channel_url, dvr_quality,
+                                           os.path.join(self.dvr_path, time.strftime('%Y%m%d-%H%M%S')),
+                                           self.dvr_max_minutes * 60, int(self.dvr_max_gb * 1e9),
+                                           lambda: self.counter.value)
 
-            self.scanning(play_url, queueref="Task3")
+            print(f"Starting Twitch capture...")
+            try:
+                self.scanning(play_url, queueref="Task3", renditions=renditions)
+            finally:
+                if recorder is not None:
+                    recorder.stop()
 
         except Exception as e:
             print(f"Error setting up Twitch capture: {e}")
             self.twitch_cap_btn.config(text="Twitch Capture", state=tk.NORMAL)
 
     # Frame Processing
-    def scanning(self, source, queueref, video_path=None):
-        """Main scanning function that coordinates all processing threads."""
-        grabber_thread = None
-        processor_thread = None
-        writer_thread = None
+    def scanning(self, source, queueref, video_path=None, renditions=None):
+        """Load the models, build the capture pipeline for a source and run it until it ends."""
+        capture = CaptureState(video_path, renditions, self.task_start_time)
+        with self.captures_lock:
+            self.captures.add(capture)
         try:
             # Initialize processing
             print("Initializing video processing...")
-            self.frameloop = True
             self.start_timer()
+            self.jump_stats.reset()
 
             # Load YOLO model
             if self.use_performance_model.get():
-                self.model_path = self.performance_model_path
+                model_path = self.performance_model_path
                 print("Using performance model")
             else:
-                self.model_path = self.precision_model_path
+                model_path = self.precision_model_path
                 print("Using precision model")
-            print(f"Loading model from: {self.model_path}")
-            model = YOLO(self.model_path)
 
-            # CPU-specific optimizations
-            if self.hardware == "cpu":
+            # Each inference worker owns its model instance, predictors are not thread-safe
+            worker_count = self.inference_worker_count()
+            capture.thread_policy = ThreadPolicy(self.thread_preset, worker_count)
+            capture.frame_shape = self.source_frame_shape(video_path, renditions)
+            detectors, input_sizes = self.load_detectors(model_path, capture.thread_policy, capture.frame_shape)
+
+            capture.motion = MotionGate(self.motion_threshold, self.motion_max_skip)
+            qos = QosController(input_sizes, self.qos_max_stride if self.qos_enabled else 1, self.qos_min_bbox_px)
+            capture.detectors = DetectorSet(detectors, model_path, qos)
+
+            # Low score frames are saved next to the video, or in Saved_Frames for live sources
+            harvest_path = "Saved_Frames" if video_path is None else os.path.join(os.path.dirname(video_path), "Saved_Frames")
+            capture.harvester = LowScoreHarvester(harvest_path, self.lowscore_rate_per_minute,
+                                                  self.lowscore_hash_distance, self.lowscore_queue_size)
 
-                # Warm up model
-                print("Warming up model...")
-                dummy = torch.zeros((1, 3, 416, 416))
-                _ = model(dummy, verbose=False)
-                print("Model ready")
-
-            # Create queues for thread communication
-            frame_queue = queue.Queue(maxsize=60)
-            result_queue = queue.Queue(maxsize=60)
-            write_queue = queue.Queue(maxsize=60) if video_path else None
-
-            # Start frame grabber thread
-            print("Starting frame grabber thread...")
-            grabber_thread = threading.Thread(
-                target=self.frame_grabber,
-                args=(source, frame_queue),
-                daemon=True,
-                name="FrameGrabber"
-            )
-            grabber_thread.start()
-
-            # Start detection processor thread
-            print("Starting detection processor thread...")
-            processor_thread = threading.Thread(
-                target=self.detection_processor,
-                args=(model, frame_queue, result_queue, write_queue, video_path),
-                daemon=True,
-                name="DetectionProcessor"
-            )
-            processor_thread.start()
-
-            # Start video writer thread if video_path is provided
-            if video_path is not None:
-                print("Starting video writer thread...")
-                writer_thread = threading.Thread(
-                    target=self.frame_writer,
-                    args=(write_queue, video_path),
-                    daemon=True,
-                    name="FrameWriter"
-                )
-                writer_thread.start()
-
-            print("All threads started successfully. Processing frames...")
-
-            # Main display loop
-            self.display_frames(result_queue)
+            # Index counted jumps so they can be verified against the source later
+            if video_path is None:
+                index_path = os.path.join("Jump_Index", f"{time.strftime('%Y%m%d-%H%M%S')}_jumps.csv")
+            else:
+                index_path = f'{video_path}_jumps.csv'
+            capture.jump_detector = JumpDetector(self.relative_jump_threshold, self.jump_window_seconds,
+                                                 self.jump_max_gap)
+            capture.jump_index = JumpIndex(index_path)
+
+            # Publish the pipeline before checking for a stop, so a stop during setup is never missed
+            capture.pipeline = self.build_pipeline(capture, source)
+            if capture.stopping:
+                capture.pipeline.stop()
+            print(f"Starting pipeline: {', '.join(capture.pipeline.stages)}. Processing frames...")
+            capture.pipeline.run()
 
         except Exception as e:
             print(f"Error in scanning: {e}")
-            self.frameloop = False
+            if capture.pipeline is not None:
+                capture.pipeline.cancel()
 
         finally:
-            # Cleanup
+            # Cleanup, only this capture's objects, another one may already be running
             print("Cleaning up resources...")
-            self.cleanup_scanning(grabber_thread, processor_thread, writer_thread, queueref)
-
-    def display_frames(self, result_queue):
-        """Display processed frames in a window."""
-        try:
-            while self.frameloop:
-                try:
-                    # Get frame with timeout to prevent blocking
-                    frame = result_queue.get(timeout=1)
-
-                    # Display frame if show frame option is enabled
-                    if self.tk_showframe.get():
-                        cv2.imshow('Processing', frame)
-                    fps = self.writerfps
-                    fps_to_ms = int((1.0 / fps) * 1000)
-                    # Check for 'q' key press to quit
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        print("User pressed 'q' to quit")
-                        self.frameloop = False
-                        break
-
-                    # time.sleep()
-
-                except queue.Empty:
-                    # Continue if no frame available yet
+            pipeline = capture.pipeline
+            if pipeline is not None and not pipeline.running:
+                self.scanning_report(capture)
+                if 'record' in pipeline.stages:
+                    print(f'Detection pass done. Render the annotated video with: python render.py "{video_path}"')
+            if capture.harvester is not None:
+                capture.harvester.stop()
+            if capture.jump_index is not None:
+                # Detach first so a lingering stage cannot record into a closed file
+                jump_index, capture.jump_index = capture.jump_index, None
+                jump_index.close()
+            with self.captures_lock:
+                self.captures.discard(capture)
+            self.cleanup_scanning(queueref)
+
+    def load_detectors(self, model_path, thread_policy, frame_shape):
+        """Load and warm up one detector per inference worker, returning them and the model's input sizes."""
+        worker_count = thread_policy.workers
+        print(f"Loading {worker_count} model instance(s) from: {model_path}")
+        lightweight = self.cpu_runtime == "openvino" and self.hardware == "cpu"
+        if lightweight and not os.path.isdir(model_path):
+            print(f"The OpenVINO runtime needs an OpenVINO export, loading {model_path} with ultralytics")
+            lightweight = False
+
+        if lightweight:
+            # Compiled with each worker's thread count from the start, nothing to recompile
+            models = [OpenVinoDetector(model_path, None if self.thread_preset == "default"
+                                       else thread_policy.worker_threads(worker_number))
+                      for worker_number in range(worker_count)]
+            input_sizes = models[0].input_sizes(self.qos_input_sizes)
+        else:
+            from ultralytics import YOLO
+            models = [YOLO(model_path) for _ in range(worker_count)]
+            input_sizes = model_input_sizes(model_path, self.qos_input_sizes)
+        if self.hardware == "cpu" and not input_sizes:
+            input_sizes = [416]
+
+        # Compile OpenVINO models through the on-disk cache, keyed on the shapes they are compiled at
+        model_ready_start = time.perf_counter()
+        cache_path = None
+        if (self.hardware == "cpu" and os.path.isdir(model_path)
+                and any(name.endswith('.xml') for name in os.listdir(model_path))):
+            cache_path = cache_directory(model_path, "CPU", [(1, 3, size, size) for size in input_sizes])
+            print(f"Model cache {'hit' if is_cached(cache_path) else 'miss'}: {cache_path}")
+            if lightweight:
+                for model in models:
+                    model.cache_to(cache_path)
+
+        # Size runtime thread pools to the CPU layout, torch is only loaded by now for ultralytics models
+        thread_policy.apply_runtime()
+
+        # Warm up on a frame of the source's size at every input size QoS may use
+        print("Warming up model...")
+        warmup_frame = np.zeros(frame_shape, dtype=np.uint8)
+        warmup_args = [{'imgsz': size} for size in input_sizes] or [{}]
+        for worker_number, model in enumerate(models):
+            # The first call builds the predictor, its OpenVINO model is then recompiled for this worker
+            # through the cache; ultralytics compiles that first one itself and takes no cache directory
+            _ = model(warmup_frame, verbose=False, **warmup_args[0])
+            if self.hardware == "cpu":
+                thread_policy.set_openvino_threads(model, model_path, worker_number, cache_path)
+            for args in warmup_args:
+                _ = model(warmup_frame, verbose=False, **args)
+        print(f"Model ready in {time.perf_counter() - model_ready_start:.2f}s")
+
+        # Ultralytics models take the top-1 fast path, OpenVINO detectors already return the best box
+        detectors = models if lightweight else [TopDetector(model, self.fast_postprocess) for model in models]
+        return detectors, input_sizes
+
+    def swap_model(self, capture):
+        """Load and warm up the requested model beside the running capture, then swap it in between frames.
+
+        Counter, timer and jump detector state are untouched, the capture
+        carries on with the previous model until the new one is ready. Runs
+        until the capture uses the latest requested model, so the last toggle wins.
+        """
+        pipeline, detectors = capture.pipeline, capture.detectors
+        while True:
+            with self.swap_lock:
+                model_path, requested = capture.requested_model
+                if pipeline is None or not pipeline.running or model_path == detectors.model_path:
+                    capture.swapping = False
+                    return
+
+            print(f"Loading {model_path} in the background, counting carries on with {detectors.model_path}")
+            try:
+                new_detectors, input_sizes = self.load_detectors(model_path, capture.thread_policy, capture.frame_shape)
+            except Exception as e:
+                print(f"Error loading {model_path}, keeping {detectors.model_path}: {e}")
+                with self.swap_lock:
+                    if capture.requested_model[0] == model_path:
+                        capture.swapping = False
+                        return
+                continue
+
+            # A toggle during the load supersedes this model
+            with self.swap_lock:
+                if capture.requested_model[0] != model_path:
+                    print(f"{model_path} is no longer requested, nothing swapped")
                     continue
+            if not pipeline.running:
+                print(f"Capture ended before {model_path} was ready, nothing swapped")
+                continue
+
+            # A fresh QoS controller measures the new model from scratch
+            qos = QosController(input_sizes, self.qos_max_stride if self.qos_enabled else 1, self.qos_min_bbox_px)
+            previous_path = detectors.model_path
+            previous_frames = detectors.swap(new_detectors, model_path, qos)
+            print(f"Swapped {previous_path} -> {model_path} {time.perf_counter() - requested:.2f}s after the request, "
+                  f"{previous_frames} frame(s) ran on {previous_path}")
+
+    def build_pipeline(self, capture, source):
+        """Join the capture stages with bounded channels, each bound to the capture's state.
+
+        grab -> preprocess -> infer (one worker per model) -> count -> render -> display, write
+        """
+        video_path = capture.video_path
+        detectors = capture.detectors
+        pipeline = Pipeline()
+        frames = pipeline.channel("frames", 8)
+        preprocessed = pipeline.channel("preprocessed", 60)
+        capture.reorder_buffer = pipeline.add_channel(
+            ReorderBuffer("results", self.reorder_window, self.reorder_timeout_ms / 1000))
+        counted = pipeline.channel("counted", 8)
+
+        pin = capture.thread_policy.pin
+        pipeline.stage("grab", lambda: self.grab_frames(capture, source, lambda: frames.depth + preprocessed.depth),
+                       outputs=[frames], on_start=lambda _: pin("grabber"))
+
+        # Frames that skip the model go from preprocess straight into the reorder buffer
+        capture.reorder_buffer.add_producer()
+        pipeline.stage("preprocess", functools.partial(self.preprocess_frame, capture), frames, [preprocessed],
+                       on_start=lambda _: pin("grabber"), on_finish=capture.reorder_buffer.close)
+        pipeline.stage("infer", [functools.partial(self.infer_frame, detectors, worker_number)
+                                 for worker_number in range(detectors.workers)],
+                       preprocessed, [capture.reorder_buffer], on_start=lambda worker_number: pin("worker", worker_number))
+        pipeline.stage("count", functools.partial(self.count_frame, capture, worker_count=detectors.workers),
+                       capture.reorder_buffer, [counted], on_start=lambda _: pin("processor"))
+
+        # Two-pass runs only log what to draw, render.py annotates the video afterwards
+        if video_path is not None and self.two_pass.get():
+            capture.render_log = RenderLog(video_path)
+            pipeline.stage("record", functools.partial(self.record_frame, capture), counted,
+                           on_start=lambda _: pin("writer"),
+                           on_finish=lambda: capture.render_log.close(capture.fps, self.device_text(capture)))
+            return pipeline
+
+        rendered = [pipeline.channel("display", 60)]
+        if video_path is not None:
+            rendered.append(pipeline.channel("write", 60))
+        pipeline.stage("render", functools.partial(self.render_frame, capture), counted, rendered, on_start=lambda _: pin("processor"))
+        pipeline.stage("display", functools.partial(self.display_frame, capture), rendered[0],
+                       on_start=lambda _: pin("display"),
+                       on_finish=cv2.destroyAllWindows)
+        if video_path is not None:
+            pipeline.stage("write", functools.partial(self.write_frame, capture), rendered[1],
+                           on_start=lambda _: pin("writer"), on_finish=functools.partial(self.close_writer, capture))
+        return pipeline
+
+    def scanning_report(self, capture):
+        """Print the stage metrics and throughput so settings and thread presets can be compared."""
+        pipeline = capture.pipeline
+        print(pipeline.report())
+        frames_processed = pipeline.stages['count'].items
+        if pipeline.elapsed > 0:
+            print(f"Processed {frames_processed} frame(s) in {pipeline.elapsed:.1f}s "
+                  f"({frames_processed / pipeline.elapsed:.1f} fps) with thread preset '{capture.thread_policy.preset}'")
+        if capture.reorder_buffer.skipped or capture.reorder_buffer.late:
+            print(f"Reorder buffer skipped {capture.reorder_buffer.skipped} frame(s), "
+                  f"dropped {capture.reorder_buffer.late} late result(s)")
+        if capture.source_drops:
+            print(f"Source dropped {capture.source_drops} frame(s)")
+        if capture.motion.frames:
+            print(f"Motion gate skipped {capture.motion.skipped} of {capture.motion.frames} frame(s)")
+        if len(capture.detectors.history) > 1:
+            for model_path, frames in capture.detectors.history:
+                print(f"Model {model_path} processed {frames} frame(s)")
+
+    def inference_worker_count(self):
+        """Return the number of concurrent inference workers to run."""
+        if self.inference_workers > 0:
+            return self.inference_workers
+
+        # A single engine already saturates the GPU
+        if self.hardware == "cuda":
+            return 1
+
+        return max(1, min(4, (os.cpu_count() or 1) // 2))
+
+    def source_frame_shape(self, video_path, renditions):
+        """Return the (height, width, 3) shape frames of the source are expected to have."""
+        if video_path is not None:
+            cap = cv2.VideoCapture(video_path)
+            width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            cap.release()
+            if width and height:
+                return height, width, 3
 
-        except Exception as e:
-            print(f"Error in display loop: {e}")
-            self.frameloop = False
+        # Twitch renditions are named by height and streamed at 16:9
+        height = int(re.match(r'\d+', renditions.quality)[0]) if renditions is not None else 720
+        return height, height * 16 // 9 // 2 * 2, 3
 
-    def frame_grabber(self, source, frame_queue):
-        """Grab frames from the video source and add to queue."""
-        cap = None
+    def grab_frames(self, capture, source, backlog):
+        """Yield (frame_number, timestamp, frame) from the video source until it ends.
+
+        `backlog` returns the number of grabbed frames still waiting for the model.
+        """
+        cap = cv2.VideoCapture(source)
         try:
-            # Initialize video capture
-            cap = cv2.VideoCapture(source)
             if not cap.isOpened():
-                print(f"Error: Unable to open video source: {source}")
-                return
+                raise RuntimeError(f"Unable to open video source: {source}")
 
             # Read initial frame to get properties
             ret, frame = cap.read()
             if not ret or frame is None:
-                print("Failed to read initial frame")
-                return
+                raise RuntimeError("Failed to read initial frame")
 
             # Get video properties
             fps = int(cap.get(cv2.CAP_PROP_FPS))
@@ -972,7 +2287,7 @@ class MyApp(tk.Tk):
                 fps = 30.0
 
             # Store FPS for writer and calculate frame timing
-            self.writerfps = fps
+            capture.fps = fps
             adjusted_fps = fps * 1.2
             #adjusted_fps = fps
             frame_timing = 1.0 / adjusted_fps
@@ -980,224 +2295,270 @@ class MyApp(tk.Tk):
             # Set buffer size to minimize latency
             cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
 
-            lastframe = frame
+            frame_number = 0
+            # Media time continues across rendition switches, each capture restarts at zero
+            capture_start = 0
+            timestamp_offset = 0.0
+            timestamp = last_timestamp = self.media_timestamp(cap, frame_number, fps)
             #if self.hardware == "cpu":
                 #frame = cv2.resize(frame, (854, 480), interpolation=cv2.INTER_NEAREST)
-            frame_queue.put(frame)  # Put initial frame in queue
+            yield frame_number, timestamp, frame
+
+            # Main frame grabbing loop, the pipeline closes the generator when it is stopped
+            while True:
+                # Switch Twitch rendition within the session so the counter carries on
+                if capture.renditions is not None:
+                    capture.renditions.latency = backlog() / fps
+                    try:
+                        switch = capture.renditions.take_switch()
+                    except Exception as e:
+                        print(f"Error switching rendition, keeping current one: {e}")
+                        switch = None
+
+                    # The current rendition is only released once the new one has opened
+                    switch_cap = None
+                    if switch is not None:
+                        switch_index, switch_url = switch
+                        switch_cap = cv2.VideoCapture(switch_url)
+                        if not switch_cap.isOpened():
+                            switch_cap.release()
+                            switch_cap = None
+                            print(f"Unable to open the {capture.renditions.qualities[switch_index]} rendition, "
+                                  f"keeping {capture.renditions.quality}")
+
+                    if switch_cap is not None:
+                        cap.release()
+                        cap = switch_cap
+                        capture.renditions.switched(switch_index)
+                        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                        capture_start = frame_number
+                        timestamp_offset = timestamp
+                        last_timestamp = None
+                        switch_fps = int(cap.get(cv2.CAP_PROP_FPS))
+                        if switch_fps > 0:
+                            fps = switch_fps
+                            capture.fps = fps
+                            frame_timing = 1.0 / (fps * 1.2)
+                        print(f"Switched to {capture.renditions.quality} at {fps} fps")
 
-            # Main frame grabbing loop
-            while self.frameloop:
                 ret, frame = cap.read()
 
-                # Handle read failures
+                # The end of the source ends the stream, later stages drain what is in flight
                 if not ret:
-                    print("Failed to read frame, stopping frame grabber")
-                    self.frameloop = False
-                    break
+                    print("End of video source, stopping frame grabber")
+                    return
 
                 if frame is None:
                     print("Warning: Received None frame")
+                    capture.source_drops += 1
                     continue
 
                 #if self.hardware == "cpu":
                    # frame = cv2.resize(frame, (854, 480), interpolation=cv2.INTER_NEAREST)
 
-                # Add frame to queue
-                frame_queue.put(frame)
+                # Number frames so results can be put back in order
+                frame_number += 1
+                timestamp = timestamp_offset + self.media_timestamp(cap, frame_number - capture_start, fps)
+
+                # Media time skipping ahead means the source dropped frames, e.g. a live stream outrunning
+                # a backed-up grabber; longer jumps are stream discontinuities
+                if last_timestamp is not None and timestamp - last_timestamp < self.MAX_SOURCE_GAP:
+                    capture.source_drops += max(0, round((timestamp - last_timestamp) * fps) - 1)
+                last_timestamp = timestamp
+                yield frame_number, timestamp, frame
 
                 # Control frame rate
                 time.sleep(frame_timing)
 
-            # Write sentinel frames to prevent thread lockup
-            for _ in range(2):
-                frame_queue.put(lastframe)
-
-        except Exception as e:
-            print(f"Error in frame_grabber: {e}")
-            self.frameloop = False
-
         finally:
             # Ensure resources are released
-            if cap is not None:
-                cap.release()
-            print("Frame grabber thread terminated.")
+            cap.release()
+            print("Frame grabber terminated.")
+
+    def preprocess_frame(self, capture, item):
+        """Pass a grabbed frame on to the model, or straight to the reorder buffer if it can skip the model.
+
+        Skipped frames take no inference worker, so they cannot overtake the
+        frames still in the model; they wait behind them in the reorder buffer.
+        """
+        frame_number, timestamp, frame = item
+        skip = self.frame_skip_reason(capture, frame_number, frame)
+        if skip is None:
+            return item
+        capture.reorder_buffer.put((frame_number, (timestamp, frame, None, skip)), timed=False)
+        return None
+
+    def frame_skip_reason(self, capture, frame_number, frame):
+        """Return why a grabbed frame can skip the model, or None to run it.
+
+        "stride" frames are left out by the QoS controller, "motion" frames are
+        static and reuse the previous detection.
+        """
+        if frame_number % capture.detectors.qos.stride:
+            return "stride"
+        if self.motion_gate.get() and capture.motion.is_static(frame):
+            return "motion"
+        return None
+
+    @staticmethod
+    def media_timestamp(cap, frame_number, fps):
+        """Return the media time of the frame just read, in seconds."""
+        timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
 
-    def detection_processor(self, model, frame_queue, result_queue, write_queue, video_path=None):
-        """Process frames with YOLO model and detect jumps."""
+        # Cameras report no position, fall back to the nominal frame rate
+        if timestamp <= 0 and frame_number > 0:
+            timestamp = frame_number / fps
+        return timestamp
+
+    def infer_frame(self, detectors, worker_number, item):
+        """Run YOLO detection on a frame and return its result for the reorder buffer."""
+        frame_number, timestamp, frame = item
+        best_detection = None
         verbose = self.tk_model_verbose.get()
+        try:
+            # The detector and its QoS controller are taken together, a model swap applies from the next frame
+            detector, qos = detectors.take(worker_number)
 
-        # Initialize with first frame
-        first_frame = frame_queue.get()
-        frame_height, frame_width, _ = first_frame.shape
-        last_frame = first_frame
-        frame_number = 0
-        # FPS tracking
-        fps_history = deque(maxlen=150)
-        while self.frameloop:
-            time_start = time.time()
-            frame = frame_queue.get()
-            frame_number += 1
-
-            # Run YOLO detection
+            # Run YOLO detection at the input size chosen by the QoS controller
+            imgsz = qos.imgsz
+            inference_start = time.perf_counter()
             if self.hardware == "cuda":
             #GPU
                 #results = model(source=frame,verbose=verbose, device=self.hardware, stream_buffer=True, conf=0.35, imgsz=416, max_det=5, agnostic_nms=True, iou=0.5)
-                results = model(source=frame,verbose=verbose, device=self.hardware, half=True)
+                if imgsz is None:
+                    best_detection = detector(frame, verbose=verbose, device=self.hardware, half=True)
+                else:
+                    best_detection = detector(frame, verbose=verbose, device=self.hardware, half=True, imgsz=imgsz)
             # CPU
             else:
-                results = model(source=frame,verbose=verbose, device=self.hardware, stream_buffer=True, conf=0.35, imgsz=416, max_det=5, agnostic_nms=True, iou=0.5, int8=True)
-            # CPU Test
-            # results = model(source=frame,verbose=verbose, device=self.hardware, stream_buffer=True, conf=0.35, imgsz=416, max_det=5, agnostic_nms=True, iou=0.5, int8=True)
-            detections = results[0].boxes
-
-            # Draw counter overlay on frame
-            counter_text = str(self.counter).zfill(2)
-            counter_bg_x1 = int(0.5 * frame_width)
-            counter_bg_y1 = int(0.064 * frame_height)
-            counter_bg_x2 = int(0.628 * frame_width)
-            counter_bg_y2 = int(0.098 * frame_height)
-            cv2.rectangle(frame, (counter_bg_x1, counter_bg_y1),
-                          (counter_bg_x2, counter_bg_y2), (0, 0, 0), -1)
-
-            counter_text_x = int(0.5 * frame_width)
-            counter_text_y = int(0.1 * frame_height)
-            cv2.putText(frame, f'Counter: {counter_text}', (counter_text_x, counter_text_y),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-
-            # Display Model used
-            model_text_x = int(0.02 * frame_width)
-            model_text_y = int(0.98 * frame_height)
-            cv2.putText(frame, f'Device : {self.hardware} // Model : {self.model_path}', (model_text_x, model_text_y),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-
-            # Process detections if any found
-            if len(detections) > 0:
-                best_detection = max(detections, key=lambda x: x.conf)
-
-                # Extract bounding box coordinates
-                bbox_x1, bbox_y1, bbox_x2, bbox_y2 = map(int, best_detection.xyxy[0])
-                confidence = float(best_detection.conf)
-                bbox_height = bbox_y2 - bbox_y1
-
-                # Calculate center position
-                center_x = int((bbox_x1 + bbox_x2) / 2)
-                center_y = int((bbox_y1 + bbox_y2) / 2)
-                center_position = (center_x, center_y)
-                if confidence < self.model_confidence:
-                    if self.tk_save_lowscores.get():
-                        self.save_lowscores(frame, frame_number, confidence, video_path)
-                    continue
-
-                # Only process high-confidence detections
-                if confidence > self.model_confidence:
-                    # Draw bounding box
-                    cv2.rectangle(frame, (bbox_x1, bbox_y1), (bbox_x2, bbox_y2),
-                                  (0, 255, 0), 4)
-
-                    # Draw confidence label
-                    label_text = f'Filian[{round(confidence, 1)}]'
-                    label_y = bbox_y1 - 10
-                    cv2.putText(frame, label_text, (bbox_x1, label_y),
-                                cv2.FONT_HERSHEY_SIMPLEX, 1.3, (0, 255, 0), 3, cv2.LINE_AA)
-
-                    # Check for jumps and draw trail
-                    self.jump_check(center_position, bbox_height)
-                    self.trailing_dot(center_position, frame)
-
-            # Queue frame for display and optional video writing
-            result_queue.put(frame)
-            if video_path is not None:
-                write_queue.put(frame)
-
-            # Calculate and display FPS
-            time_end = time.time()
-            time_elapsed = time_end - time_start
-            fps = 1.0 / time_elapsed if time_elapsed > 0 else 0
-
-            # Track FPS history for averaging
-            fps_history.append(fps)
-            avg_fps = sum(fps_history) / len(fps_history) if fps_history else 0
-            avg_fps=round(avg_fps)
-
-            # Draw FPS overlay on frame
-            fps_text_x = int(0.02 * frame_width)
-            fps_text_y = int(0.1 * frame_height)
-            cv2.putText(frame, f'FPS: {avg_fps}', (fps_text_x, fps_text_y),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
-
-        # Write sentinel frames to prevent thread lockup
-        if video_path is not None:
-            write_queue.put(last_frame)
-            write_queue.put(last_frame)
-        print("Detection processing thread terminated.")
-
-    def frame_writer(self, write_queue, video_path):
-        """Write processed frames to output the video file."""
-        out = None
-        try:
-            # Get first frame to determine video dimensions
-            frame = write_queue.get()
-            if frame is None:
-                print("Error: No frame available for video writer initialization")
-                return
+                best_detection = detector(frame, verbose=verbose, device=self.hardware, stream_buffer=True, conf=0.35, imgsz=imgsz, max_det=5, agnostic_nms=True, iou=0.5, int8=True)
+            qos.observe_inference(time.perf_counter() - inference_start)
 
+        except Exception as e:
+            print(f"Error in inference worker: {e}")
+
+        # Always hand the frame over, a missing frame number would stall the reorder buffer
+        return frame_number, (timestamp, frame, best_detection, None)
+
+    def count_frame(self, capture, item, worker_count):
+        """Take inference results in frame order, adapt capture settings and detect jumps."""
+        frame_number, (timestamp, frame, best_detection, skip) = item
+        frame_height, frame_width, _ = frame.shape
+
+        # Read once, a confidence changed from the options window applies from the next frame
+        model_confidence = self.model_confidence
+        if capture.pipeline.stages['count'].items == 0 and capture.start_time is not None:
+            print(f"First frame counted {time.perf_counter() - capture.start_time:.2f}s after start")
+        self.jump_stats.advance(timestamp)
+
+        # Static frames skipped the model, reuse the last detection state
+        if skip == "motion":
+            best_detection = capture.last_detection
+        elif skip is None:
+            capture.last_detection = best_detection
+            high_confidence = is_confident(best_detection, model_confidence)
+            capture.motion.set_roi(best_detection[0] if high_confidence else None, frame_width, frame_height)
+
+            # Let the rendition selector judge the current Twitch quality
+            if capture.renditions is not None:
+                capture.renditions.observe(best_detection[1] if best_detection else None,
+                                           capture.reorder_buffer.skipped + capture.source_drops)
+
+            # Feed the QoS controller of the current model with the subject size and let it adapt
+            qos = capture.detectors.qos
+            if high_confidence:
+                bbox_x1, bbox_y1, bbox_x2, bbox_y2 = best_detection[0]
+                qos.observe_bbox(bbox_y2 - bbox_y1, frame_width, frame_height)
+            if self.qos_enabled:
+                qos.update(self.qos_target_fps or capture.fps, worker_count)
+
+        # Harvest low confidence frames before any overlay is drawn on them
+        if (best_detection is not None and best_detection[1] < model_confidence
+                and self.tk_save_lowscores.get()):
+            capture.harvester.submit(frame, frame_number, *best_detection)
+
+        # The counter shown on a frame is the one before its own jump
+        counter = self.counter.value
+
+        # Check high-confidence detections for jumps, only those are drawn
+        self.jump_check(capture, best_detection, model_confidence, frame_number, timestamp)
+        if not is_confident(best_detection, model_confidence):
+            best_detection = None
+
+        return frame_number, timestamp, frame, best_detection, counter
+
+    def render_frame(self, capture, item):
+        """Draw the counter, detection and statistics overlays on a counted frame."""
+        _, _, frame, detection, counter = item
+        if detection is not None:
+            capture.trail.append(center_of(detection[0]))
+
+        draw_overlays(frame, counter, detection, capture.trail, self.release_fps(capture),
+                      capture.motion.skip_ratio if self.motion_gate.get() else None, self.device_text(capture))
+        return frame
+
+    def record_frame(self, capture, item):
+        """Log what the render stage would draw on a counted frame, for render.py."""
+        frame_number, timestamp, _, detection, counter = item
+        capture.render_log.record(frame_number, timestamp, counter, detection, self.release_fps(capture),
+                               capture.motion.skip_ratio if self.motion_gate.get() else None)
+
+    def release_fps(self, capture):
+        """Frame rate at which counted frames leave the pipeline, over the last 150 frames."""
+        # Workers finish frames concurrently, so the release rate is the real throughput
+        capture.release_times.append(time.time())
+        time_elapsed = capture.release_times[-1] - capture.release_times[0]
+        avg_fps = (len(capture.release_times) - 1) / time_elapsed if time_elapsed > 0 else 0
+        return round(avg_fps)
+
+    def device_text(self, capture):
+        """Device and model line drawn at the bottom of rendered frames."""
+        return f'Device : {self.hardware} // Model : {capture.detectors.model_path}'
+
+    def display_frame(self, capture, frame):
+        """Show a rendered frame, 'q' in the window stops the capture."""
+        # Display frame if show frame option is enabled
+        if self.tk_showframe.get():
+            cv2.imshow('Processing', frame)
+
+        # Check for 'q' key press to quit
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            print("User pressed 'q' to quit")
+            capture.stop()
+
+    def write_frame(self, capture, frame):
+        """Write a rendered frame to the output video, opening it on the first frame."""
+        if capture.video_out is None:
             frame_height, frame_width, _ = frame.shape
 
             # Setup output video file
-            video_path_out = f'{video_path}_out.mp4'
+            capture.video_path_out = f'{capture.video_path}_out.mp4'
             fourcc = cv2.VideoWriter.fourcc(*'mp4v')
-            out = cv2.VideoWriter(video_path_out, fourcc, int(self.writerfps), (frame_width, frame_height))
-
+            out = cv2.VideoWriter(capture.video_path_out, fourcc, int(capture.fps), (frame_width, frame_height))
             if not out.isOpened():
-                print(f"Error: Unable to open video writer for {video_path_out}")
-                return
-
-            print(f"Writing video to: {video_path_out}")
-
-            # Write first frame
-            out.write(frame)
-
-            # Write remaining frames
-            while self.frameloop:
-                frame = write_queue.get()
-                if frame is not None:
-                    out.write(frame)
+                raise RuntimeError(f"Unable to open video writer for {capture.video_path_out}")
 
-            print(f"Video saved successfully: {video_path_out}")
+            capture.video_out = out
+            print(f"Writing video to: {capture.video_path_out}")
 
-        except Exception as e:
-            print(f"Error in frame_writer: {e}")
+        capture.video_out.write(frame)
 
-        finally:
-            # Ensure video writer is released
-            if out is not None:
-                out.release()
-            print("Frame writer thread terminated.")
+    def close_writer(self, capture):
+        """Release the output video once every frame is written."""
+        if capture.video_out is not None:
+            capture.video_out.release()
+            capture.video_out = None
+            print(f"Video saved successfully: {capture.video_path_out}")
 
-    def cleanup_scanning(self, grabber_thread, processor_thread, writer_thread, queueref):
-        """Clean up resources after scanning completes."""
+    def cleanup_scanning(self, queueref):
+        """Reset state after scanning completes."""
         try:
             # Stop timer
             self.stop_timer()
 
-            # Wait for threads to complete
-            print("Waiting for threads to complete...")
-
-            if processor_thread and processor_thread.is_alive():
-                processor_thread.join(timeout=5)
-
-            if grabber_thread and grabber_thread.is_alive():
-                grabber_thread.join(timeout=5)
-
-            if writer_thread and writer_thread.is_alive():
-                print("Waiting for video writer to finish...")
-                writer_thread.join(timeout=10)
-
-            # Close OpenCV windows
-            cv2.destroyAllWindows()
-
-            # Reset counter trigger
-            self.counter_trigger = False
+            # Dump this capture's profile, and keep sampling for the next one while the checkbox is on
+            if self.profiler.stop() is not None and self.tk_profiler.get():
+                self.profiler.start()
 
             # Notify task completion
             self.task_queue.put(str(queueref))
@@ -1208,52 +2569,17 @@ class MyApp(tk.Tk):
             print(f"Error during cleanup: {e}")
 
     # Processing Methods
-    def jump_check(self, current_pos, bboxheight):
-        """Determine if a jump has occurred based on vertical position changes."""
-        bboxscale = int(bboxheight / self.relative_jump_threshold)
-        self.ypos.append(current_pos[1])
-
-        # Check for downward movement (landing)
-        if self.ypos[-1] > self.ypos[0] and self.counter_trigger:
-            self.counter_trigger = False
-            self.delta_counter(1)
-
-        # Check for upward movement (jumping)
-        if self.ypos[-1] < (self.ypos[0] - bboxscale):
-            self.counter_trigger = True
-
-    def trailing_dot(self, current_pos, frame):
-        """Draw trailing dots to visualize movement."""
-        self.xypos.append(current_pos)
-
-        for i in range(1, len(self.xypos)):
-            point = self.xypos[i]
-            thickness = int(10 * (i / float(len(self.xypos))))
-            cv2.circle(frame, (int(point[0] + 100), int(point[1])), 1, (0, 0, 255), thickness)
-
-    def save_lowscores(self, frame, frame_number, confidence, video_path=None):
-        """Save frames with low confidence scores for training purposes."""
-        # Determine output directory
-        if video_path is None:
-            directory_path = "Saved_Frames"
-        else:
-            directory_path = os.path.dirname(video_path)
-
-        # Create directory if it doesn't exist
-        os.makedirs(directory_path, exist_ok=True)
-
-        # Format filename with zero-padded frame number and formatted confidence
-        confidence_str = f"{confidence:.2f}"
-        filename = os.path.join(directory_path, f'lowscore_{frame_number:06d}_c-{confidence_str}.jpg')
-
-        # Save frame
-        success = cv2.imwrite(filename, frame)
-
-        if success:
-            print(f"Frame saved: {filename}")
-        else:
-            print(f"Error: Failed to save frame to {filename}")
-
+    def jump_check(self, capture, best_detection, model_confidence, frame_number, timestamp):
+        """Determine if a jump has occurred based on vertical position changes over media time."""
+        # Threshold can be changed from the options window during capture
+        capture.jump_detector.threshold = self.relative_jump_threshold
+
+        if capture.jump_detector.observe(timestamp, best_detection, model_confidence):
+            # The value this jump produced, the GUI may change the counter at the same time
+            counter = self.counter.add(1)
+            self.jump_stats.add_jump(timestamp)
+            if capture.jump_index is not None:
+                capture.jump_index.record(counter, frame_number, timestamp)
 
     # Timer Methods
     def prompt_user_time(self):
@@ -1276,14 +2602,26 @@ class MyApp(tk.Tk):
     def set_time(self, hours, minutes, seconds):
         """Set timer to specified time."""
         self.current_time = hours * 3600 + minutes * 60 + seconds
+        self.journal_time()
         self.update_display()
 
-    def update_display(self):
-        """Update timer display with current time."""
+    def journal_time(self):
+        """Journal a timer change, holding the counter so no newer jump record is overwritten."""
+        with self.counter.lock:
+            self.journal.record("T", self.counter.value, self.current_time)
+
+    def time_text(self):
+        """Current timer value as HH:MM:SS."""
         hours = self.current_time // 3600
         minutes = (self.current_time % 3600) // 60
         seconds = self.current_time % 60
-        self.time_label.config(text=f"{hours:02d}:{minutes:02d}:{seconds:02d}")
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+    def update_display(self):
+        """Update timer display with current time."""
+        time_text = self.time_text()
+        self.time_label.config(text=time_text)
+        self.publish(time=self.current_time, time_text=time_text)
 
     def start_timer(self):
         """Start the timer if not already running."""
@@ -1303,24 +2641,43 @@ class MyApp(tk.Tk):
         """Increment timer by one second and update display."""
         if self.timer_running:
             self.current_time += 1
+            self.journal_time()
             self.update_display()
 
-        # Schedule next update in 1000ms (1 second)
-        self.after(1000, self.iterate_time)
+        # Schedule the next update one second after this one was due, so callback delays do not add up
+        self.next_tick += 1
+        self.after(max(0, round((self.next_tick - time.monotonic()) * 1000)), self.iterate_time)
 
     def jumps_per_second(self):
-        """Calculate and update jumps per second display."""
-        if self.current_time > 0:
-            jumps_per_second = self.counter / self.current_time
-            self.tk_jps.set(f"{jumps_per_second:.2f}")
-        else:
-            self.tk_jps.set("0.00")
+        """Update the jump rate and statistics display from the rolling windows."""
+        stats = self.jump_stats.snapshot(self.counter.value, self.target_count)
+        self.tk_jps.set(f"{stats['jps_60s']:.2f}")
+
+        lines = [f"10s {stats['jps_10s']:.2f}  |  60s {stats['jps_60s']:.2f}  |  10m {stats['jps_600s']:.2f}"]
+        if stats['interval_p50'] is not None:
+            lines.append(f"Interval p50 {stats['interval_p50']:.2f}s  p90 {stats['interval_p90']:.2f}s"
+                         f"  |  Trend {stats['fatigue']:+.0%}")
+        if stats['eta_seconds'] is not None:
+            eta = int(stats['eta_seconds'])
+            lines.append(f"{self.target_count:,} in {eta // 3600:02d}:{eta % 3600 // 60:02d}:{eta % 60:02d}")
+        self.tk_stats.set("\n".join(lines))
+        self.publish(jps=stats['jps_60s'], stats=stats)
 
         self.after(1000, self.jumps_per_second)
 
+    def publish(self, **changes):
+        """Push changed values to overlay clients when publishing is enabled."""
+        if self.publisher is not None:
+            self.publisher.publish(**changes)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fillyBounce jump counter")
+    parser.add_argument("--profile", action="store_true", help="Run the sampling profiler from startup")
+    parser.add_argument("--twitch-url", help="Capture this stream URL instead of twitch_channel_url, e.g. hls_replay.py")
+    args = parser.parse_args()
+
     try:
-        app = MyApp()
+        app = MyApp(profile=args.profile, capture_url=args.twitch_url)
         app.mainloop()
     except KeyboardInterrupt:
         print("\nApplication interrupted by user (Ctrl+C)")
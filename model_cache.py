@@ -0,0 +1,46 @@
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+CACHE_ROOT = "Model_Cache"
+KEEP_ENTRIES = 8
+
+
+def model_hash(model_path):
+    """Hash the files a model is loaded from, an OpenVINO model is a directory."""
+    path = Path(model_path)
+    files = sorted(file for file in path.rglob('*') if file.is_file()) if path.is_dir() else [path]
+
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(file.name.encode())
+        with open(file, 'rb') as modelfile:
+            for block in iter(lambda: modelfile.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def cache_directory(model_path, device, input_shapes, root=CACHE_ROOT):
+    """Return the cache directory for a model, runtime version, device and the input shapes it is compiled at."""
+    import openvino as ov
+
+    shapes = ",".join("x".join(map(str, shape)) for shape in input_shapes)
+    key = "|".join([model_hash(model_path), ov.get_version(), device, shapes])
+    directory_path = os.path.join(root, hashlib.sha256(key.encode()).hexdigest()[:16])
+    os.makedirs(directory_path, exist_ok=True)
+
+    # The directory time marks the last use, stale entries are pruned first
+    os.utime(directory_path)
+    prune(root, KEEP_ENTRIES)
+    return directory_path
+
+def prune(root, keep):
+    """Delete all but the `keep` most recently used cache entries."""
+    entries = sorted((os.path.join(root, name) for name in os.listdir(root)),
+                     key=os.path.getmtime, reverse=True)
+    for directory_path in entries[keep:]:
+        shutil.rmtree(directory_path, ignore_errors=True)
+
+def is_cached(directory_path):
+    """True if the directory already holds compiled blobs."""
+    return any(name.endswith('.blob') for name in os.listdir(directory_path))
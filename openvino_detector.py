@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import cv2
+
+from top_detection import scale_box, top_box
+
+LETTERBOX_COLOR = (114, 114, 114)
+
+
+def letterbox(frame, size):
+    """Resize a frame keeping its aspect ratio and pad it to a centered size x size square, as ultralytics does."""
+    frame_height, frame_width = frame.shape[:2]
+    gain = min(size / frame_height, size / frame_width)
+    new_width, new_height = round(frame_width * gain), round(frame_height * gain)
+    if (new_width, new_height) != (frame_width, frame_height):
+        frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+    pad_x, pad_y = (size - new_width) / 2, (size - new_height) / 2
+    return cv2.copyMakeBorder(frame, round(pad_y - 0.1), round(pad_y + 0.1), round(pad_x - 0.1), round(pad_x + 0.1),
+                              cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR)
+
+
+class OpenVinoDetector:
+    """Best-box detector on an OpenVINO export that needs only NumPy, OpenCV and OpenVINO.
+
+    The CPU counterpart of TopDetector without ultralytics: frames are
+    letterboxed as ultralytics does, the compiled model runs on them and the
+    most confident box is read from the raw output. Torch is never imported,
+    which saves its import time and memory on CPU-only machines.
+
+    Models are compiled on first use at each input size, through the on-disk
+    cache once cache_to() is given a directory. Each inference worker owns an
+    instance.
+    """
+
+    DEFAULT_SIZE = 640
+
+    def __init__(self, model_path, threads=None):
+        import openvino as ov
+
+        self.xml_path = next(Path(model_path).glob('*.xml'))
+        self.threads = threads
+        self.core = ov.Core()
+        self.model = self.core.read_model(self.xml_path)
+        self.compiled = {}
+
+    def input_sizes(self, candidate_sizes):
+        """Return the input sizes the export accepts, only its export size when its shape is static."""
+        shape = self.model.inputs[0].get_partial_shape()
+        if shape.is_static:
+            return [shape[2].get_length()]
+        return sorted(candidate_sizes)
+
+    def cache_to(self, directory_path):
+        """Compile through the cache in this directory, a cache hit loads the compiled blob instead."""
+        self.core.set_property({"CACHE_DIR": directory_path})
+
+    def compile(self, size):
+        """Compile the model for a size x size input."""
+        model = self.model
+        if not model.inputs[0].get_partial_shape().is_static:
+            model = model.clone()
+            model.reshape([1, 3, size, size])
+
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if self.threads:
+            config["INFERENCE_NUM_THREADS"] = self.threads
+        self.compiled[size] = self.core.compile_model(model, "CPU", config)
+
+    def __call__(self, frame, verbose=False, conf=0.25, imgsz=None, **predict_args):
+        """Detect on a frame and return ((x1, y1, x2, y2), confidence) of the best box, or None.
+
+        Accepts the app's ultralytics predict arguments, only `conf` and `imgsz` apply.
+        """
+        size = imgsz or self.input_sizes([self.DEFAULT_SIZE])[0]
+        if size not in self.compiled:
+            self.compile(size)
+
+        image = letterbox(frame, size)
+        blob = cv2.dnn.blobFromImage(image, 1 / 255, swapRB=True)
+        preds = self.compiled[size](blob)[0]
+
+        box = top_box(preds, conf)
+        if box is None:
+            return None
+        bbox = scale_box(box[:4], blob.shape[2:], frame.shape)
+        return tuple(int(value) for value in bbox), box[4]
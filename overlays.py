@@ -0,0 +1,72 @@
+import cv2
+
+
+def center_of(bbox):
+    """Center point of an (x1, y1, x2, y2) box."""
+    bbox_x1, bbox_y1, bbox_x2, bbox_y2 = bbox
+    return int((bbox_x1 + bbox_x2) / 2), int((bbox_y1 + bbox_y2) / 2)
+
+def draw_trail(frame, points):
+    """Draw trailing dots to visualize movement, newest points thickest."""
+    for i in range(1, len(points)):
+        point = points[i]
+        thickness = int(10 * (i / float(len(points))))
+        cv2.circle(frame, (int(point[0] + 100), int(point[1])), 1, (0, 0, 255), thickness)
+
+def draw_overlays(frame, counter, detection, trail, fps, skipped, device_text):
+    """Draw the capture overlays on a frame in place.
+
+    `detection` is the ((x1, y1, x2, y2), confidence) drawn on this frame or
+    None, `trail` the recent detection centers including this one and
+    `skipped` the motion gate skip ratio, or None when the gate is off. Both
+    the live render stage and render.py draw through here so their output
+    is identical.
+    """
+    frame_height, frame_width, _ = frame.shape
+
+    # Draw counter overlay on frame
+    counter_text = str(counter).zfill(2)
+    counter_bg_x1 = int(0.5 * frame_width)
+    counter_bg_y1 = int(0.064 * frame_height)
+    counter_bg_x2 = int(0.628 * frame_width)
+    counter_bg_y2 = int(0.098 * frame_height)
+    cv2.rectangle(frame, (counter_bg_x1, counter_bg_y1),
+                  (counter_bg_x2, counter_bg_y2), (0, 0, 0), -1)
+
+    counter_text_x = int(0.5 * frame_width)
+    counter_text_y = int(0.1 * frame_height)
+    cv2.putText(frame, f'Counter: {counter_text}', (counter_text_x, counter_text_y),
+                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+
+    # Display Model used
+    model_text_x = int(0.02 * frame_width)
+    model_text_y = int(0.98 * frame_height)
+    cv2.putText(frame, device_text, (model_text_x, model_text_y),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+
+    if detection is not None:
+        (bbox_x1, bbox_y1, bbox_x2, bbox_y2), confidence = detection
+
+        # Draw bounding box
+        cv2.rectangle(frame, (bbox_x1, bbox_y1), (bbox_x2, bbox_y2),
+                      (0, 255, 0), 4)
+
+        # Draw confidence label
+        label_text = f'Filian[{round(confidence, 1)}]'
+        label_y = bbox_y1 - 10
+        cv2.putText(frame, label_text, (bbox_x1, label_y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.3, (0, 255, 0), 3, cv2.LINE_AA)
+
+        # Draw trail
+        draw_trail(frame, trail)
+
+    # Draw FPS overlay on frame
+    fps_text_x = int(0.02 * frame_width)
+    fps_text_y = int(0.1 * frame_height)
+    cv2.putText(frame, f'FPS: {fps}', (fps_text_x, fps_text_y),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
+
+    # Draw share of frames the motion gate kept away from the model
+    if skipped is not None:
+        cv2.putText(frame, f'Skipped: {skipped:.0%}', (fps_text_x, fps_text_y + 35),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
@@ -0,0 +1,361 @@
+import threading
+import time
+from collections import deque
+
+
+class EndOfStream:
+    """Marker a channel returns once every producer has closed it and it is drained."""
+
+    def __repr__(self):
+        return "END_OF_STREAM"
+
+END_OF_STREAM = EndOfStream()
+
+
+class PipelineCancelled(Exception):
+    """Raised inside stages when the pipeline is cancelled."""
+
+class PipelineError(Exception):
+    """A stage failed, the pipeline was cancelled because of it."""
+
+    def __init__(self, stage, error):
+        super().__init__(f"stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Channel:
+    """Bounded FIFO between stages.
+
+    `put` blocks while the channel is full, which is the backpressure between
+    stages. Every producing stage closes the channel once, after the last
+    close consumers drain what is left and then receive END_OF_STREAM.
+    Cancellation wakes every waiting producer and consumer.
+    """
+
+    def __init__(self, name, capacity):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.items = deque()
+        self.producers = 0
+        self.max_depth = 0
+        self.cancelled = threading.Event()
+        self.condition = threading.Condition()
+
+    @property
+    def depth(self):
+        """Number of items waiting in the channel."""
+        return len(self.items)
+
+    def add_producer(self, count=1):
+        """Register producers, the channel ends when each of them has closed it."""
+        with self.condition:
+            self.producers += count
+
+    def put(self, item):
+        """Add an item, blocking while the channel is full."""
+        with self.condition:
+            while len(self.items) >= self.capacity and not self.cancelled.is_set():
+                self.condition.wait(0.1)
+            if self.cancelled.is_set():
+                raise PipelineCancelled()
+
+            self.items.append(item)
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.condition.notify_all()
+
+    def get(self):
+        """Return the next item, or END_OF_STREAM once all producers closed and the channel is drained."""
+        with self.condition:
+            while not self.items and self.producers > 0 and not self.cancelled.is_set():
+                self.condition.wait(0.1)
+            if self.cancelled.is_set():
+                raise PipelineCancelled()
+
+            if not self.items:
+                return END_OF_STREAM
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        """Signal that one producing stage is done."""
+        with self.condition:
+            self.producers -= 1
+            self.condition.notify_all()
+
+    def wake(self):
+        """Wake every waiting thread so it can see the cancellation."""
+        with self.condition:
+            self.condition.notify_all()
+
+class AtomicCounter:
+    """Integer shared between stages and the GUI thread.
+
+    `value += 1` is a read, an add and a write, which free-threaded Python
+    interleaves across threads, so every change goes through the lock.
+    `on_change` runs under the lock with the new value, so changes are
+    journaled and published in the order they were made. Hold `lock` to
+    read the value together with other state.
+    """
+
+    def __init__(self, value=0, on_change=None):
+        self.value = value
+        self.on_change = on_change
+        self.lock = threading.RLock()
+
+    def add(self, delta):
+        """Add `delta` and return the new value, or None if it would go negative."""
+        with self.lock:
+            if self.value + delta < 0:
+                return None
+            return self.set(self.value + delta)
+
+    def set(self, value):
+        """Set the value and return it."""
+        with self.lock:
+            self.value = value
+            if self.on_change is not None:
+                self.on_change(value)
+            return value
+
+class Stage:
+    """One step of a pipeline, run by one or more worker threads.
+
+    A source stage has no input: its function is called without arguments and
+    returns an iterable of items. Any other stage calls its function for every
+    item of its input channel, a result other than None is put on every output
+    channel. `function` may be a list with one callable per worker when workers
+    hold their own state, such as a model instance.
+    """
+
+    def __init__(self, pipeline, name, function, input=None, outputs=(), workers=1, on_start=None, on_finish=None):
+        self.pipeline = pipeline
+        self.name = name
+        self.functions = function if isinstance(function, list) else [function] * workers
+        self.input = input
+        self.outputs = list(outputs)
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.threads = []
+        self.running = 0
+        self.lock = threading.Lock()
+
+        # Metrics, one slot per worker so workers never update the same counter
+        self.worker_items = [0] * len(self.functions)
+        self.worker_busy = [0.0] * len(self.functions)
+        self.worker_starved = [0.0] * len(self.functions)
+        self.worker_blocked = [0.0] * len(self.functions)
+
+        for channel in self.outputs:
+            channel.add_producer()
+
+    @property
+    def workers(self):
+        return len(self.functions)
+
+    @property
+    def items(self):
+        """Items taken from the input, or produced by a source."""
+        return sum(self.worker_items)
+
+    @property
+    def busy(self):
+        """Seconds spent in the stage function."""
+        return sum(self.worker_busy)
+
+    @property
+    def starved(self):
+        """Seconds spent waiting for input."""
+        return sum(self.worker_starved)
+
+    @property
+    def blocked(self):
+        """Seconds spent waiting for room in an output channel."""
+        return sum(self.worker_blocked)
+
+    def start(self):
+        """Start the worker threads."""
+        self.running = self.workers
+        for worker_number in range(self.workers):
+            name = self.name if self.workers == 1 else f"{self.name}-{worker_number}"
+            thread = threading.Thread(target=self.run, args=(worker_number,), daemon=True, name=name)
+            thread.start()
+            self.threads.append(thread)
+
+    def run(self, worker_number):
+        """Worker loop: pull, process, push until end of stream, cancellation or error."""
+        function = self.functions[worker_number]
+        try:
+            if self.on_start is not None:
+                self.on_start(worker_number)
+
+            if self.input is None:
+                self.run_source(function, worker_number)
+            else:
+                while True:
+                    wait_start = time.perf_counter()
+                    item = self.input.get()
+                    self.worker_starved[worker_number] += time.perf_counter() - wait_start
+                    if item is END_OF_STREAM:
+                        break
+
+                    busy_start = time.perf_counter()
+                    result = function(item)
+                    self.worker_busy[worker_number] += time.perf_counter() - busy_start
+                    self.worker_items[worker_number] += 1
+                    if result is not None:
+                        self.emit(result, worker_number)
+        except PipelineCancelled:
+            pass
+        except Exception as e:
+            self.pipeline.fail(self.name, e)
+        finally:
+            self.finish_worker()
+
+    def run_source(self, function, worker_number):
+        """Pull items from a source iterable until it ends or the pipeline stops."""
+        iterator = iter(function())
+        try:
+            while not self.pipeline.stopping.is_set():
+                busy_start = time.perf_counter()
+                item = next(iterator, END_OF_STREAM)
+                self.worker_busy[worker_number] += time.perf_counter() - busy_start
+                if item is END_OF_STREAM:
+                    break
+                self.worker_items[worker_number] += 1
+                self.emit(item, worker_number)
+        finally:
+            # Lets a generator source release its resources
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    def emit(self, item, worker_number):
+        """Put a result on every output channel, timing the backpressure."""
+        blocked_start = time.perf_counter()
+        for channel in self.outputs:
+            channel.put(item)
+        self.worker_blocked[worker_number] += time.perf_counter() - blocked_start
+
+    def finish_worker(self):
+        """Close the outputs once the last worker of the stage is done."""
+        with self.lock:
+            self.running -= 1
+            last = self.running == 0
+        if not last:
+            return
+
+        try:
+            if self.on_finish is not None:
+                self.on_finish()
+        except Exception as e:
+            self.pipeline.fail(self.name, e)
+        finally:
+            for channel in self.outputs:
+                channel.close()
+
+class Pipeline:
+    """Stages joined by bounded channels, run until every stage has finished.
+
+    `stop` ends the sources and lets every later stage drain what is in flight,
+    so no frame is lost. `cancel` abandons in-flight items. The first stage
+    error cancels the pipeline and is raised from `run` as a PipelineError.
+    """
+
+    def __init__(self):
+        self.channels = {}
+        self.stages = {}
+        self.stopping = threading.Event()
+        self.cancelled = threading.Event()
+        self.error = None
+        self.lock = threading.Lock()
+        self.start_time = None
+        self.elapsed = 0.0
+
+    def add_channel(self, channel):
+        """Register a channel, custom channels must subclass Channel."""
+        channel.cancelled = self.cancelled
+        self.channels[channel.name] = channel
+        return channel
+
+    def channel(self, name, capacity):
+        """Create and register a bounded FIFO channel."""
+        return self.add_channel(Channel(name, capacity))
+
+    def stage(self, name, function, input=None, outputs=(), workers=1, on_start=None, on_finish=None):
+        """Create and register a stage, see Stage for the arguments."""
+        stage = Stage(self, name, function, input, outputs, workers, on_start, on_finish)
+        self.stages[name] = stage
+        return stage
+
+    def run(self):
+        """Run every stage and block until all have finished, raising the first stage error."""
+        self.start_time = time.perf_counter()
+        for stage in self.stages.values():
+            stage.start()
+        for stage in self.stages.values():
+            for thread in stage.threads:
+                thread.join()
+        self.elapsed = time.perf_counter() - self.start_time
+
+        if self.error is not None:
+            raise self.error
+
+    def join(self, timeout=None):
+        """Wait up to `timeout` seconds for every stage to finish, return True if they all have."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for stage in self.stages.values():
+            for thread in stage.threads:
+                thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not self.running
+
+    def stop(self):
+        """End the sources, everything already in flight is still processed."""
+        self.stopping.set()
+
+    def cancel(self):
+        """Abandon all work and wake every waiting stage."""
+        self.stopping.set()
+        self.cancelled.set()
+        for channel in self.channels.values():
+            channel.wake()
+
+    def fail(self, stage, error):
+        """Record the first stage error and cancel the pipeline."""
+        with self.lock:
+            if self.error is None:
+                self.error = PipelineError(stage, error)
+                print(f"Pipeline {self.error}")
+        self.cancel()
+
+    @property
+    def running(self):
+        """True from run until every stage has finished."""
+        return any(thread.is_alive() for stage in self.stages.values() for thread in stage.threads)
+
+    def metrics(self):
+        """Return per-stage and per-channel counters."""
+        return {
+            'stages': {name: {'workers': stage.workers, 'items': stage.items, 'busy': stage.busy,
+                              'starved': stage.starved, 'blocked': stage.blocked}
+                       for name, stage in self.stages.items()},
+            'channels': {name: {'capacity': channel.capacity, 'depth': channel.depth,
+                                'max_depth': channel.max_depth}
+                         for name, channel in self.channels.items()},
+        }
+
+    def report(self):
+        """Format the metrics as a table. Busy, starved and blocked are shares of worker time."""
+        elapsed = self.elapsed or (time.perf_counter() - self.start_time if self.start_time else 0.0)
+        lines = [f"{'Stage':<12} {'Workers':>7} {'Items':>8} {'Items/s':>8} {'Busy':>6} {'Starved':>8} {'Blocked':>8}"]
+        for name, stage in self.stages.items():
+            worker_time = elapsed * stage.workers or 1.0
+            lines.append(f"{name:<12} {stage.workers:>7} {stage.items:>8} {stage.items / (elapsed or 1.0):>8.1f} "
+                         f"{stage.busy / worker_time:>6.0%} {stage.starved / worker_time:>8.0%} "
+                         f"{stage.blocked / worker_time:>8.0%}")
+
+        lines.append(f"{'Channel':<12} {'Capacity':>8} {'Max depth':>10}")
+        for name, channel in self.channels.items():
+            lines.append(f"{name:<12} {channel.capacity:>8} {channel.max_depth:>10}")
+        return "\n".join(lines)
@@ -0,0 +1,136 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import psutil
+
+
+class SamplingProfiler:
+    """Low-overhead sampling profiler for all running threads.
+
+    A daemon thread snapshots every thread's Python stack at a fixed interval
+    and counts identical stacks, so the cost per sample is one stack walk per
+    thread. Per-thread CPU time is read from the OS about once a second. When
+    capture stops it writes collapsed stacks, ready for flamegraph.pl or
+    speedscope, and a per-thread and per-function summary.
+    """
+
+    def __init__(self, interval, output_dir="Profiles"):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.stacks = Counter()
+        self.samples = 0
+        self.running = False
+        self.thread = None
+        self.start_time = None
+        self.start_cpu = {}
+        self.end_cpu = {}
+        self.thread_names = {}
+
+    def start(self):
+        """Start sampling in the background."""
+        if self.running:
+            return
+
+        self.stacks.clear()
+        self.samples = 0
+        self.running = True
+        self.start_time = time.monotonic()
+        self.thread_names.clear()
+        self.start_cpu = self.thread_cpu_times()
+        self.end_cpu = dict(self.start_cpu)
+        self.thread = threading.Thread(target=self.run, daemon=True, name="SamplingProfiler")
+        self.thread.start()
+        print(f"Profiler started, sampling every {self.interval * 1000:.0f} ms")
+
+    def run(self):
+        """Sample stacks until stopped."""
+        own_ident = threading.get_ident()
+        next_sample = time.monotonic()
+        next_cpu_read = next_sample + 1.0
+
+        while self.running:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+            # Keep the last CPU time of threads that may exit before capture stops
+            if time.monotonic() >= next_cpu_read:
+                self.end_cpu.update(self.thread_cpu_times())
+                next_cpu_read += 1.0
+
+            # Sleep to the next slot so sampling does not drift with its own cost
+            next_sample += self.interval
+            time.sleep(max(0.0, next_sample - time.monotonic()))
+
+    def thread_cpu_times(self):
+        """Return CPU seconds used so far by each live thread, keyed by OS thread id."""
+        # Names like infer-0 are reused by every capture, so they are only remembered for reporting
+        self.thread_names.update((thread.native_id, thread.name) for thread in threading.enumerate())
+        return {thread.id: thread.user_time + thread.system_time for thread in psutil.Process().threads()}
+
+    def stop(self):
+        """Stop sampling and write the collapsed stacks and summary. Returns the summary path."""
+        if not self.running:
+            return None
+
+        self.running = False
+        self.thread.join(timeout=5)
+        elapsed = time.monotonic() - self.start_time
+        self.end_cpu.update(self.thread_cpu_times())
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = os.path.join(self.output_dir, f"profile_{time.strftime('%Y%m%d-%H%M%S')}")
+
+        # One line per unique stack: frames joined by ';' and the sample count
+        with open(f"{name}.collapsed", 'w') as collapsedfile:
+            for stack, count in self.stacks.most_common():
+                collapsedfile.write(f"{';'.join(stack)} {count}\n")
+
+        with open(f"{name}.txt", 'w') as summaryfile:
+            summaryfile.write(self.summary(elapsed))
+
+        print(f"Profiler stopped after {self.samples} samples. Saved: {name}.collapsed, {name}.txt")
+        return f"{name}.txt"
+
+    def summary(self, elapsed):
+        """Build the per-thread CPU and per-function sample summary."""
+        lines = [f"Capture: {elapsed:.1f}s, {self.samples} samples every {self.interval * 1000:.0f} ms", "",
+                 "Thread CPU time:"]
+        used_cpu = {native_id: cpu_time - self.start_cpu.get(native_id, 0.0)
+                    for native_id, cpu_time in self.end_cpu.items()}
+        name_counts = Counter(self.thread_names.get(native_id, str(native_id)) for native_id in used_cpu)
+        for native_id, used in sorted(used_cpu.items(), key=lambda item: -item[1]):
+            thread_name = self.thread_names.get(native_id, str(native_id))
+            if name_counts[thread_name] > 1:
+                thread_name = f"{thread_name} ({native_id})"
+            lines.append(f"  {thread_name:<28} {used:8.2f}s  {used / elapsed:6.1%} of one core")
+
+        # Self samples count only the innermost frame, total samples count every frame on the stack once
+        own_samples = Counter()
+        total_samples = Counter()
+        for stack, count in self.stacks.items():
+            functions = stack[1:]
+            if functions:
+                own_samples[functions[-1]] += count
+            for function in set(functions):
+                total_samples[function] += count
+
+        sample_count = sum(self.stacks.values()) or 1
+        lines += ["", f"{'Self':>7} {'Total':>7}  Function"]
+        for function, count in own_samples.most_common(40):
+            lines.append(f"{count / sample_count:7.1%} {total_samples[function] / sample_count:7.1%}  {function}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OVERLAY_PAGE = b"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<style>
+  body { margin: 0; background: transparent; font-family: Arial, sans-serif; color: #e89c7b; }
+  #counter { font-size: 96px; font-weight: bold; text-shadow: 0 0 8px #2D1C3A; }
+  #details { font-size: 28px; color: #E3CECF; text-shadow: 0 0 6px #2D1C3A; }
+</style>
+</head>
+<body>
+<div id="counter">0</div>
+<div id="details"></div>
+<script>
+  const events = new EventSource("/events");
+  events.onmessage = (event) => {
+    const state = JSON.parse(event.data);
+    // Fields not published yet show their starting values
+    const counter = state.counter ?? 0;
+    const timeText = state.time_text ?? "00:00:00";
+    const jps = state.jps ?? 0;
+    document.getElementById("counter").textContent = counter.toLocaleString();
+    document.getElementById("details").textContent = `${timeText}  |  ${jps.toFixed(2)} jumps/s`;
+  };
+</script>
+</body>
+</html>
+"""
+
+
+class PublishHandler(BaseHTTPRequestHandler):
+    """Serve the overlay page, the current state as JSON and a server-sent event stream."""
+
+    def do_GET(self):
+        publisher = self.server.publisher
+        if self.path == "/events":
+            self.stream_events(publisher)
+        elif self.path == "/state":
+            _, state = publisher.snapshot()
+            self.send_body(json.dumps(state).encode(), "application/json")
+        elif self.path in ("/", "/overlay"):
+            self.send_body(OVERLAY_PAGE, "text/html; charset=utf-8")
+        else:
+            self.send_error(404)
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_events(self, publisher):
+        """Push every state change, coalesced to at most one event per min_interval."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+
+        version = -1
+        try:
+            while publisher.running:
+                new_version, state = publisher.wait_for_update(version, timeout=15)
+                if new_version == version:
+                    # Keep-alive comment, also detects clients that went away
+                    self.wfile.write(b": keepalive\n\n")
+                else:
+                    version = new_version
+                    self.wfile.write(f"data: {json.dumps(state)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(publisher.min_interval)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        # Overlay clients reconnect often, request logs would flood the console
+        pass
+
+class CounterPublisher:
+    """Publish counter, jump rate and timer changes to local overlay clients.
+
+    Changes are pushed over server-sent events from a small HTTP server, and
+    the latest state is mirrored to a JSON file replaced atomically. Each
+    consumer sends at most one update per `min_interval`, so a burst of
+    changes collapses into a single event carrying the newest state.
+    """
+
+    def __init__(self, port, state_file, min_interval):
+        self.state_file = state_file
+        self.min_interval = min_interval
+        self.state = {}
+        self.version = 0
+        self.running = True
+        self.condition = threading.Condition()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), PublishHandler)
+        self.server.daemon_threads = True
+        self.server.publisher = self
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="PublishServer").start()
+        threading.Thread(target=self.write_state_file, daemon=True, name="PublishStateFile").start()
+        print(f"Publishing counter on http://127.0.0.1:{port}/ (events: /events, state: /state)")
+
+    def publish(self, **changes):
+        """Merge changed values into the state and wake the consumers. Cheap enough to call per jump."""
+        with self.condition:
+            self.state.update(changes)
+            self.version += 1
+            self.condition.notify_all()
+
+    def snapshot(self):
+        """Return the current version and a copy of the state."""
+        with self.condition:
+            return self.version, dict(self.state)
+
+    def wait_for_update(self, version, timeout):
+        """Block until the state is newer than `version` or the timeout passes."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version or not self.running, timeout)
+            return self.version, dict(self.state)
+
+    def write_state_file(self):
+        """Mirror the newest state to disk, replacing the file so readers never see a partial write."""
+        version = 0
+        temp_path = f"{self.state_file}.tmp"
+        while self.running:
+            new_version, state = self.wait_for_update(version, timeout=1)
+            if new_version == version:
+                continue
+
+            version = new_version
+            try:
+                with open(temp_path, 'w') as statefile:
+                    json.dump(state, statefile)
+                os.replace(temp_path, self.state_file)
+            except OSError as e:
+                print(f"Error writing publish state file: {e}")
+            time.sleep(self.min_interval)
+
+    def close(self):
+        """Stop the server and the state file writer."""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
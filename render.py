@@ -0,0 +1,174 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from overlays import center_of, draw_overlays
+
+FIELDS = ["frame", "timestamp", "counter", "x1", "y1", "x2", "y2", "confidence", "fps", "skipped"]
+TRAIL_LENGTH = 10
+
+
+class RenderLog:
+    """Per-frame record of what the render stage would draw, written by the detection pass.
+
+    render.py replays it over the source video, so annotating is moved out of
+    the detection pass and can run later on all cores.
+    """
+
+    def __init__(self, video_path):
+        self.path = f'{video_path}_render.csv'
+        self.meta_path = f'{video_path}_render.json'
+        self.file = open(self.path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(FIELDS)
+
+    def record(self, frame_number, timestamp, counter, detection, fps, skipped):
+        """Append one counted frame. `detection` is the box drawn on it, or None."""
+        box = list(detection[0]) + [f"{detection[1]:.4f}"] if detection is not None else [""] * 5
+        self.writer.writerow([frame_number, f"{timestamp:.3f}", counter, *box, fps,
+                              "" if skipped is None else f"{skipped:.4f}"])
+
+    def close(self, fps, device_text):
+        """Close the log and store what the renderer needs besides the frames."""
+        self.file.close()
+        with open(self.meta_path, 'w') as metafile:
+            json.dump({'fps': fps, 'device_text': device_text}, metafile)
+        print(f"Render log saved: {self.path}")
+
+def load_render_log(video_path):
+    """Return the render metadata and the logged frames as dicts, in frame order."""
+    with open(f'{video_path}_render.json') as metafile:
+        meta = json.load(metafile)
+
+    frames = []
+    with open(f'{video_path}_render.csv', newline='') as logfile:
+        for row in csv.DictReader(logfile):
+            detection = None
+            if row['confidence']:
+                detection = ((int(row['x1']), int(row['y1']), int(row['x2']), int(row['y2'])),
+                             float(row['confidence']))
+            frames.append({
+                'frame': int(row['frame']),
+                'counter': int(row['counter']),
+                'detection': detection,
+                'fps': int(row['fps']),
+                'skipped': float(row['skipped']) if row['skipped'] else None,
+            })
+    return meta, frames
+
+def split_segments(frames, count):
+    """Split the logged frames into contiguous segments, each with the trail it starts with."""
+    size = -(-len(frames) // count)
+    segments = []
+    trail = deque(maxlen=TRAIL_LENGTH)
+    for start in range(0, len(frames), size):
+        segments.append((frames[start:start + size], list(trail)))
+        for frame in frames[start:start + size]:
+            if frame['detection'] is not None:
+                trail.append(center_of(frame['detection'][0]))
+    return segments
+
+def render_segment(video_path, frames, trail, meta, part_path):
+    """Decode one segment of the source, draw the logged overlays and encode it. Returns frames written."""
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frames[0]['frame'])
+    position = frames[0]['frame']
+    trail = deque(trail, maxlen=TRAIL_LENGTH)
+    out = None
+    written = 0
+    try:
+        for logged in frames:
+            # Frames the detection pass dropped are left out, as in single-pass output
+            while position < logged['frame']:
+                cap.grab()
+                position += 1
+
+            ret, frame = cap.read()
+            position += 1
+            if not ret:
+                print(f"Source ended early at frame {logged['frame']}")
+                break
+
+            if out is None:
+                frame_height, frame_width, _ = frame.shape
+                out = cv2.VideoWriter(part_path, cv2.VideoWriter.fourcc(*'mp4v'), int(meta['fps']),
+                                      (frame_width, frame_height))
+
+            if logged['detection'] is not None:
+                trail.append(center_of(logged['detection'][0]))
+            draw_overlays(frame, logged['counter'], logged['detection'], trail, logged['fps'],
+                          logged['skipped'], meta['device_text'])
+            out.write(frame)
+            written += 1
+    finally:
+        cap.release()
+        if out is not None:
+            out.release()
+    return written
+
+def concatenate(part_paths, output_path, fps):
+    """Join the segments, stream copy with ffmpeg when available, else decode and re-encode with OpenCV."""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is not None:
+        list_path = f'{output_path}.parts.txt'
+        with open(list_path, 'w') as listfile:
+            for part_path in part_paths:
+                listfile.write(f"file '{os.path.abspath(part_path)}'\n")
+        try:
+            subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                            '-i', list_path, '-c', 'copy', output_path], check=True)
+            return
+        finally:
+            os.remove(list_path)
+
+    out = None
+    for part_path in part_paths:
+        cap = cv2.VideoCapture(part_path)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if out is None:
+                frame_height, frame_width, _ = frame.shape
+                out = cv2.VideoWriter(output_path, cv2.VideoWriter.fourcc(*'mp4v'), int(fps),
+                                      (frame_width, frame_height))
+            out.write(frame)
+        cap.release()
+    if out is not None:
+        out.release()
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the annotated video of a two-pass detection run.")
+    parser.add_argument("video", help="Source video the detection pass ran on")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel render processes")
+    parser.add_argument("--output", help="Output video (default: <video>_out.mp4)")
+    args = parser.parse_args()
+
+    meta, frames = load_render_log(args.video)
+    if not frames:
+        exit(f"No frames logged for {args.video}")
+    output_path = args.output or f'{args.video}_out.mp4'
+    segments = split_segments(frames, max(1, args.workers))
+    print(f"Rendering {len(frames)} frame(s) in {len(segments)} segment(s)...")
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as temp_dir:
+        part_paths = [os.path.join(temp_dir, f"part_{i:03d}.mp4") for i in range(len(segments))]
+        with ProcessPoolExecutor(max_workers=len(segments)) as executor:
+            futures = [executor.submit(render_segment, args.video, segment_frames, trail, meta, part_path)
+                       for (segment_frames, trail), part_path in zip(segments, part_paths)]
+            written = sum(future.result() for future in futures)
+
+        concatenate(part_paths, output_path, meta['fps'])
+
+    print(f"Video saved successfully: {output_path} ({written} frame(s))")
+
+if __name__ == "__main__":
+    main()
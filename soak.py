@@ -0,0 +1,436 @@
+import argparse
+import configparser
+import csv
+import functools
+import math
+import os
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+import psutil
+
+from jump_detector import JumpDetector
+from main import (CONFIG_FILE, CaptureState, CounterJournal, DetectorSet, JumpStats, MotionGate, MyApp, QosController,
+                  ReorderBuffer)
+from pipeline import AtomicCounter, Pipeline, PipelineError
+
+
+class Setting:
+    """Stand-in for a Tk variable, the stages only read it."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+class SyntheticSource:
+    """A subject hopping once at the start of every `period` seconds, drawn on a black frame.
+
+    Each hop is one loop, so every loop must add exactly one jump.
+    """
+
+    SUBJECT_SIZE = (60, 80)
+    HOP_HEIGHT = 100
+    AIRTIME = 0.5
+
+    def __init__(self, fps, period, frame_shape):
+        self.fps = fps
+        self.loop_frames = round(period * fps)
+        self.jumps_per_loop = 1
+        self.frame_shape = frame_shape
+
+    def draw(self, index):
+        """Draw the frame `index` frames into a hop, a new array every time as a decoder returns."""
+        frame = np.zeros(self.frame_shape, dtype=np.uint8)
+        frame_height, frame_width, _ = self.frame_shape
+        subject_width, subject_height = self.SUBJECT_SIZE
+        seconds = index / self.fps
+        lift = 4 * self.HOP_HEIGHT * seconds / self.AIRTIME * (1 - seconds / self.AIRTIME) if seconds < self.AIRTIME else 0
+
+        x1 = (frame_width - subject_width) // 2
+        y2 = int(frame_height * 0.8 - lift)
+        cv2.rectangle(frame, (x1, y2 - subject_height), (x1 + subject_width, y2), (255, 255, 255), -1)
+        return frame
+
+    def frames(self, loops):
+        """Yield (frame_number, timestamp, frame) for `loops` hops."""
+        for frame_number in range(loops * self.loop_frames):
+            yield frame_number, frame_number / self.fps, self.draw(frame_number % self.loop_frames)
+
+class LoopedVideo:
+    """A recording played back to back, media time carrying on across loops.
+
+    Every loop yields the frame count the container reports, repeating the
+    last frame if the decoder ends early, so loops line up with frame numbers.
+    The jumps of the first loop are what every later loop must add.
+    """
+
+    def __init__(self, video_path):
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise RuntimeError(f"Unable to open video: {video_path}")
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.loop_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if self.loop_frames <= 0:
+            raise RuntimeError(f"Unable to count the frames of {video_path}")
+
+        self.video_path = video_path
+        self.jumps_per_loop = None
+
+    def frames(self, loops):
+        """Yield (frame_number, timestamp, frame) for `loops` plays of the video."""
+        frame_number = 0
+        for _ in range(loops):
+            cap = cv2.VideoCapture(self.video_path)
+            frame = None
+            try:
+                for _ in range(self.loop_frames):
+                    ret, next_frame = cap.read()
+                    if ret and next_frame is not None:
+                        frame = next_frame
+                    elif frame is None:
+                        raise RuntimeError(f"No frames read from {self.video_path}")
+                    else:
+                        # Overlays are drawn in place, a repeated frame needs its own copy
+                        next_frame = frame.copy()
+                    yield frame_number, frame_number / self.fps, next_frame
+                    frame_number += 1
+            finally:
+                cap.release()
+
+class SyntheticDetector:
+    """Finds the synthetic subject by its pixels, a model stand-in that costs almost nothing."""
+
+    def __call__(self, frame, verbose=False, **predict_args):
+        points = cv2.findNonZero(cv2.extractChannel(frame, 0))
+        if points is None:
+            return None
+        x, y, width, height = cv2.boundingRect(points)
+        return (x, y, x + width, y + height), 0.9
+
+class SoakApp:
+    """The capture stages of MyApp, run without a window on a soak source.
+
+    The stage methods are MyApp's own, so the soak covers the code a capture
+    runs; only the source, the sink and the Tk timer are stand-ins. The count
+    stage also checks that every loop of the source adds the jumps it should.
+    """
+
+    preprocess_frame = MyApp.preprocess_frame
+    frame_skip_reason = MyApp.frame_skip_reason
+    infer_frame = MyApp.infer_frame
+    count_frame = MyApp.count_frame
+    render_frame = MyApp.render_frame
+    release_fps = MyApp.release_fps
+    device_text = MyApp.device_text
+    jump_check = MyApp.jump_check
+    counter_changed = MyApp.counter_changed
+    journal_time = MyApp.journal_time
+    iterate_time = MyApp.iterate_time
+    publish = MyApp.publish
+
+    def __init__(self, config, source, model_path, journal_path, count_tolerance):
+        defaults = config['DEFAULT']
+        self.source = source
+        self.hardware = "cpu"
+        self.model_path = model_path
+        self.model_confidence = defaults.getfloat('model_confidence')
+        self.relative_jump_threshold = defaults.getfloat('relative_jump_threshold')
+        self.jump_window_seconds = defaults.getfloat('jump_window_seconds')
+        self.jump_max_gap = defaults.getfloat('jump_max_gap')
+        self.reorder_window = defaults.getint('reorder_window')
+        self.reorder_timeout_ms = defaults.getint('reorder_timeout_ms')
+        self.motion_gate = Setting(defaults.getboolean('motion_gate'))
+        self.motion_threshold = defaults.getfloat('motion_threshold')
+        self.motion_max_skip = defaults.getint('motion_max_skip')
+        self.qos_enabled = defaults.getboolean('qos_enabled')
+        self.qos_target_fps = defaults.getfloat('qos_target_fps')
+        self.qos_input_sizes = [int(size) for size in defaults['qos_input_sizes'].split(',')]
+        self.qos_max_stride = defaults.getint('qos_max_stride')
+        self.qos_min_bbox_px = defaults.getint('qos_min_bbox_px')
+        self.tk_model_verbose = Setting(False)
+        self.tk_save_lowscores = Setting(False)
+        self.publisher = None
+        self.jump_stats = JumpStats()
+
+        # Jumps are journaled as in a capture, so a long soak also compacts the journal
+        self.journal = CounterJournal(journal_path, defaults.getfloat('journal_flush_interval'),
+                                      defaults.getint('journal_flush_records'))
+        self.counter = AtomicCounter(0, self.counter_changed)
+        self.current_time = 0
+        self.timer_running = False
+        self.next_tick = self.timer_start = time.monotonic()
+        self.closed = False
+
+        # Written by count
+        self.count_tolerance = count_tolerance
+        self.loop = 0
+        self.loop_jumps = 0
+        self.loops_checked = 0
+        self.count_errors = 0
+
+    def after(self, milliseconds, callback):
+        """Run a callback on a timer thread, as Tk's event loop would on the GUI thread."""
+        if self.closed:
+            return
+        timer = threading.Timer(milliseconds / 1000, callback)
+        timer.daemon = True
+        timer.start()
+
+    def update_display(self):
+        """No window to update."""
+
+    def start_session_timer(self):
+        """Start ticking the session timer the way MyApp does at launch."""
+        self.next_tick = time.monotonic()
+        self.timer_start = self.next_tick
+        self.iterate_time()
+        self.timer_running = True
+
+    def timer_drift(self):
+        """Seconds the session timer is ahead of the wall clock, 0 when it keeps time."""
+        return self.current_time - int(time.monotonic() - self.timer_start)
+
+    def start_capture(self, detectors):
+        """Set up a capture the way MyApp.scanning does, without a jump index or harvester."""
+        capture = CaptureState(None, None)
+        capture.motion = MotionGate(self.motion_threshold, self.motion_max_skip)
+        qos = QosController(self.qos_input_sizes, self.qos_max_stride if self.qos_enabled else 1, self.qos_min_bbox_px)
+        capture.detectors = DetectorSet(detectors, self.model_path, qos)
+        capture.jump_detector = JumpDetector(self.relative_jump_threshold, self.jump_window_seconds, self.jump_max_gap)
+        return capture
+
+    def build_pipeline(self, capture, loops):
+        """The stages of MyApp.build_pipeline, fed by the soak source and ending in a sink instead of the window."""
+        detectors = capture.detectors
+        pipeline = Pipeline()
+        frames = pipeline.channel("frames", 8)
+        preprocessed = pipeline.channel("preprocessed", 60)
+        capture.reorder_buffer = pipeline.add_channel(
+            ReorderBuffer("results", self.reorder_window, self.reorder_timeout_ms / 1000))
+        counted = pipeline.channel("counted", 8)
+        display = pipeline.channel("display", 60)
+
+        pipeline.stage("grab", functools.partial(self.grab_frames, capture, loops), outputs=[frames])
+        capture.reorder_buffer.add_producer()
+        pipeline.stage("preprocess", functools.partial(self.preprocess_frame, capture), frames, [preprocessed],
+                       on_finish=capture.reorder_buffer.close)
+        pipeline.stage("infer", [functools.partial(self.infer_frame, detectors, worker_number)
+                                 for worker_number in range(detectors.workers)],
+                       preprocessed, [capture.reorder_buffer])
+        pipeline.stage("count", functools.partial(self.count_and_check, capture, worker_count=detectors.workers),
+                       capture.reorder_buffer, [counted])
+        pipeline.stage("render", functools.partial(self.render_frame, capture), counted, [display])
+        pipeline.stage("display", lambda frame: None, display)
+        return pipeline
+
+    def grab_frames(self, capture, loops):
+        """Feed the source as fast as the pipeline takes it."""
+        capture.fps = self.source.fps
+        return self.source.frames(loops)
+
+    def count_and_check(self, capture, item, worker_count):
+        """Run the count stage and check the jumps of each loop once it is done."""
+        loop = item[0] // self.source.loop_frames
+        if loop != self.loop:
+            self.finish_loop()
+            self.loop = loop
+
+        counter = self.counter.value
+        result = self.count_frame(capture, item, worker_count)
+        self.loop_jumps += self.counter.value - counter
+        return result
+
+    def finish_loop(self):
+        """Compare the jumps of the loop that just ended with the expected count."""
+        if self.source.jumps_per_loop is None:
+            self.source.jumps_per_loop = self.loop_jumps
+            print(f"First loop counted {self.loop_jumps} jump(s), every loop must match")
+        elif abs(self.loop_jumps - self.source.jumps_per_loop) > self.count_tolerance:
+            self.count_errors += 1
+            if self.count_errors <= 10:
+                print(f"Loop {self.loop} counted {self.loop_jumps} jump(s), expected {self.source.jumps_per_loop}")
+        self.loops_checked += 1
+        self.loop_jumps = 0
+
+def take_sample(app, pipeline, process, fps):
+    """Record the resources, queue depths and count state of the running soak."""
+    sample = {
+        'wall': time.monotonic() - app.timer_start,
+        'hours': pipeline.stages['count'].items / fps / 3600,
+        'rss_mb': process.memory_info().rss / (1024 * 1024),
+        'traced_mb': tracemalloc.get_traced_memory()[0] / (1024 * 1024) if tracemalloc.is_tracing() else 0.0,
+        'threads': process.num_threads(),
+        'counter': app.counter.value,
+        'count_errors': app.count_errors,
+        'timer_drift': app.timer_drift(),
+    }
+    for name, channel in pipeline.metrics()['channels'].items():
+        sample[f'depth_{name}'] = channel['depth']
+
+    # The GUI reads the rolling statistics every second
+    app.jump_stats.snapshot(sample['counter'])
+    return sample
+
+def trend(samples, key):
+    """Growth of a metric over the samples, from a least-squares line against simulated hours."""
+    hours = [sample['hours'] for sample in samples]
+    values = [sample[key] for sample in samples]
+    if len(set(hours)) < 2:
+        return 0.0
+    slope, _ = statistics.linear_regression(hours, values)
+    return slope * (hours[-1] - hours[0])
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak the capture pipeline with many simulated hours, faster than real time.")
+    parser.add_argument("--hours", type=float, default=12.0, help="Media hours to simulate")
+    parser.add_argument("--video", help="Loop this recording instead of the synthetic source, needs --model")
+    parser.add_argument("--model", help="Run this model instead of the synthetic detector")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frame rate of the synthetic source")
+    parser.add_argument("--period", type=float, default=1.0, help="Seconds between synthetic jumps")
+    parser.add_argument("--workers", type=int, default=2, help="Inference workers")
+    parser.add_argument("--stride", type=int, default=0, help="Hold the QoS frame stride at this value instead of adapting it")
+    parser.add_argument("--sample-seconds", type=float, default=5.0, help="Wall seconds between samples")
+    parser.add_argument("--warmup", type=float, default=0.1, help="Share of the run left out of the trends")
+    parser.add_argument("--max-rss-growth", type=float, default=64.0, help="Allowed RSS growth in MB")
+    parser.add_argument("--max-traced-growth", type=float, default=16.0, help="Allowed growth of Python allocations in MB")
+    parser.add_argument("--max-thread-growth", type=float, default=2.0, help="Allowed growth of the thread count")
+    parser.add_argument("--max-depth-growth", type=float, default=2.0, help="Allowed growth of each channel's depth")
+    parser.add_argument("--max-timer-drift", type=int, default=1, help="Allowed session timer drift in seconds")
+    parser.add_argument("--count-tolerance", type=int, default=0, help="Allowed jump difference per loop, e.g. 1 for videos")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip tracing Python allocations, which slows the run")
+    parser.add_argument("--top", type=int, default=10, help="Top growing allocation sites to show")
+    parser.add_argument("--csv", help="Write every sample to this CSV file")
+    args = parser.parse_args()
+
+    if args.video and not args.model:
+        exit("--video needs --model, the synthetic detector only finds the synthetic subject")
+
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    source = LoopedVideo(args.video) if args.video else SyntheticSource(args.fps, args.period, (360, 640, 3))
+    loops = math.ceil(args.hours * 3600 * source.fps / source.loop_frames)
+
+    if args.model:
+        from ultralytics import YOLO
+        from top_detection import TopDetector
+        detectors = [TopDetector(YOLO(args.model, task='detect')) for _ in range(args.workers)]
+    else:
+        detectors = [SyntheticDetector() for _ in range(args.workers)]
+
+    process = psutil.Process()
+    samples = []
+    with tempfile.TemporaryDirectory() as work_path:
+        journal_path = os.path.join(work_path, "counter.journal")
+        app = SoakApp(config, source, args.model or "synthetic", journal_path, args.count_tolerance)
+        capture = app.start_capture(detectors)
+        if args.stride:
+            # Stride-skipped frames must never make the reorder buffer drop inferred ones
+            app.qos_enabled = False
+            capture.detectors.qos.stride = args.stride
+        capture.pipeline = pipeline = app.build_pipeline(capture, loops)
+
+        if not args.no_tracemalloc:
+            tracemalloc.start()
+        print(f"Soaking {loops * source.loop_frames / source.fps / 3600:.1f}h of media "
+              f"({loops} loop(s) of {source.loop_frames} frame(s)) with {args.workers} worker(s)...")
+
+        # Sample from a thread while the pipeline runs, as the GUI thread reads it during a capture
+        done = threading.Event()
+        baseline = []
+
+        def sample_loop():
+            while not done.wait(args.sample_seconds):
+                sample = take_sample(app, pipeline, process, source.fps)
+                samples.append(sample)
+                if not baseline and tracemalloc.is_tracing() and sample['hours'] >= args.hours * args.warmup:
+                    baseline.append(tracemalloc.take_snapshot())
+
+                depths = " ".join(f"{key[6:]} {value}" for key, value in sample.items() if key.startswith('depth_'))
+                print(f"[{sample['hours']:6.2f}h | {sample['hours'] * 3600 * source.fps / sample['wall']:6.0f} fps] "
+                      f"RSS {sample['rss_mb']:7.1f} MB  traced {sample['traced_mb']:6.1f} MB  "
+                      f"threads {sample['threads']:3}  depth {depths}  count {sample['counter']}  "
+                      f"errors {sample['count_errors']}  timer drift {sample['timer_drift']:+d}s")
+
+        sampler = threading.Thread(target=sample_loop, daemon=True, name="sampler")
+        app.start_session_timer()
+        sampler.start()
+        failures = []
+        try:
+            pipeline.run()
+        except PipelineError as e:
+            failures.append(f"Pipeline failed: {e}")
+        finally:
+            done.set()
+            sampler.join()
+            app.timer_running = False
+            app.closed = True
+        app.finish_loop()
+
+        final = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        tracemalloc.stop()
+
+        # What the app would restore after a crash must be the final count
+        app.journal.close()
+        restored = CounterJournal(journal_path, 1, 1).replay()
+        if restored is None or restored[0] != app.counter.value:
+            failures.append(f"Journal restores {restored[0] if restored else None}, counter is {app.counter.value}")
+
+    print(f"\n{pipeline.report()}")
+    print(f"Reorder buffer skipped {capture.reorder_buffer.skipped} frame(s), dropped {capture.reorder_buffer.late} late result(s)")
+    if capture.reorder_buffer.skipped or capture.reorder_buffer.late:
+        failures.append("The reorder buffer lost frames of a lossless source")
+    print(f"{app.loops_checked} loop(s) checked, {app.count_errors} with a wrong jump count, counter {app.counter.value}")
+    if app.count_errors:
+        failures.append(f"{app.count_errors} loop(s) counted the wrong number of jumps")
+
+    if args.csv and samples:
+        with open(args.csv, 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=list(samples[0]))
+            writer.writeheader()
+            writer.writerows(samples)
+
+    # Trends leave out the warm-up, when pools, caches and queues are still filling
+    steady = [sample for sample in samples if sample['hours'] >= args.hours * args.warmup]
+    if len(steady) < 4:
+        failures.append(f"Only {len(steady)} sample(s) after warm-up, run longer or sample more often")
+    else:
+        bounds = [('rss_mb', args.max_rss_growth), ('threads', args.max_thread_growth)]
+        if not args.no_tracemalloc:
+            bounds.append(('traced_mb', args.max_traced_growth))
+        bounds += [(key, args.max_depth_growth) for key in steady[0] if key.startswith('depth_')]
+
+        print(f"\n{'Metric':<22} {'Start':>9} {'End':>9} {'Trend':>9} {'Bound':>7}")
+        for key, bound in bounds:
+            growth = trend(steady, key)
+            print(f"{key:<22} {steady[0][key]:>9.1f} {steady[-1][key]:>9.1f} {growth:>+9.1f} {bound:>7.1f}"
+                  f"{'  FAIL' if growth > bound else ''}")
+            if growth > bound:
+                failures.append(f"{key} grew by {growth:.1f} over the run, bound {bound}")
+
+    drift = max((abs(sample['timer_drift']) for sample in samples), default=0)
+    print(f"Session timer drift up to {drift}s over {samples[-1]['wall'] if samples else 0:.0f}s of wall time")
+    if drift > args.max_timer_drift:
+        failures.append(f"Session timer drifted by {drift}s")
+
+    if final is not None and baseline:
+        print("\nTop growing allocation sites since warm-up:")
+        for stat in final.compare_to(baseline[0], 'lineno')[:args.top]:
+            print(f"  {stat}")
+
+    if failures:
+        print()
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        exit("Soak test failed")
+    print("\nSoak test passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from jump_detector import JumpDetector
+
+DETECTION_CONFIDENCE = 0.05
+DETECTION_FIELDS = ["frame", "timestamp", "x1", "y1", "x2", "y2", "confidence"]
+
+
+def parse_values(text, cast=float):
+    """Parse '1,2,3' as a list or 'start:stop:step' as an inclusive range."""
+    if ':' not in text:
+        return [cast(value) for value in text.split(',')]
+
+    start, stop, step = (float(value) for value in text.split(':'))
+    count = int(round((stop - start) / step)) + 1
+    return [cast(round(start + i * step, 6)) for i in range(count)]
+
+def load_labels(labels_path):
+    """Load 'clip,count' rows, clip paths are relative to the labels file."""
+    base_path = os.path.dirname(labels_path)
+    with open(labels_path, newline='') as labelsfile:
+        return [(os.path.join(base_path, row['clip']), int(row['count'])) for row in csv.DictReader(labelsfile)]
+
+def detect_clip(model, clip_path, imgsz):
+    """Run the model once over a clip and return the best box of every frame that has one."""
+    import cv2
+
+    cap = cv2.VideoCapture(clip_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Unable to open clip: {clip_path}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    detections = []
+    frame_number = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                break
+
+            timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000 or frame_number / fps
+
+            # Keep weak boxes as well, the sweep applies the confidence threshold itself
+            results = model(source=frame, verbose=False, conf=DETECTION_CONFIDENCE, imgsz=imgsz, max_det=5)
+            boxes = results[0].boxes
+            if len(boxes) > 0:
+                best = int(boxes.conf.argmax())
+                x1, y1, x2, y2 = (int(value) for value in boxes.xyxy[best])
+                detections.append((frame_number, timestamp, x1, y1, x2, y2, float(boxes.conf[best])))
+            frame_number += 1
+    finally:
+        cap.release()
+
+    return detections
+
+def load_detections(model_path, clip_path, imgsz, reinfer=False):
+    """Return stored detections for a clip, running inference only if none are stored."""
+    detections_path = f'{clip_path}_detections.csv'
+    if os.path.isfile(detections_path) and not reinfer:
+        with open(detections_path, newline='') as detectionsfile:
+            return [(int(row['frame']), float(row['timestamp']), int(row['x1']), int(row['y1']),
+                     int(row['x2']), int(row['y2']), float(row['confidence']))
+                    for row in csv.DictReader(detectionsfile)]
+
+    from ultralytics import YOLO
+    print(f"Running inference on {clip_path}...")
+    detections = detect_clip(YOLO(model_path), clip_path, imgsz)
+
+    with open(detections_path, 'w', newline='') as detectionsfile:
+        writer = csv.writer(detectionsfile)
+        writer.writerow(DETECTION_FIELDS)
+        writer.writerows(detections)
+    print(f"Saved {len(detections)} detections: {detections_path}")
+    return detections
+
+def count_jumps(detections, threshold, confidence, window, max_gap):
+    """Replay stored detections through the jump detector the way the app does."""
+    detector = JumpDetector(threshold, window, max_gap)
+    jumps = 0
+    for _, timestamp, x1, y1, x2, y2, detection_confidence in detections:
+        jumps += detector.observe(timestamp, ((x1, y1, x2, y2), detection_confidence), confidence)
+    return jumps
+
+def decimate(detections, factor):
+    """Keep every `factor`-th frame, as if the pipeline had dropped the rest."""
+    return [detection for detection in detections if detection[0] % factor == 0]
+
+# Clip detections are handed to each worker process once instead of with every task
+_clips = None
+_max_gap = None
+
+def init_worker(clips, max_gap):
+    global _clips, _max_gap
+    _clips = clips
+    _max_gap = max_gap
+
+def evaluate(settings):
+    """Count every clip with one settings combination and return its errors."""
+    threshold, confidence, window = settings
+    counts = [count_jumps(detections, threshold, confidence, window, _max_gap) for detections, _ in _clips]
+    errors = [count - true_count for count, (_, true_count) in zip(counts, _clips)]
+    total_true = sum(true_count for _, true_count in _clips) or 1
+    return {
+        'threshold': threshold,
+        'confidence': confidence,
+        'window': window,
+        'abs_error': sum(abs(error) for error in errors),
+        'error_rate': sum(abs(error) for error in errors) / total_true,
+        'max_error': max(abs(error) for error in errors),
+        'counts': counts,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep jump detection settings against labelled clips.")
+    parser.add_argument("labels", help="CSV with 'clip,count' rows giving the true jump count of each clip")
+    parser.add_argument("--model", default="Models/trained_n_int8_openvino_model", help="Model used for inference")
+    parser.add_argument("--imgsz", type=int, default=416, help="Model input size")
+    parser.add_argument("--thresholds", default="1.5:3.0:0.25", help="relative_jump_threshold values")
+    parser.add_argument("--confidences", default="0.5:0.9:0.05", help="model_confidence values")
+    parser.add_argument("--windows", default="0.2:0.5:0.05", help="jump_window_seconds values")
+    parser.add_argument("--max-gap", type=float, default=0.5, help="jump_max_gap used for every combination")
+    parser.add_argument("--decimations", default="1,2,3,4", help="Frame decimation factors to check the best settings at")
+    parser.add_argument("--decimation-tolerance", type=int, default=1,
+                        help="Allowed count difference per clip between a decimation and every frame")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel evaluation processes")
+    parser.add_argument("--top", type=int, default=15, help="Rows shown in the accuracy table")
+    parser.add_argument("--output", help="Write the full results table to this CSV")
+    parser.add_argument("--reinfer", action="store_true", help="Run inference again even if detections are stored")
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels)
+    clips = [(load_detections(args.model, clip_path, args.imgsz, args.reinfer), true_count)
+             for clip_path, true_count in labels]
+
+    grid = list(itertools.product(parse_values(args.thresholds), parse_values(args.confidences),
+                                  parse_values(args.windows)))
+    print(f"Evaluating {len(grid)} combinations on {len(clips)} clip(s) with {args.workers} worker(s)...")
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(clips, args.max_gap)) as executor:
+        results = list(executor.map(evaluate, grid, chunksize=max(1, len(grid) // (args.workers * 4))))
+
+    # Lowest total error first, the smaller worst clip breaks ties
+    results.sort(key=lambda result: (result['abs_error'], result['max_error']))
+
+    print(f"\n{'Threshold':>9} {'Conf':>5} {'Window':>6} {'AbsErr':>7} {'ErrRate':>8} {'MaxErr':>6}  Counts")
+    for result in results[:args.top]:
+        print(f"{result['threshold']:9.2f} {result['confidence']:5.2f} {result['window']:6.2f} "
+              f"{result['abs_error']:7d} {result['error_rate']:8.2%} {result['max_error']:6d}  {result['counts']}")
+    print(f"{'':>32}True counts: {[true_count for _, true_count in labels]}")
+
+    if args.output:
+        with open(args.output, 'w', newline='') as outputfile:
+            writer = csv.writer(outputfile)
+            writer.writerow(["threshold", "confidence", "window", "abs_error", "error_rate", "max_error"])
+            for result in results:
+                writer.writerow([result['threshold'], result['confidence'], result['window'],
+                                 result['abs_error'], result['error_rate'], result['max_error']])
+        print(f"Results saved: {args.output}")
+
+    best = results[0]
+
+    # Dropping frames must not change the count, replay the best settings on decimated detections
+    print(f"\n{'Decimation':>10}  Counts")
+    baseline = None
+    mismatches = []
+    for factor in [1] + [factor for factor in parse_values(args.decimations, int) if factor != 1]:
+        counts = [count_jumps(decimate(detections, factor), best['threshold'], best['confidence'],
+                              best['window'], args.max_gap) for detections, _ in clips]
+        if baseline is None:
+            baseline = counts
+        differences = [count - full for count, full in zip(counts, baseline)]
+        print(f"{factor:>10}  {counts}")
+        mismatches += [(factor, clip_path, difference) for (clip_path, _), difference in zip(labels, differences)
+                       if abs(difference) > args.decimation_tolerance]
+
+    print("\nRecommended config.ini settings:")
+    print(f"  relative_jump_threshold = {best['threshold']}")
+    print(f"  model_confidence = {best['confidence']}")
+    print(f"  jump_window_seconds = {best['window']}")
+
+    if mismatches:
+        print(f"\nCounts changed by more than {args.decimation_tolerance} when frames were dropped:")
+        for factor, clip_path, difference in mismatches:
+            print(f"  {clip_path}: {difference:+d} at decimation {factor}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
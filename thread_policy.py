@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+import cv2
+import psutil
+
+PRESETS = ("default", "balanced", "pinned")
+
+
+def cpu_topology():
+    """Return the usable physical cores, each as the list of its logical CPU ids."""
+    if hasattr(os, 'sched_getaffinity'):
+        allowed = sorted(os.sched_getaffinity(0))
+    else:
+        allowed = list(range(os.cpu_count() or 1))
+
+    # Linux names the SMT siblings of every logical CPU
+    cores = {}
+    for cpu in allowed:
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") as siblingsfile:
+                siblings = siblingsfile.read().strip()
+        except OSError:
+            cores = None
+            break
+        cores.setdefault(siblings, []).append(cpu)
+
+    if cores:
+        return list(cores.values())
+
+    # Elsewhere siblings are numbered next to each other
+    physical = psutil.cpu_count(logical=False) or len(allowed)
+    smt = max(1, len(allowed) // physical)
+    return [allowed[i:i + smt] for i in range(0, len(allowed), smt)]
+
+def set_openvino_threads(model, model_path, threads, cache_dir=None):
+    """Recompile a warmed-up ultralytics OpenVINO model to run on `threads` inference threads.
+
+    `threads` None keeps the runtime default. With a cache directory the
+    compiled model is stored there, or loaded from it on later launches.
+    """
+    predictor = getattr(model, 'predictor', None)
+    backend = getattr(predictor, 'model', None) if predictor is not None else None
+    if backend is None or not getattr(backend, 'xml', False):
+        return
+
+    import openvino as ov
+
+    core = ov.Core()
+    xml_path = next(Path(model_path).glob('*.xml'))
+    config = {"PERFORMANCE_HINT": "LATENCY"}
+    if threads:
+        config["INFERENCE_NUM_THREADS"] = threads
+    if cache_dir is not None:
+        config["CACHE_DIR"] = cache_dir
+    backend.ov_compiled_model = core.compile_model(core.read_model(xml_path), "CPU", config)
+
+class ThreadPolicy:
+    """Size runtime thread pools to the CPU layout and optionally pin pipeline stages.
+
+    The first physical core is kept for the grabber, processor, writer and
+    display, the rest are split evenly between the inference workers, and each
+    worker's OpenVINO and torch pools get one thread per physical core it owns.
+    "default" changes nothing, "balanced" only sizes the pools and "pinned"
+    also binds every stage to its cores.
+    """
+
+    def __init__(self, preset, workers):
+        if preset not in PRESETS:
+            print(f"Unknown thread preset '{preset}', using 'balanced'")
+            preset = "balanced"
+
+        self.preset = preset
+        self.workers = workers
+        self.cores = cpu_topology()
+
+        io_cores = self.cores[:1]
+        compute_cores = self.cores[1:] if len(self.cores) > workers else self.cores
+        self.io_cpus = [cpu for core in io_cores for cpu in core]
+
+        # Contiguous share of compute cores per worker, workers share cores when there are too few
+        count = len(compute_cores)
+        if count >= workers:
+            self.worker_cores = [compute_cores[i * count // workers:(i + 1) * count // workers]
+                                 for i in range(workers)]
+        else:
+            self.worker_cores = [[compute_cores[i % count]] for i in range(workers)]
+
+        self.warned = False
+
+    def describe(self):
+        """Return a one-line summary of the layout and assignments."""
+        logical = sum(len(core) for core in self.cores)
+        shares = ", ".join(f"worker {i}: {len(cores)} core(s)" for i, cores in enumerate(self.worker_cores))
+        return (f"Thread preset '{self.preset}': {len(self.cores)} physical / {logical} logical CPUs, "
+                f"I/O stages on CPUs {self.io_cpus}, {shares}")
+
+    def worker_threads(self, worker_number):
+        """Inference threads for a worker, one per physical core it owns."""
+        return len(self.worker_cores[worker_number])
+
+    def apply_runtime(self):
+        """Size the OpenCV and torch pools so stages do not oversubscribe the cores."""
+        print(self.describe())
+        if self.preset == "default":
+            return
+
+        # OpenCV only does small per-frame operations here, its pool would compete with inference
+        cv2.setNumThreads(1)
+
+        # Torch is only configured when already loaded, the CPU runtime does not import it
+        torch = sys.modules.get('torch')
+        if torch is not None:
+            torch.set_num_threads(max(1, min(self.worker_threads(i) for i in range(self.workers))))
+
+    def set_openvino_threads(self, model, model_path, worker_number, cache_dir=None):
+        """Recompile a warmed-up ultralytics OpenVINO model with this worker's thread count and compile cache.
+
+        The "default" preset keeps the runtime's thread count, the model is then only recompiled for the cache.
+        """
+        if self.preset != "default":
+            set_openvino_threads(model, model_path, self.worker_threads(worker_number), cache_dir)
+        elif cache_dir is not None:
+            set_openvino_threads(model, model_path, None, cache_dir)
+
+    def pin(self, stage, worker_number=None):
+        """Bind the calling thread to the CPUs of its stage when the preset asks for it."""
+        if self.preset != "pinned":
+            return
+
+        if stage == "worker":
+            cpus = [cpu for core in self.worker_cores[worker_number] for cpu in core]
+        else:
+            cpus = self.io_cpus
+
+        # On Linux the thread id addresses a single thread, threads it starts inherit the mask
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(threading.get_native_id(), cpus)
+        elif not self.warned:
+            print("Thread pinning is not supported on this platform, pool sizes are still applied")
+            self.warned = True
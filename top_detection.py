@@ -0,0 +1,88 @@
+def top_box(preds, conf):
+    """Return the most confident box of a raw YOLO detect output as (x1, y1, x2, y2, confidence), or None.
+
+    Coordinates are in model input pixels. NMS never suppresses the highest
+    scoring box, so this is the first box NMS would return, found without
+    running it. Works on torch tensors and NumPy arrays alike.
+    """
+    if isinstance(preds, (list, tuple)):
+        preds = preds[0]
+
+    # One image, rows are x, y, w, h and a score per class, columns are anchors
+    prediction = preds[0]
+    scores = prediction[4:].amax(0) if hasattr(prediction, 'amax') else prediction[4:].max(0)
+    best = int(scores.argmax())
+    confidence = float(scores[best])
+    if confidence < conf:
+        return None
+
+    x, y, w, h = prediction[:4, best].tolist()
+    return x - w / 2, y - h / 2, x + w / 2, y + h / 2, confidence
+
+def scale_box(box, input_shape, frame_shape):
+    """Map a box from the letterboxed model input back to frame pixels, as ultralytics' scale_boxes does."""
+    input_height, input_width = input_shape
+    frame_height, frame_width = frame_shape[:2]
+    gain = min(input_height / frame_height, input_width / frame_width)
+    pad_x = round((input_width - frame_width * gain) / 2 - 0.1)
+    pad_y = round((input_height - frame_height * gain) / 2 - 0.1)
+
+    x1, y1, x2, y2 = box
+    return (min(max((x1 - pad_x) / gain, 0), frame_width), min(max((y1 - pad_y) / gain, 0), frame_height),
+            min(max((x2 - pad_x) / gain, 0), frame_width), min(max((y2 - pad_y) / gain, 0), frame_height))
+
+def best_of(results):
+    """Most confident box of ultralytics results as ((x1, y1, x2, y2), confidence), or None."""
+    boxes = results[0].boxes
+    if len(boxes) == 0:
+        return None
+    best = int(boxes.conf.argmax())
+    return tuple(int(value) for value in boxes.xyxy[best]), float(boxes.conf[best])
+
+
+class TopDetector:
+    """Runs a YOLO detect model and returns only its most confident box.
+
+    Only one box per frame is ever used, so the fast path stops after the
+    backend: the ultralytics predictor still letterboxes the frame and runs
+    the model, but NMS and the Results objects are skipped and the best box
+    is taken from the raw output with tensor ops.
+
+    The predictor is configured by a regular call, so the first frame and any
+    frame whose predict arguments changed (e.g. a new input size) take the
+    full path. So do verbose calls and model outputs the fast path does not
+    understand, such as end-to-end heads that return boxes after NMS.
+    """
+
+    def __init__(self, model, fast=True):
+        self.model = model
+        self.fast = fast
+        self.predict_args = None
+        self.supported = None
+
+    def __call__(self, frame, verbose=False, **predict_args):
+        """Detect on a frame and return ((x1, y1, x2, y2), confidence) of the best box, or None."""
+        if not self.fast or verbose or self.supported is False or predict_args != self.predict_args:
+            results = self.model(source=frame, verbose=verbose, **predict_args)
+            self.predict_args = predict_args
+            return best_of(results)
+
+        import torch
+
+        predictor = self.model.predictor
+        with torch.inference_mode():
+            image = predictor.preprocess([frame])
+            preds = predictor.inference(image)
+
+        if self.supported is None:
+            output = preds[0] if isinstance(preds, (list, tuple)) else preds
+            self.supported = output.ndim == 3 and output.shape[1] == 4 + len(self.model.names)
+            if not self.supported:
+                print("Model output is not a raw detect head, using full post-processing")
+                return best_of(predictor.postprocess(preds, image, [frame]))
+
+        box = top_box(preds, predictor.args.conf)
+        if box is None:
+            return None
+        bbox = scale_box(box[:4], image.shape[2:], frame.shape)
+        return tuple(int(value) for value in bbox), box[4]